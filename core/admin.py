@@ -1,10 +1,45 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Consultorio, Paciente, Turno, Evolucion, Documento, Informe, Invitacion, AuditLog
+from .models import User, Consultorio, Paciente, Turno, Evolucion, Documento, Informe, Invitacion, AuditLog, OcupacionDiaria, AgendaToken, CorreoSaliente, Sede
+
+
+class SoftDeleteListFilter(admin.SimpleListFilter):
+    """
+    Por defecto el listado muestra solo registros activos.
+    """
+    title = "estado"
+    parameter_name = "estado_registro"
+
+    def lookups(self, request, model_admin):
+        return (
+            ("eliminados", "Eliminados"),
+            ("todos", "Todos"),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == "eliminados":
+            return queryset.dead()
+        if self.value() == "todos":
+            return queryset
+        return queryset.alive()
+
+
+class SoftDeleteAdminMixin:
+    """
+    El admin trabaja sobre `all_objects` para poder abrir y restaurar
+    registros eliminados; el listado filtra con SoftDeleteListFilter.
+    """
+
+    def get_queryset(self, request):
+        qs = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            qs = qs.order_by(*ordering)
+        return qs
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, BaseUserAdmin):
     ordering = ("email",)
     list_display = (
         "email",
@@ -16,13 +51,13 @@ class UserAdmin(BaseUserAdmin):
         "deleted_at",
         "deleted_by",
     )
-    list_filter = ("role", "is_enabled", "is_active")
+    list_filter = (SoftDeleteListFilter, "role", "is_enabled")
     search_fields = ("email", "first_name", "last_name")
 
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         ("Información personal", {"fields": ("first_name", "last_name")}),
-        ("Rol y acceso", {"fields": ("role", "is_enabled")}),
+        ("Rol y acceso", {"fields": ("role", "is_enabled", "sedes")}),
         (
             "Permisos Django",
             {
@@ -55,33 +90,44 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
 
-    filter_horizontal = ("groups", "user_permissions")
+    filter_horizontal = ("sedes", "groups", "user_permissions")
+
+
+@admin.register(Sede)
+class SedeAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "codigo", "cantidad_consultorios", "creado_en")
+    search_fields = ("nombre", "codigo")
+    prepopulated_fields = {"codigo": ("nombre",)}
+    ordering = ("nombre",)
 
 
 @admin.register(Consultorio)
-class ConsultorioAdmin(admin.ModelAdmin):
-    list_display = ("nombre", "numero", "is_active", "deleted_at", "deleted_by")
+class ConsultorioAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    list_display = ("nombre", "sede", "numero", "is_active", "deleted_at", "deleted_by")
+    list_filter = (SoftDeleteListFilter, "sede")
     search_fields = ("nombre",)
-    ordering = ("numero",)
+    ordering = ("sede", "numero")
 
 
 @admin.register(Paciente)
-class PacienteAdmin(admin.ModelAdmin):
+class PacienteAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = (
         "nombre_completo",
         "dni",
+        "sede",
         "email",
         "telefono",
         "is_active",
         "deleted_at",
         "deleted_by",
     )
+    list_filter = (SoftDeleteListFilter, "sede")
     search_fields = ("nombre_completo", "dni", "email")
     ordering = ("nombre_completo",)
 
 
 @admin.register(Turno)
-class TurnoAdmin(admin.ModelAdmin):
+class TurnoAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = (
         "paciente",
         "profesional",
@@ -93,28 +139,31 @@ class TurnoAdmin(admin.ModelAdmin):
         "deleted_at",
         "deleted_by",
     )
-    list_filter = ("estado", "consultorio", "is_active")
+    list_filter = (SoftDeleteListFilter, "sede", "estado", "consultorio")
     search_fields = ("paciente__nombre_completo", "profesional__email")
     ordering = ("inicio",)
 
 
 @admin.register(Evolucion)
-class EvolucionAdmin(admin.ModelAdmin):
+class EvolucionAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ("paciente", "profesional", "creado_en", "is_active", "deleted_at", "deleted_by")
+    list_filter = (SoftDeleteListFilter,)
     search_fields = ("paciente__nombre_completo", "profesional__email")
     ordering = ("-creado_en",)
 
 
 @admin.register(Documento)
-class DocumentoAdmin(admin.ModelAdmin):
+class DocumentoAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ("paciente", "nombre", "creado_en", "is_active", "deleted_at", "deleted_by")
+    list_filter = (SoftDeleteListFilter,)
     search_fields = ("paciente__nombre_completo", "nombre")
     ordering = ("-creado_en",)
 
 
 @admin.register(Informe)
-class InformeAdmin(admin.ModelAdmin):
+class InformeAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ("paciente", "profesional", "titulo", "actualizado_en", "is_active", "deleted_at", "deleted_by")
+    list_filter = (SoftDeleteListFilter,)
     search_fields = ("paciente__nombre_completo", "profesional__email", "titulo")
     ordering = ("-actualizado_en",)
 
@@ -132,3 +181,24 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_filter = ("action", "target_type")
     search_fields = ("actor__email", "target_id")
     ordering = ("-created_at",)
+
+
+@admin.register(OcupacionDiaria)
+class OcupacionDiariaAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "consultorio", "profesional", "estado", "turnos", "minutos")
+    list_filter = ("estado", "consultorio")
+    ordering = ("-fecha",)
+
+
+@admin.register(AgendaToken)
+class AgendaTokenAdmin(admin.ModelAdmin):
+    list_display = ("profesional", "consultorio", "creado_por", "creado_en")
+    ordering = ("-creado_en",)
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ("asunto", "estado", "intentos", "proximo_intento", "creado_en", "enviado_en")
+    list_filter = ("estado",)
+    search_fields = ("asunto",)
+    ordering = ("-creado_en",)
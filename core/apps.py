@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+
+def _revisar_admin(app_configs, **kwargs):
+    # Los checks del admin necesitan los ModelAdmin registrados.
+    from django.contrib import admin
+
+    admin.autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class AdminDiferidoConfig(SimpleAdminConfig):
+    """
+    Admin sin autodiscover al arrancar: los módulos admin.py se importan
+    recién con el primer pedido a /admin/ (ver lazos_backend/urls_admin.py)
+    o al correr los checks. Acorta el arranque de cada worker.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(_revisar_admin, checks.Tags.admin)
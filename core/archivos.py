@@ -0,0 +1,130 @@
+"""
+Almacenamiento de los archivos de Documento.
+
+Cada archivo vive en documentos/ab/cd/, con ab/cd tomados de un hash, para
+que ningún directorio crezca sin límite. El esquema plano anterior
+(documentos/<nombre>) se migra con `reubicar_documentos`; lo que la base
+ya no referencia lo recoge `limpiar_documentos`.
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+
+CARPETA = "documentos"
+CUARENTENA = getattr(settings, "DOCUMENTOS_CUARENTENA", "cuarentena")
+# Los eliminados se conservan este tiempo para poder restaurarlos.
+RETENCION_DIAS = getattr(settings, "DOCUMENTOS_RETENCION_DIAS", 90)
+# Un archivo recién subido puede no tener todavía su fila confirmada.
+GRACIA_HORAS = getattr(settings, "DOCUMENTOS_GRACIA_HORAS", 24)
+
+# Nombres ya fragmentados, como filtro __regex en la base.
+PATRON_FRAGMENTADO = rf"^{CARPETA}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/"
+
+
+def ruta_documento(instance, filename):
+    """
+    upload_to de Documento.archivo: documentos/ab/cd/<token>-<nombre>.
+    """
+    token = uuid.uuid4().hex
+    nombre = get_valid_filename(os.path.basename(filename))
+    return f"{CARPETA}/{token[:2]}/{token[2:4]}/{token[4:16]}-{nombre}"
+
+
+def destino(nombre):
+    """
+    Ubicación fragmentada de un archivo del esquema plano. Sale del hash
+    del nombre actual: repetir la reubicación da siempre el mismo destino.
+    """
+    clave = hashlib.sha1(nombre.encode("utf-8")).hexdigest()
+    return f"{CARPETA}/{clave[:2]}/{clave[2:4]}/{os.path.basename(nombre)}"
+
+
+def mover(origen, nuevo, storage=None):
+    """
+    Mueve un archivo dentro del storage y devuelve el nombre final. En
+    disco es un rename; en otros storages, copia y borrado.
+    """
+    storage = storage or default_storage
+    try:
+        ruta_origen = storage.path(origen)
+        ruta_nueva = storage.path(nuevo)
+    except NotImplementedError:
+        with storage.open(origen, "rb") as archivo:
+            nuevo = storage.save(nuevo, archivo)
+        storage.delete(origen)
+        return nuevo
+    os.makedirs(os.path.dirname(ruta_nueva), exist_ok=True)
+    os.replace(ruta_origen, ruta_nueva)
+    return nuevo
+
+
+def existe(nombre, storage=None):
+    return (storage or default_storage).exists(nombre)
+
+
+def descartar(nombre, cuarentena=False, storage=None):
+    """
+    Borra el archivo o, con `cuarentena`, lo aparta fuera de documentos/
+    conservando su ruta relativa.
+    """
+    storage = storage or default_storage
+    if not storage.exists(nombre):
+        return
+    if cuarentena:
+        mover(nombre, f"{CUARENTENA}/{nombre}", storage)
+    else:
+        storage.delete(nombre)
+
+
+def descartar_al_confirmar(nombre, using=None):
+    """
+    Borra un archivo reemplazado recién cuando la transacción confirma:
+    si se revierte, la fila sigue apuntando a él.
+    """
+    transaction.on_commit(lambda: descartar(nombre), using=using)
+
+
+def recorrer(storage=None, carpeta=CARPETA):
+    """
+    Genera (nombre, modificado) de cada archivo bajo `carpeta` a medida
+    que recorre el árbol, sin listarlo entero en memoria.
+    """
+    storage = storage or default_storage
+    try:
+        raiz = storage.path(carpeta)
+    except NotImplementedError:
+        yield from _recorrer_storage(storage, carpeta)
+        return
+
+    base = storage.path("")
+    pendientes = [raiz]
+    while pendientes:
+        try:
+            entradas = os.scandir(pendientes.pop())
+        except FileNotFoundError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    pendientes.append(entrada.path)
+                elif entrada.is_file(follow_symlinks=False):
+                    nombre = os.path.relpath(entrada.path, base).replace(os.sep, "/")
+                    modificado = datetime.fromtimestamp(
+                        entrada.stat().st_mtime, tz=dt_timezone.utc
+                    )
+                    yield nombre, modificado
+
+
+def _recorrer_storage(storage, carpeta):
+    directorios, archivos = storage.listdir(carpeta)
+    for archivo in archivos:
+        nombre = f"{carpeta}/{archivo}"
+        yield nombre, storage.get_modified_time(nombre)
+    for directorio in directorios:
+        yield from _recorrer_storage(storage, f"{carpeta}/{directorio}")
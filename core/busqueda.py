@@ -0,0 +1,109 @@
+"""
+Búsqueda de texto completo (PostgreSQL, configuración "spanish").
+
+Evolucion e Informe guardan su tsvector en `busqueda`, que se recalcula en
+el mismo UPDATE/INSERT del save() cuando cambia el texto fuente. En otras
+bases la columna queda vacía y la búsqueda no está disponible.
+
+Los fragmentos resaltados se arman desde el mismo texto que se indexó: en
+Informe es `texto_busqueda` (título y texto visible, sin etiquetas ni
+entidades HTML), que se guarda junto con el tsvector.
+"""
+import html
+import re
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connections, router
+from django.db.models import F, Value
+from django.utils.html import strip_tags
+
+CONFIG = "spanish"
+
+# Marcas de resaltado: caracteres de control que no aparecen en el texto,
+# así el fragmento se escapa completo antes de poner los <mark>.
+_INICIO = "\x02"
+_FIN = "\x03"
+_ESPACIOS = re.compile(r"\s+")
+# Etiquetas de bloque y saltos: separan palabras aunque no haya espacio
+# entre ellas ("<p>uno</p><p>dos</p>").
+_BLOQUES = re.compile(
+    r"<(?:br|/?(?:p|div|li|ul|ol|tr|td|th|h[1-6]|table|blockquote))\b[^>]*>",
+    re.IGNORECASE,
+)
+
+
+def texto_plano(contenido_html):
+    """
+    Texto visible de un informe: sin etiquetas ni entidades HTML.
+    """
+    texto = _BLOQUES.sub(" ", contenido_html or "")
+    texto = html.unescape(strip_tags(texto))
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def disponible(model, using=None):
+    using = using or router.db_for_read(model)
+    return connections[using].vendor == "postgresql"
+
+
+def preparar(instancia, texto, campos_fuente, kwargs, campo_texto=None):
+    """
+    Asigna el tsvector como expresión para que se calcule en el mismo save()
+    y, con `campo_texto`, guarda ahí el texto indexado. Si el save() tiene
+    update_fields sin los campos fuente, no se toca.
+    """
+    using = kwargs.get("using") or router.db_for_write(type(instancia), instance=instancia)
+    if connections[using].vendor != "postgresql":
+        return
+    campos = ["busqueda", campo_texto] if campo_texto else ["busqueda"]
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None:
+        if not set(campos_fuente) & set(update_fields):
+            return
+        faltantes = [campo for campo in campos if campo not in update_fields]
+        if faltantes:
+            kwargs["update_fields"] = [*update_fields, *faltantes]
+    instancia.busqueda = SearchVector(Value(texto), config=CONFIG)
+    if campo_texto:
+        setattr(instancia, campo_texto, texto)
+
+
+def buscar(queryset, consulta, texto):
+    """
+    Filtra por `consulta` (sintaxis tipo buscador web) y anota `rank` y
+    `fragmento`; `texto` es el campo indexado del que se extraen los
+    fragmentos.
+    """
+    query = SearchQuery(consulta, config=CONFIG, search_type="websearch")
+    return (
+        queryset.filter(busqueda=query)
+        .annotate(
+            rank=SearchRank(F("busqueda"), query),
+            fragmento=SearchHeadline(
+                texto,
+                query,
+                config=CONFIG,
+                start_sel=_INICIO,
+                stop_sel=_FIN,
+                max_fragments=3,
+                fragment_delimiter=" … ",
+            ),
+        )
+        .order_by("-rank")
+    )
+
+
+def resaltar(fragmento):
+    """
+    Escapa el fragmento y convierte las marcas de ts_headline en <mark>.
+    """
+    return (
+        html.escape(fragmento or "")
+        .replace(_INICIO, "<mark>")
+        .replace(_FIN, "</mark>")
+    )
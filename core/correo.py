@@ -0,0 +1,178 @@
+"""
+Bandeja de salida de emails (ver CorreoSaliente).
+"""
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+logger = logging.getLogger(__name__)
+
+LOTE = getattr(settings, "CORREO_LOTE", 50)
+MAX_INTENTOS = getattr(settings, "CORREO_MAX_INTENTOS", 6)
+# Espera antes del reintento n: BASE * 2**(n-1), con tope.
+ESPERA_BASE_SEGUNDOS = getattr(settings, "CORREO_ESPERA_BASE_SEGUNDOS", 60)
+ESPERA_MAX_SEGUNDOS = getattr(settings, "CORREO_ESPERA_MAX_SEGUNDOS", 6 * 60 * 60)
+# Tiempo que un worker tiene para enviar lo que reservó.
+RESERVA_SEGUNDOS = getattr(settings, "CORREO_RESERVA_SEGUNDOS", 10 * 60)
+
+
+def encolar(asunto, cuerpo, destinatarios, remitente=None, clave=None):
+    """
+    Deja el email en la bandeja de salida. No abre conexiones SMTP: si la
+    transacción en curso se revierte, el email tampoco se envía.
+    """
+    return CorreoSaliente.objects.create(
+        clave=clave,
+        asunto=asunto,
+        cuerpo=cuerpo,
+        destinatarios=list(destinatarios),
+        remitente=remitente or getattr(settings, "DEFAULT_FROM_EMAIL", None),
+    )
+
+
+def encolar_lote(correos):
+    """
+    Encola muchos CorreoSaliente (sin guardar) en un solo INSERT. Los que
+    traen una clave ya encolada (o repetida en la tanda) se descartan, así
+    que repetir la misma tanda no duplica envíos. Devuelve la cantidad de
+    emails que quedaron encolados.
+    """
+    claves = [c.clave for c in correos if c.clave]
+    existentes = set(
+        CorreoSaliente.objects.filter(clave__in=claves).values_list("clave", flat=True)
+    )
+    nuevos = [c for c in correos if not c.clave or c.clave not in existentes]
+    for c in nuevos:
+        c.remitente = c.remitente or getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    claves_nuevas = {c.clave for c in nuevos if c.clave}
+    sin_clave = len(nuevos) - sum(1 for c in nuevos if c.clave)
+    # ignore_conflicts cubre la carrera con otra corrida simultánea y no
+    # informa qué filas descartó: se cuentan las claves que quedaron. Si
+    # otra corrida insertó alguna en el medio, las dos la cuentan.
+    CorreoSaliente.objects.bulk_create(nuevos, ignore_conflicts=True)
+    con_clave = (
+        CorreoSaliente.objects.filter(clave__in=claves_nuevas).count() if claves_nuevas else 0
+    )
+    return sin_clave + con_clave
+
+
+def _espera(intentos):
+    segundos = ESPERA_BASE_SEGUNDOS * 2 ** max(intentos - 1, 0)
+    return timezone.timedelta(seconds=min(segundos, ESPERA_MAX_SEGUNDOS))
+
+
+def _fallo(correo, error, now):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:2000]
+    if correo.intentos >= MAX_INTENTOS:
+        correo.estado = CorreoSaliente.Estados.FALLIDO
+    else:
+        correo.estado = CorreoSaliente.Estados.PENDIENTE
+        correo.proximo_intento = now + _espera(correo.intentos)
+
+
+def _reservar(lote, now):
+    """
+    Toma hasta `lote` emails vencidos y los deja ENVIANDO por
+    RESERVA_SEGUNDOS, en una transacción corta: el envío SMTP corre sin
+    locks. Un email ENVIANDO con la reserva vencida es de un worker que se
+    cayó a mitad del lote y se vuelve a tomar.
+    """
+    with transaction.atomic():
+        correos = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True)
+            .filter(
+                estado__in=[
+                    CorreoSaliente.Estados.PENDIENTE,
+                    CorreoSaliente.Estados.ENVIANDO,
+                ],
+                proximo_intento__lte=now,
+            )
+            .order_by("proximo_intento")[:lote]
+        )
+        if correos:
+            CorreoSaliente.objects.filter(pk__in=[c.pk for c in correos]).update(
+                estado=CorreoSaliente.Estados.ENVIANDO,
+                proximo_intento=now + timezone.timedelta(seconds=RESERVA_SEGUNDOS),
+            )
+    return correos
+
+
+def procesar_lote(lote=LOTE):
+    """
+    Envía hasta `lote` emails vencidos por una única conexión SMTP.
+    Las filas se reservan con SKIP LOCKED, así que varios workers pueden
+    correr en paralelo sin enviar dos veces el mismo email. Cada resultado
+    se guarda apenas se conoce: si el proceso se cae, solo el email que
+    estaba en vuelo puede salir dos veces.
+    Devuelve (enviados, fallidos).
+    """
+    now = timezone.now()
+    correos = _reservar(lote, now)
+    if not correos:
+        return 0, 0
+
+    campos = ["estado", "intentos", "proximo_intento", "ultimo_error", "enviado_en"]
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("No se pudo abrir la conexión de email: %s", exc)
+        for correo in correos:
+            _fallo(correo, exc, now)
+        CorreoSaliente.objects.bulk_update(correos, campos)
+        return 0, len(correos)
+
+    enviados = 0
+    fallidos = 0
+    try:
+        for correo in correos:
+            mensaje = EmailMessage(
+                subject=correo.asunto,
+                body=correo.cuerpo,
+                from_email=correo.remitente,
+                to=correo.destinatarios,
+                connection=connection,
+            )
+            try:
+                connection.send_messages([mensaje])
+            except Exception as exc:
+                logger.warning("Falló el envío del email %s: %s", correo.pk, exc)
+                _fallo(correo, exc, now)
+                fallidos += 1
+            else:
+                correo.intentos += 1
+                correo.estado = CorreoSaliente.Estados.ENVIADO
+                correo.enviado_en = timezone.now()
+                correo.ultimo_error = None
+                enviados += 1
+            correo.save(update_fields=campos)
+    finally:
+        connection.close()
+    return enviados, fallidos
+
+
+def estado_cola():
+    """
+    Profundidad de la cola. Solo cuenta pendientes y fallidos (no el
+    histórico de enviados), todo sobre el índice (estado, proximo_intento).
+    """
+    pendientes = CorreoSaliente.objects.filter(estado=CorreoSaliente.Estados.PENDIENTE)
+    resumen = pendientes.aggregate(
+        pendientes=Count("id"),
+        proximo=Min("proximo_intento"),
+    )
+    return {
+        "pendientes": resumen["pendientes"],
+        "vencidos": pendientes.filter(proximo_intento__lte=timezone.now()).count(),
+        "fallidos": CorreoSaliente.objects.filter(
+            estado=CorreoSaliente.Estados.FALLIDO
+        ).count(),
+        "proximo_intento": resumen["proximo"],
+    }
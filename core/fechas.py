@@ -0,0 +1,77 @@
+"""
+Rangos de fechas de la clínica.
+
+Los filtros por día, semana o mes se traducen a intervalos semiabiertos
+[desde, hasta) en la zona horaria de la clínica (TIME_ZONE). Comparar la
+columna contra dos instantes usa los índices de fecha; `campo__date`
+convierte cada fila de zona horaria y termina en un recorrido completo.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def _inicio_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def rango_dia(dia):
+    return _inicio_dia(dia), _inicio_dia(dia + timedelta(days=1))
+
+
+def rango_semana(dia):
+    """
+    Semana de lunes a lunes que contiene a `dia`.
+    """
+    lunes = dia - timedelta(days=dia.weekday())
+    return _inicio_dia(lunes), _inicio_dia(lunes + timedelta(days=7))
+
+
+def rango_mes(anio, mes):
+    siguiente = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return _inicio_dia(date(anio, mes, 1)), _inicio_dia(siguiente)
+
+
+def _semana(value):
+    """
+    Acepta una semana ISO (2024-W05) o cualquier fecha de la semana.
+    """
+    try:
+        return datetime.strptime(f"{value}-1", "%G-W%V-%u").date()
+    except ValueError:
+        return parse_date(value)
+
+
+def _mes(value):
+    try:
+        valor = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        return None
+    return valor.year, valor.month
+
+
+def rango_parametros(params):
+    """
+    Rango [desde, hasta) pedido con ?date=, ?week= o ?month= (en ese orden
+    de prioridad), o None si no hay ninguno válido.
+    """
+    try:
+        if params.get("date"):
+            dia = parse_date(params["date"])
+            return rango_dia(dia) if dia else None
+        if params.get("week"):
+            dia = _semana(params["week"])
+            return rango_semana(dia) if dia else None
+        if params.get("month"):
+            mes = _mes(params["month"])
+            return rango_mes(*mes) if mes else None
+    except ValueError:
+        # parse_date valida el formato pero no el día (2024-02-30).
+        return None
+    return None
+
+
+def filtrar_rango(queryset, campo, rango):
+    desde, hasta = rango
+    return queryset.filter(**{f"{campo}__gte": desde, f"{campo}__lt": hasta})
@@ -0,0 +1,69 @@
+"""
+Generación de calendarios iCalendar (RFC 5545) en streaming.
+"""
+from datetime import timezone as dt_timezone
+
+ESTADOS_ICS = {
+    "CONFIRMADO": "CONFIRMED",
+    "EN_ESPERA": "TENTATIVE",
+    "FINALIZADO": "CONFIRMED",
+    "CANCELADO": "CANCELLED",
+}
+
+
+def _texto(value):
+    value = str(value or "")
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fecha(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _linea(value):
+    """
+    Pliega la línea a 75 octetos y agrega el CRLF final.
+    """
+    data = value.encode("utf-8")
+    partes = []
+    while len(data) > 75:
+        corte = 75 if not partes else 74
+        # No cortar en medio de un carácter UTF-8.
+        while corte and (data[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(data[:corte])
+        data = data[corte:]
+    partes.append(data)
+    return b"\r\n ".join(partes) + b"\r\n"
+
+
+def calendario(nombre, turnos):
+    """
+    Genera el .ics línea por línea a partir de un iterable de dicts de
+    turnos (ver AGENDA_CAMPOS en views), sin armar el documento en memoria.
+    """
+    yield _linea("BEGIN:VCALENDAR")
+    yield _linea("VERSION:2.0")
+    yield _linea("PRODID:-//Lazos Digital//Agenda//ES")
+    yield _linea("CALSCALE:GREGORIAN")
+    yield _linea("METHOD:PUBLISH")
+    yield _linea(f"X-WR-CALNAME:{_texto(nombre)}")
+    for turno in turnos:
+        consultorio = f"{turno['consultorio__nombre']} ({turno['consultorio__numero']})"
+        yield _linea("BEGIN:VEVENT")
+        yield _linea(f"UID:turno-{turno['id']}@lazos")
+        yield _linea(f"DTSTAMP:{_fecha(turno['actualizado_en'])}")
+        yield _linea(f"LAST-MODIFIED:{_fecha(turno['actualizado_en'])}")
+        yield _linea(f"DTSTART:{_fecha(turno['inicio'])}")
+        yield _linea(f"DTEND:{_fecha(turno['fin'])}")
+        yield _linea(f"SUMMARY:{_texto(turno['paciente__nombre_completo'])}")
+        yield _linea(f"LOCATION:{_texto(consultorio)}")
+        yield _linea(f"STATUS:{ESTADOS_ICS.get(turno['estado'], 'CONFIRMED')}")
+        yield _linea("END:VEVENT")
+    yield _linea("END:VCALENDAR")
@@ -0,0 +1,95 @@
+"""
+Lectura rápida para listados.
+
+Arma la misma salida que un ModelSerializer a partir de `values_list()`,
+sin instanciar modelos: cada campo se compila una vez a (columnas,
+conversión), usando el `to_representation` del propio campo de DRF, así
+el resultado es idéntico byte a byte. Los SerializerMethodField se
+declaran en el atributo `valores` del serializer como
+{"campo": (("columna", ...), funcion_o_None)}.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+_compilados = {}
+
+
+def _identidad(valor):
+    return valor
+
+
+class Lector:
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        extras = getattr(serializer_class, "valores", {})
+        self.columnas = []
+        self.campos = []
+
+        for nombre, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if nombre in extras:
+                columnas, funcion = extras[nombre]
+                self._agregar(nombre, columnas, funcion, nulo_directo=False)
+                continue
+            if isinstance(field, serializers.SerializerMethodField) or "." in field.source:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{nombre} necesita una entrada en `valores`."
+                )
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{nombre} no es una columna de {model.__name__}."
+                )
+            if isinstance(field, PrimaryKeyRelatedField):
+                # El valor de la FK ya es la PK que devolvería el campo.
+                self._agregar(nombre, (model_field.attname,), _identidad)
+            elif isinstance(field, serializers.FileField):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{nombre}: los archivos necesitan la instancia."
+                )
+            else:
+                self._agregar(nombre, (model_field.attname,), field.to_representation)
+
+    def _agregar(self, nombre, columnas, funcion, nulo_directo=True):
+        desde = len(self.columnas)
+        self.columnas.extend(columnas)
+        hasta = len(self.columnas)
+        if funcion is None:
+            funcion = _identidad
+        self.campos.append((nombre, desde, hasta, funcion, nulo_directo))
+
+    def queryset(self, queryset):
+        return queryset.values_list(*self.columnas)
+
+    def filas(self, tuplas):
+        """
+        Convierte tuplas de `queryset()` en dicts con el orden y formato
+        del serializer. Como Serializer.to_representation, un valor None de
+        un campo de modelo no pasa por la conversión.
+        """
+        campos = self.campos
+        resultado = []
+        for tupla in tuplas:
+            fila = {}
+            for nombre, desde, hasta, funcion, nulo_directo in campos:
+                if hasta - desde == 1:
+                    valor = tupla[desde]
+                    fila[nombre] = None if valor is None and nulo_directo else funcion(valor)
+                else:
+                    fila[nombre] = funcion(*tupla[desde:hasta])
+            resultado.append(fila)
+        return resultado
+
+
+def lector(serializer_class):
+    """
+    Lector compilado (y cacheado) para un serializer.
+    """
+    compilado = _compilados.get(serializer_class)
+    if compilado is None:
+        compilado = _compilados[serializer_class] = Lector(serializer_class)
+    return compilado
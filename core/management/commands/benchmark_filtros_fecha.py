@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core import fechas, replicas
+from core.models import Evolucion, Turno
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el plan y el tiempo de los filtros por día con `__date` "
+        "contra los rangos semiabiertos de core.fechas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fecha", help="Día a filtrar (AAAA-MM-DD). Por defecto, hoy.")
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    # Solo lee: puede correr contra una réplica.
+    @replicas.lecturas_en_replica()
+    def handle(self, *args, **options):
+        if options["fecha"]:
+            dia = parse_date(options["fecha"])
+            if dia is None:
+                raise CommandError(f"Fecha inválida: {options['fecha']}")
+        else:
+            dia = timezone.localdate()
+        rango = fechas.rango_dia(dia)
+
+        casos = [
+            ("turnos", Turno.objects.all(), "inicio"),
+            ("evoluciones", Evolucion.objects.all(), "creado_en"),
+        ]
+        for nombre, qs, campo in casos:
+            antes = qs.filter(**{f"{campo}__date": dia})
+            despues = fechas.filtrar_rango(qs, campo, rango)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{nombre} ({campo}) el {dia}"))
+            self._medir("__date", antes, options["repeticiones"])
+            self._medir("rango", despues, options["repeticiones"])
+
+    def _medir(self, etiqueta, qs, repeticiones):
+        if connection.vendor == "postgresql":
+            plan = qs.explain(analyze=True, buffers=True)
+        else:
+            plan = qs.explain()
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            filas = len(list(qs.values_list("pk", flat=True)))
+        promedio = (time.perf_counter() - inicio) / max(repeticiones, 1) * 1000
+        self.stdout.write(f"  [{etiqueta}] {filas} filas, {promedio:.2f} ms promedio")
+        for linea in plan.splitlines():
+            self.stdout.write(f"    {linea}")
@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.models import AuditLog, Turno
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa los turnos cuyo fin ya pasó a FINALIZADO (o al estado indicado) "
+        "en lotes cortos, con un registro de auditoría por lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--estado",
+            default=getattr(settings, "TURNO_ESTADO_VENCIDO", Turno.Estados.FINALIZADO),
+            help="Estado destino (por defecto FINALIZADO).",
+        )
+        parser.add_argument(
+            "--desde-estados",
+            default=f"{Turno.Estados.CONFIRMADO},{Turno.Estados.EN_ESPERA}",
+            help="Estados de origen, separados por coma.",
+        )
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0.0,
+            help="Segundos de espera entre lotes.",
+        )
+
+    def handle(self, *args, **options):
+        validos = set(Turno.Estados.values)
+        estado = options["estado"]
+        origenes = [e for e in options["desde_estados"].split(",") if e]
+        if estado not in validos or not set(origenes) <= validos:
+            raise CommandError(f"Estados válidos: {', '.join(sorted(validos))}")
+        if estado in origenes:
+            raise CommandError("El estado destino no puede ser uno de origen.")
+
+        corte = timezone.now()
+        total = 0
+        while True:
+            # Cada lote es una transacción corta. SKIP LOCKED saltea los
+            # turnos que una reserva está editando; quedan para la próxima.
+            with transaction.atomic():
+                ids = list(
+                    Turno.objects.select_for_update(skip_locked=True)
+                    .filter(estado__in=origenes, fin__lte=corte)
+                    .order_by("fin")
+                    .values_list("pk", flat=True)[: options["lote"]]
+                )
+                if not ids:
+                    break
+                cantidad = Turno.all_objects.filter(pk__in=ids).cambiar_estado(estado)
+                AuditLog.objects.create(
+                    actor=None,
+                    action=AuditLog.Action.UPDATE,
+                    target_type="Turno",
+                    target_id=None,
+                    metadata={
+                        "automatico": True,
+                        "estado": estado,
+                        "cantidad": cantidad,
+                        "ids": ids,
+                    },
+                )
+            total += cantidad
+            if options["pausa"]:
+                time.sleep(options["pausa"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Listo. Turnos pasados a {estado}: {total}")
+        )
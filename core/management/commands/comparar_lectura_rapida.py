@@ -0,0 +1,68 @@
+import inspect
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core import lectura, replicas, views
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica que la lectura rápida de cada listado produzca el mismo "
+        "JSON que su serializer y compara los tiempos de ambos caminos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=2000)
+        parser.add_argument("--repeticiones", type=int, default=5)
+
+    # Solo lee: puede correr contra una réplica.
+    @replicas.lecturas_en_replica()
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        errores = []
+        for view in self._vistas():
+            serializer_class = view.serializer_class
+            model = serializer_class.Meta.model
+            manager = getattr(model, "all_objects", model._default_manager)
+            # Incluye eliminados: deleted_at/deleted_by también deben coincidir.
+            lector = lectura.lector(serializer_class)
+            # Como en las vistas: las relaciones que lee el serializer, por JOIN.
+            relaciones = {c.split("__")[0] for c in lector.columnas if "__" in c}
+            qs = manager.select_related(*relaciones).order_by("pk")[: options["filas"]]
+
+            lento, t_lento = self._medir(
+                lambda: renderer.render(serializer_class(qs.all(), many=True).data),
+                options["repeticiones"],
+            )
+            rapido, t_rapido = self._medir(
+                lambda: renderer.render(lector.filas(lector.queryset(qs.all()))),
+                options["repeticiones"],
+            )
+
+            filas = len(lector.filas(lector.queryset(qs.all())))
+            if lento == rapido:
+                estado = self.style.SUCCESS("idéntico")
+            else:
+                estado = self.style.ERROR("DISTINTO")
+                errores.append(view.__name__)
+            mejora = t_lento / t_rapido if t_rapido else 0
+            self.stdout.write(
+                f"{view.__name__:<20} {filas:>6} filas  serializer {t_lento:8.2f} ms  "
+                f"lectura {t_rapido:8.2f} ms  x{mejora:4.1f}  {estado}"
+            )
+
+        if errores:
+            raise CommandError(f"Salida distinta en: {', '.join(errores)}")
+
+    def _vistas(self):
+        for _nombre, view in inspect.getmembers(views, inspect.isclass):
+            if issubclass(view, views.LecturaRapidaMixin) and view.lectura_rapida:
+                yield view
+
+    def _medir(self, funcion, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(max(repeticiones, 1)):
+            resultado = funcion()
+        return resultado, (time.perf_counter() - inicio) / max(repeticiones, 1) * 1000
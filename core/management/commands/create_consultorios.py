@@ -1,14 +1,28 @@
-from django.core.management.base import BaseCommand
-from core.models import Consultorio
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Consultorio, Sede
 
 
 class Command(BaseCommand):
-    help = "Crea los 8 consultorios base (1-8) si no existen."
+    help = "Crea los consultorios base de una sede (1..cantidad_consultorios) si no existen."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sede",
+            default="principal",
+            help="Código de la sede (por defecto: principal).",
+        )
 
     def handle(self, *args, **options):
+        try:
+            sede = Sede.objects.get(codigo=options["sede"])
+        except Sede.DoesNotExist:
+            raise CommandError(f"No existe la sede '{options['sede']}'.")
+
+        total = sede.cantidad_consultorios
         created_count = 0
-        for numero in range(1, 9):
+        for numero in range(1, total + 1):
             consultorio, created = Consultorio.objects.get_or_create(
+                sede=sede,
                 numero=numero,
                 defaults={"nombre": f"Consultorio {numero}"},
             )
@@ -27,5 +41,7 @@ class Command(BaseCommand):
                 )
 
         self.stdout.write(
-            self.style.SUCCESS(f"Listo. Consultorios creados: {created_count}/8")
+            self.style.SUCCESS(
+                f"Listo. Consultorios creados en {sede.nombre}: {created_count}/{total}"
+            )
         )
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.correo import LOTE, estado_cola, procesar_lote
+
+
+class Command(BaseCommand):
+    help = "Envía los emails pendientes de la bandeja de salida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=LOTE)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Queda corriendo como worker en lugar de vaciar la cola y salir.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5.0,
+            help="Segundos de espera cuando la cola está vacía (con --loop).",
+        )
+
+    def handle(self, *args, **options):
+        total_enviados = 0
+        total_fallidos = 0
+        while True:
+            enviados, fallidos = procesar_lote(options["lote"])
+            total_enviados += enviados
+            total_fallidos += fallidos
+            if enviados or fallidos:
+                self.stdout.write(f"Lote: {enviados} enviados, {fallidos} con error")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["intervalo"])
+
+        cola = estado_cola()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Listo. Enviados: {total_enviados}, con error: {total_fallidos}, "
+                f"pendientes: {cola['pendientes']}, fallidos: {cola['fallidos']}"
+            )
+        )
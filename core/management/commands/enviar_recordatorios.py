@@ -0,0 +1,105 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from core import correo
+from core.models import CorreoSaliente, Turno
+
+
+class Command(BaseCommand):
+    help = (
+        "Encola los recordatorios de los turnos CONFIRMADO del día siguiente. "
+        "Se puede correr varias veces: cada turno se avisa una sola vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fecha",
+            help="Día de los turnos a recordar (AAAA-MM-DD). Por defecto, mañana.",
+        )
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument(
+            "--enviar",
+            action="store_true",
+            help="Además de encolar, vacía la bandeja de salida.",
+        )
+
+    def handle(self, *args, **options):
+        if options["fecha"]:
+            fecha = parse_date(options["fecha"])
+            if fecha is None:
+                raise CommandError(f"Fecha inválida: {options['fecha']}")
+        else:
+            fecha = timezone.localdate() + timedelta(days=1)
+
+        desde = timezone.make_aware(datetime.combine(fecha, time.min))
+        hasta = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+        turnos = (
+            Turno.objects.filter(
+                estado=Turno.Estados.CONFIRMADO,
+                inicio__gte=desde,
+                inicio__lt=hasta,
+            )
+            .exclude(paciente__email__isnull=True)
+            .exclude(paciente__email="")
+            .select_related("paciente", "profesional", "consultorio")
+            .only(
+                "id",
+                "inicio",
+                "paciente__nombre_completo",
+                "paciente__email",
+                "profesional__first_name",
+                "profesional__last_name",
+                "profesional__email",
+                "consultorio__nombre",
+                "consultorio__numero",
+            )
+            .order_by("inicio")
+        )
+
+        lote = []
+        encontrados = 0
+        encolados = 0
+        for turno in turnos.iterator(chunk_size=options["lote"]):
+            encontrados += 1
+            lote.append(self._mensaje(turno))
+            if len(lote) >= options["lote"]:
+                encolados += correo.encolar_lote(lote)
+                lote = []
+        if lote:
+            encolados += correo.encolar_lote(lote)
+
+        self.stdout.write(
+            f"Turnos del {fecha:%d/%m/%Y}: {encontrados}, recordatorios nuevos: {encolados}"
+        )
+
+        if options["enviar"]:
+            enviados = 0
+            while True:
+                lote_enviados, fallidos = correo.procesar_lote()
+                enviados += lote_enviados
+                if not lote_enviados and not fallidos:
+                    break
+            self.stdout.write(f"Enviados: {enviados}")
+
+        self.stdout.write(self.style.SUCCESS("Listo."))
+
+    def _mensaje(self, turno):
+        inicio = timezone.localtime(turno.inicio)
+        profesional = turno.profesional
+        nombre_profesional = (
+            f"{profesional.first_name} {profesional.last_name}".strip()
+            or profesional.email
+        )
+        return CorreoSaliente(
+            clave=f"recordatorio-turno-{turno.id}-{inicio:%Y%m%d%H%M}",
+            destinatarios=[turno.paciente.email],
+            asunto="Recordatorio de turno - Lazos Digital",
+            cuerpo=(
+                f"Hola {turno.paciente.nombre_completo},\n\n"
+                f"Te recordamos tu turno del {inicio:%d/%m/%Y} a las {inicio:%H:%M} "
+                f"con {nombre_profesional} en {turno.consultorio.nombre}.\n\n"
+                "Si no podés asistir, por favor avisanos."
+            ),
+        )
@@ -0,0 +1,317 @@
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import AuditLog, Consultorio, Paciente, Sede, Turno, User
+from core.views import TurnoViewSet
+
+CODIGO_SEDE = "estres"
+APERTURA = 8
+CIERRE = 18
+
+_crear = TurnoViewSet.as_view({"post": "create"})
+_editar = TurnoViewSet.as_view({"patch": "partial_update"})
+
+
+def _horario(dia, rng, franjas):
+    """
+    Inicio y fin al azar dentro de las primeras `franjas` medias horas
+    del día: cuantas menos franjas, más choques.
+    """
+    franja = rng.randrange(franjas)
+    medias = rng.randint(1, 3)
+    apertura = timezone.make_aware(datetime.combine(dia, datetime.min.time()))
+    inicio = apertura + timedelta(hours=APERTURA, minutes=30 * franja)
+    cierre = apertura + timedelta(hours=CIERRE)
+    return inicio, min(inicio + timedelta(minutes=30 * medias), cierre)
+
+
+def _pedido(plan, rng, propios, lock):
+    """
+    Un pedido al TurnoViewSet: alta o, si ya hay turnos propios, a veces
+    un cambio de horario. Devuelve (operación, resultado, segundos).
+    """
+    factory = APIRequestFactory()
+    user = plan["usuarios"][rng.randrange(len(plan["usuarios"]))]
+    inicio, fin = _horario(plan["dia"], rng, plan["franjas"])
+    datos = {
+        "consultorio": rng.choice(plan["consultorios"]),
+        "inicio": inicio.isoformat(),
+        "fin": fin.isoformat(),
+    }
+    with lock:
+        disponibles = propios.get(user.pk, [])
+        pk = rng.choice(disponibles) if disponibles else None
+    editar = pk is not None and rng.random() < plan["ediciones"]
+
+    if editar:
+        operacion = "edicion"
+        request = factory.patch(f"/api/turnos/{pk}/", datos, format="json")
+    else:
+        operacion = "alta"
+        datos.update(paciente=plan["paciente"], estado=Turno.Estados.CONFIRMADO)
+        request = factory.post("/api/turnos/", datos, format="json")
+    force_authenticate(request, user=user)
+
+    comienzo = time.perf_counter()
+    try:
+        response = _editar(request, pk=pk) if editar else _crear(request)
+    except Exception as exc:
+        # Lo que la vista no convierte en respuesta (IntegrityError incluido)
+        # es exactamente lo que el harness tiene que contar.
+        return operacion, type(exc).__name__, time.perf_counter() - comienzo
+    segundos = time.perf_counter() - comienzo
+
+    if response.status_code in (200, 201):
+        if not editar:
+            with lock:
+                propios.setdefault(user.pk, []).append(response.data["id"])
+        return operacion, "ok", segundos
+    if response.status_code == 400:
+        return operacion, "conflicto", segundos
+    return operacion, f"http_{response.status_code}", segundos
+
+
+def _correr(plan, pedidos, hilos, semilla):
+    """
+    Dispara `pedidos` desde `hilos` hilos del proceso actual. Cada hilo
+    usa su propia conexión a la base y la cierra al terminar.
+    """
+    propios = {}
+    lock = threading.Lock()
+    pendientes = iter(range(pedidos))
+    resultados = []
+
+    def trabajar(n):
+        rng = random.Random(semilla * 1000 + n)
+        try:
+            while True:
+                with lock:
+                    if next(pendientes, None) is None:
+                        return
+                resultado = _pedido(plan, rng, propios, lock)
+                with lock:
+                    resultados.append(resultado)
+        finally:
+            connections.close_all()
+
+    trabajadores = [
+        threading.Thread(target=trabajar, args=(n,), name=f"estres-{n}")
+        for n in range(hilos)
+    ]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return resultados
+
+
+def _proceso(args):
+    plan, pedidos, hilos, semilla = args
+    try:
+        return _correr(plan, pedidos, hilos, semilla)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de reservas: dispara altas y cambios de turnos "
+        "concurrentes sobre horarios superpuestos a través de TurnoViewSet "
+        "y verifica que no queden turnos activos solapados por consultorio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pedidos", type=int, default=500)
+        parser.add_argument("--hilos", type=int, default=16)
+        parser.add_argument(
+            "--procesos", type=int, default=1,
+            help="Procesos en paralelo, cada uno con --hilos hilos.",
+        )
+        parser.add_argument("--consultorios", type=int, default=2)
+        parser.add_argument("--profesionales", type=int, default=4)
+        parser.add_argument(
+            "--franjas", type=int, default=6,
+            help="Medias horas del día en juego (desde las 08:00).",
+        )
+        parser.add_argument(
+            "--ediciones", type=float, default=0.3,
+            help="Proporción de pedidos que mueven un turno existente.",
+        )
+        parser.add_argument("--fecha", help="Día hábil a reservar (AAAA-MM-DD).")
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument(
+            "--conservar", action="store_true",
+            help="No borra la sede de prueba al terminar.",
+        )
+        parser.add_argument(
+            "--forzar", action="store_true",
+            help="Permite correr con DEBUG=False.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["forzar"]:
+            raise CommandError("Escribe datos de prueba: use --forzar fuera de DEBUG.")
+        if connections["default"].vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    "La base no es PostgreSQL: los bloqueos y errores no "
+                    "representan producción."
+                )
+            )
+        franjas = max(1, min(options["franjas"], (CIERRE - APERTURA) * 2))
+        dia = self._dia(options["fecha"])
+
+        self._limpiar()
+        plan = self._preparar(dia, options, franjas)
+        try:
+            inicio = time.perf_counter()
+            resultados = self._disparar(plan, options)
+            duracion = time.perf_counter() - inicio
+            solapados = self._solapados(plan["sede"])
+            self._informe(resultados, duracion, solapados, options)
+        finally:
+            if not options["conservar"]:
+                self._limpiar()
+
+        if solapados:
+            raise CommandError(f"{len(solapados)} pares de turnos solapados.")
+
+    def _dia(self, valor):
+        if valor:
+            dia = parse_date(valor)
+            if dia is None:
+                raise CommandError(f"Fecha inválida: {valor}")
+            if dia.weekday() > 4:
+                raise CommandError("La fecha debe ser un día hábil.")
+            return dia
+        dia = timezone.localdate() + timedelta(days=7)
+        while dia.weekday() > 4:
+            dia += timedelta(days=1)
+        return dia
+
+    def _preparar(self, dia, options, franjas):
+        sede = Sede.objects.create(
+            nombre="Prueba de carga",
+            codigo=CODIGO_SEDE,
+            cantidad_consultorios=max(options["consultorios"], 1),
+        )
+        consultorios = [
+            Consultorio.objects.create(
+                sede=sede, numero=numero, nombre=f"Estrés {numero}"
+            ).pk
+            for numero in range(1, sede.cantidad_consultorios + 1)
+        ]
+        paciente = Paciente.objects.create(
+            sede=sede, nombre_completo="Paciente de carga", dni=f"{CODIGO_SEDE}-1"
+        )
+        usuarios = []
+        for i in range(max(options["profesionales"], 1)):
+            user = User.objects.create_user(
+                f"{CODIGO_SEDE}-{i}@lazos.invalid", None, is_enabled=True
+            )
+            user.sedes.add(sede)
+            usuarios.append(user)
+        return {
+            "sede": sede.pk,
+            "dia": dia,
+            "franjas": franjas,
+            "consultorios": consultorios,
+            "paciente": paciente.pk,
+            "usuarios": usuarios,
+            "ediciones": options["ediciones"],
+        }
+
+    def _disparar(self, plan, options):
+        procesos = max(options["procesos"], 1)
+        hilos = max(options["hilos"], 1)
+        if procesos == 1:
+            return _correr(plan, options["pedidos"], hilos, options["semilla"])
+
+        # Los hijos heredan el proceso por fork: sin conexiones abiertas.
+        connections.close_all()
+        base, resto = divmod(options["pedidos"], procesos)
+        tareas = [
+            (plan, base + (1 if i < resto else 0), hilos, options["semilla"] + i)
+            for i in range(procesos)
+        ]
+        contexto = multiprocessing.get_context("fork")
+        with contexto.Pool(procesos) as pool:
+            partes = pool.map(_proceso, tareas)
+        return [resultado for parte in partes for resultado in parte]
+
+    def _solapados(self, sede_id):
+        """
+        Pares de turnos activos del mismo consultorio que se pisan.
+        """
+        turnos = (
+            Turno.objects.filter(sede_id=sede_id)
+            .order_by("consultorio_id", "inicio")
+            .values_list("pk", "consultorio_id", "inicio", "fin")
+        )
+        solapados = []
+        anterior = None
+        for turno in turnos:
+            if anterior and anterior[1] == turno[1] and turno[2] < anterior[3]:
+                solapados.append((anterior[0], turno[0]))
+            if anterior is None or anterior[1] != turno[1] or turno[3] > anterior[3]:
+                anterior = turno
+        return solapados
+
+    def _informe(self, resultados, duracion, solapados, options):
+        total = len(resultados)
+        por_resultado = Counter(resultado for _op, resultado, _s in resultados)
+        por_operacion = Counter((op, resultado) for op, resultado, _s in resultados)
+        latencias = sorted(segundos * 1000 for _op, _r, segundos in resultados)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{total} pedidos, {options['procesos']} proceso(s) x {options['hilos']} hilo(s)"
+        ))
+        self.stdout.write(f"  duración     {duracion:8.2f} s")
+        self.stdout.write(f"  throughput   {total / duracion if duracion else 0:8.1f} pedidos/s")
+        if len(latencias) > 1:
+            cuantiles = statistics.quantiles(latencias, n=100)
+            self.stdout.write(
+                f"  latencia     p50 {cuantiles[49]:.1f} ms  p95 {cuantiles[94]:.1f} ms  "
+                f"máx {latencias[-1]:.1f} ms"
+            )
+        for resultado, cantidad in sorted(por_resultado.items()):
+            tasa = cantidad / total * 100 if total else 0
+            estilo = self.style.SUCCESS if resultado in ("ok", "conflicto") else self.style.ERROR
+            self.stdout.write(estilo(f"  {resultado:<20} {cantidad:>6}  {tasa:5.1f}%"))
+        for (operacion, resultado), cantidad in sorted(por_operacion.items()):
+            self.stdout.write(f"    {operacion:<8} {resultado:<20} {cantidad:>6}")
+        if solapados:
+            self.stdout.write(self.style.ERROR(f"  solapados    {len(solapados)} pares"))
+            for a, b in solapados[:20]:
+                self.stdout.write(f"    turno {a} pisa a {b}")
+        else:
+            self.stdout.write(self.style.SUCCESS("  solapados    ninguno"))
+
+    def _limpiar(self):
+        sede = Sede.objects.filter(codigo=CODIGO_SEDE).first()
+        if sede is None:
+            return
+        turnos = Turno.all_objects.filter(sede=sede)
+        AuditLog.objects.filter(
+            target_type=Turno.__name__,
+            target_id__in=[str(pk) for pk in turnos.values_list("pk", flat=True)],
+        ).delete()
+        turnos.delete()
+        Paciente.all_objects.filter(sede=sede).delete()
+        Consultorio.all_objects.filter(sede=sede).delete()
+        User.all_objects.filter(
+            email__startswith=f"{CODIGO_SEDE}-", email__endswith="@lazos.invalid"
+        ).delete()
+        sede.delete()
@@ -0,0 +1,133 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import archivos, metadatos
+from core.models import AuditLog, Documento
+
+
+class Command(BaseCommand):
+    help = (
+        "Recolecta archivos de documentos y miniaturas: los de documentos "
+        "eliminados hace más de --retencion días (y sus filas) y los que "
+        "ninguna fila referencia. Sin --aplicar solo informa. No correr junto con "
+        "reubicar_documentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000)
+        parser.add_argument(
+            "--retencion",
+            type=int,
+            default=archivos.RETENCION_DIAS,
+            help="Días que se conserva un documento eliminado.",
+        )
+        parser.add_argument(
+            "--gracia",
+            type=int,
+            default=archivos.GRACIA_HORAS,
+            help="Horas antes de considerar huérfano un archivo sin fila.",
+        )
+        parser.add_argument(
+            "--cuarentena",
+            action="store_true",
+            help=f"Mueve los archivos a {archivos.CUARENTENA}/ en lugar de borrarlos.",
+        )
+        parser.add_argument(
+            "--aplicar",
+            action="store_true",
+            help="Borra o mueve de verdad; sin esta opción solo informa.",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        now = timezone.now()
+        vencidos = self._vencidos(now - timezone.timedelta(days=options["retencion"]), options)
+        corte = now - timezone.timedelta(hours=options["gracia"])
+        huerfanos = self._huerfanos(archivos.CARPETA, "archivo", corte, options)
+        huerfanos += self._huerfanos(metadatos.CARPETA_MINIATURAS, "miniatura", corte, options)
+
+        if options["aplicar"]:
+            accion = "Puestos en cuarentena" if options["cuarentena"] else "Borrados"
+        else:
+            accion = "Se recolectarían"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Listo. {accion}: {vencidos} de documentos eliminados, "
+                f"{huerfanos} huérfanos."
+            )
+        )
+
+    def _vencidos(self, corte, options):
+        """
+        Documentos eliminados antes del corte: se descarta el archivo y se
+        borra la fila, que ya no se puede restaurar.
+        """
+        vencidos = Documento.all_objects.dead().filter(deleted_at__lt=corte)
+        total = 0
+        ultimo = 0
+        while True:
+            filas = list(
+                vencidos.filter(pk__gt=ultimo)
+                .order_by("pk")
+                .values_list("pk", "archivo", "miniatura")[: options["lote"]]
+            )
+            if not filas:
+                return total
+            ultimo = filas[-1][0]
+            total += len(filas)
+            self._listar(nombre for _pk, nombre, _miniatura in filas)
+            if not options["aplicar"]:
+                continue
+
+            ids = [pk for pk, _nombre, _miniatura in filas]
+            with transaction.atomic():
+                Documento.all_objects.filter(pk__in=ids).delete()
+                AuditLog.objects.create(
+                    actor=None,
+                    action=AuditLog.Action.DELETE,
+                    target_type="Documento",
+                    target_id=None,
+                    metadata={"automatico": True, "purga": True, "ids": ids},
+                )
+            # Primero la fila: si el proceso se corta acá, el archivo queda
+            # huérfano y lo recoge la pasada siguiente.
+            for _pk, *nombres in filas:
+                for nombre in nombres:
+                    if nombre:
+                        archivos.descartar(nombre, options["cuarentena"])
+
+    def _huerfanos(self, carpeta, campo, corte, options):
+        """
+        Recorre el árbol de `carpeta` contra la columna `campo`, un lote de
+        nombres por consulta.
+        """
+        total = 0
+        recorrido = archivos.recorrer(carpeta=carpeta)
+        while True:
+            lote = list(islice(recorrido, options["lote"]))
+            if not lote:
+                return total
+            # Incluye eliminados: su archivo se conserva hasta la retención.
+            referenciados = set(
+                Documento.all_objects.filter(
+                    **{f"{campo}__in": [nombre for nombre, _modificado in lote]}
+                ).values_list(campo, flat=True)
+            )
+            huerfanos = [
+                nombre
+                for nombre, modificado in lote
+                if nombre not in referenciados and modificado < corte
+            ]
+            total += len(huerfanos)
+            self._listar(huerfanos)
+            if options["aplicar"]:
+                for nombre in huerfanos:
+                    archivos.descartar(nombre, options["cuarentena"])
+
+    def _listar(self, nombres):
+        if self.verbosity >= 2:
+            for nombre in nombres:
+                self.stdout.write(f"  {nombre}")
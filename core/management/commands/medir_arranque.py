@@ -0,0 +1,208 @@
+import importlib.util
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from lazos_backend import gunicorn_conf
+
+# Corre en un intérprete nuevo: imprime los tiempos de cada etapa hasta
+# responder el primer pedido, sin cliente de pruebas ni servidor. La app
+# se importa como "modulo:atributo", igual que gunicorn.
+# Argumentos: ruta, host, app y protocolo (wsgi o asgi).
+ARRANQUE = """
+import json, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+from importlib import import_module
+ruta, host, app, protocolo = sys.argv[1:5]
+modulo, _, atributo = app.partition(":")
+application = getattr(import_module(modulo), atributo)
+t2 = time.perf_counter()
+estado = []
+if protocolo == "asgi":
+    import asyncio
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": ruta, "raw_path": ruta.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", host.encode())],
+        "server": (host, 80), "client": ("127.0.0.1", 0),
+    }
+    mensajes = [{"type": "http.request", "body": b"", "more_body": False}]
+    async def receive():
+        if mensajes:
+            return mensajes.pop()
+        await asyncio.Event().wait()
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            estado.append(mensaje["status"])
+    asyncio.run(application(scope, receive, send))
+else:
+    from wsgiref.util import setup_testing_defaults
+    environ = {"PATH_INFO": ruta, "HTTP_HOST": host}
+    setup_testing_defaults(environ)
+    cuerpo = application(environ, lambda s, h, e=None: estado.append(int(s.split()[0])))
+    b"".join(cuerpo)
+    getattr(cuerpo, "close", lambda: None)()
+t3 = time.perf_counter()
+print(json.dumps({"setup": t1 - t0, "app": t2 - t1, "pedido": t3 - t2, "estado": estado[0]}))
+"""
+
+_LINEA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque en frío de la app que carga gunicorn_conf hasta el "
+        "primer pedido con `python -X importtime`: tiempo por etapa, módulos "
+        "más caros y bytecode faltante. Con --presupuesto falla si el "
+        "arranque, medido en corridas aparte sin -X importtime, lo supera."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ruta", default="/api/auth/me/")
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--presupuesto",
+            type=float,
+            help="Milisegundos máximos hasta responder el primer pedido (mediana).",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Mide la app ASGI (servicio stream) aunque la API corra por WSGI.",
+        )
+
+    def handle(self, *args, **options):
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+        if options["asgi"]:
+            app, protocolo = gunicorn_conf.APP_ASGI, "asgi"
+        else:
+            app = gunicorn_conf.wsgi_app
+            protocolo = "asgi" if gunicorn_conf.asgi else "wsgi"
+        repeticiones = range(max(options["repeticiones"], 1))
+        corridas = [self._correr(options["ruta"], host, app, protocolo) for _ in repeticiones]
+        mediana = lambda clave: statistics.median(c[clave] for c in corridas)  # noqa: E731
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Arranque de {app} hasta {options['ruta']} (mediana de {len(corridas)}, "
+            f"respuesta {corridas[-1]['estado']})"
+        ))
+        for clave, etiqueta in (
+            ("interprete", "intérprete"),
+            ("setup", "django.setup()"),
+            ("app", f"app {protocolo.upper()}"),
+            ("pedido", "primer pedido"),
+            ("total", "total"),
+        ):
+            self.stdout.write(f"  {etiqueta:<18} {mediana(clave) * 1000:8.1f} ms")
+        self.stdout.write(
+            f"  {'imports':<18} {mediana('imports') * 1000:8.1f} ms (suma de -X importtime)"
+        )
+
+        modulos = corridas[-1]["modulos"]
+        self.stdout.write(self.style.MIGRATE_HEADING("Paquetes (tiempo propio acumulado)"))
+        paquetes = defaultdict(int)
+        for nombre, propio, _acumulado, _nivel in modulos:
+            paquetes[nombre.split(".")[0]] += propio
+        for paquete, micros in sorted(paquetes.items(), key=lambda p: -p[1])[: options["top"]]:
+            self.stdout.write(f"  {paquete:<32} {micros / 1000:8.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Imports de primer nivel más caros"))
+        directos = [m for m in modulos if m[3] == 0]
+        for nombre, _propio, acumulado, _nivel in sorted(directos, key=lambda m: -m[2])[
+            : options["top"]
+        ]:
+            self.stdout.write(f"  {nombre:<48} {acumulado / 1000:8.1f} ms")
+
+        sin_bytecode = self._sin_bytecode()
+        if sin_bytecode:
+            self.stdout.write(self.style.WARNING(
+                f"  {len(sin_bytecode)} módulos del proyecto sin .pyc vigente "
+                f"(se compilan en cada arranque): {', '.join(sin_bytecode[:5])}..."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("  Bytecode del proyecto al día."))
+
+        if options["presupuesto"] is not None:
+            # -X importtime escribe una línea por módulo y engorda el
+            # arranque: el presupuesto se mide en corridas sin él.
+            limpias = [
+                self._correr(options["ruta"], host, app, protocolo, importtime=False)
+                for _ in repeticiones
+            ]
+            total = statistics.median(c["total"] for c in limpias) * 1000
+            self.stdout.write(f"  {'total sin importtime':<18} {total:8.1f} ms")
+            if total > options["presupuesto"]:
+                raise CommandError(
+                    f"El arranque tardó {total:.0f} ms; el presupuesto es "
+                    f"{options['presupuesto']:.0f} ms."
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"Dentro del presupuesto: {total:.0f} / {options['presupuesto']:.0f} ms."
+            ))
+
+    def _correr(self, ruta, host, app, protocolo, importtime=True):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "lazos_backend.settings"
+            ),
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(settings.BASE_DIR), os.environ.get("PYTHONPATH")])
+            ),
+        }
+        opciones = ["-X", "importtime"] if importtime else []
+        inicio = time.perf_counter()
+        proceso = subprocess.run(
+            [sys.executable, *opciones, "-c", ARRANQUE, ruta, host, app, protocolo],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR,
+        )
+        total = time.perf_counter() - inicio
+        if proceso.returncode != 0:
+            raise CommandError(f"Falló el arranque:\n{proceso.stderr[-2000:]}")
+
+        tiempos = json.loads(proceso.stdout.strip().splitlines()[-1])
+        modulos = []
+        for linea in proceso.stderr.splitlines():
+            encontrada = _LINEA.match(linea)
+            if encontrada:
+                propio, acumulado, sangria, nombre = encontrada.groups()
+                # El nivel 0 son los imports de primer nivel.
+                modulos.append((nombre, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+        etapas = tiempos["setup"] + tiempos["app"] + tiempos["pedido"]
+        return {
+            **tiempos,
+            "total": total,
+            "interprete": max(total - etapas, 0),
+            "imports": sum(m[1] for m in modulos) / 1_000_000,
+            "modulos": modulos,
+        }
+
+    def _sin_bytecode(self):
+        """
+        Módulos del proyecto cuyo .pyc falta o es más viejo que el fuente.
+        """
+        faltantes = []
+        for carpeta in ("core", "lazos_backend"):
+            for fuente in sorted(Path(settings.BASE_DIR, carpeta).rglob("*.py")):
+                if "migrations" in fuente.parts or "management" in fuente.parts:
+                    continue
+                pyc = Path(importlib.util.cache_from_source(fuente))
+                if not pyc.exists() or pyc.stat().st_mtime < fuente.stat().st_mtime:
+                    faltantes.append(str(fuente.relative_to(settings.BASE_DIR)))
+        return faltantes
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core import middleware, replicas
+from core.models import AuditLog, Turno
+from core.renderers import OrjsonRenderer, orjson
+from core.serializers import AuditLogSerializer, TurnoSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo de render JSON (DRF vs orjson) y bytes en el cable por "
+        "codificación para los listados de turnos y auditoría."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=1000)
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    # Solo lee: puede correr contra una réplica.
+    @replicas.lecturas_en_replica()
+    def handle(self, *args, **options):
+        filas = options["filas"]
+        casos = [
+            (
+                "/api/turnos/",
+                TurnoSerializer(
+                    Turno.objects.select_related("paciente", "profesional", "consultorio")
+                    .order_by("inicio")[:filas],
+                    many=True,
+                ).data,
+            ),
+            (
+                "/api/audit-logs/",
+                AuditLogSerializer(
+                    AuditLog.objects.select_related("actor").order_by("-created_at")[:filas],
+                    many=True,
+                ).data,
+            ),
+        ]
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson no está instalado: ambos renders son DRF."))
+
+        for ruta, data in casos:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{ruta} ({len(data)} filas)"))
+            cuerpo = None
+            for nombre, renderer in (("drf", JSONRenderer()), ("orjson", OrjsonRenderer())):
+                cuerpo, ms = self._medir(
+                    lambda: renderer.render(data, "application/json"),
+                    options["repeticiones"],
+                )
+                self.stdout.write(f"  render {nombre:<7} {ms:8.2f} ms")
+            self.stdout.write(f"  {'identity':<14} {len(cuerpo):>10} bytes")
+            for nombre, comprimir in middleware.COMPRESORES:
+                comprimido, ms = self._medir(lambda: comprimir(cuerpo), options["repeticiones"])
+                ratio = len(comprimido) / len(cuerpo) * 100 if cuerpo else 0
+                self.stdout.write(
+                    f"  {nombre:<14} {len(comprimido):>10} bytes ({ratio:5.1f} %) {ms:8.2f} ms"
+                )
+
+    def _medir(self, funcion, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(max(repeticiones, 1)):
+            resultado = funcion()
+        return resultado, (time.perf_counter() - inicio) / max(repeticiones, 1) * 1000
@@ -0,0 +1,142 @@
+import http.client
+import statistics
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+
+
+def _pss_kb(pid):
+    try:
+        texto = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return 0
+    for linea in texto.splitlines():
+        if linea.startswith("Pss:"):
+            return int(linea.split()[1])
+    return 0
+
+
+def _hijos(pid):
+    hijos = []
+    for tarea in Path(f"/proc/{pid}/task").glob("*/children"):
+        hijos.extend(int(p) for p in tarea.read_text().split())
+    return hijos
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga HTTP contra un servidor en marcha (gunicorn, runserver): "
+        "pedidos por segundo, latencias y, con --pid, memoria PSS del master "
+        "y sus workers. Sirve para comparar configuraciones de gunicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--rutas",
+            default="/api/turnos/,/api/pacientes/,/api/consultorios/",
+            help="Rutas separadas por coma; se piden en ronda.",
+        )
+        parser.add_argument("--email", help="Usuario con el que se firma el JWT.")
+        parser.add_argument("--concurrencia", type=int, default=16)
+        parser.add_argument("--segundos", type=float, default=20.0)
+        parser.add_argument("--pid", type=int, help="PID del master de gunicorn.")
+
+    def handle(self, *args, **options):
+        destino = urlsplit(options["url"])
+        rutas = [r for r in options["rutas"].split(",") if r]
+        headers = {"Accept-Encoding": "gzip"}
+        if options["email"]:
+            user = User.objects.filter(email=options["email"]).first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {options['email']}.")
+            headers["Authorization"] = f"Bearer {AccessToken.for_user(user)}"
+
+        latencias = []
+        estados = Counter()
+        lock = threading.Lock()
+        fin = time.monotonic() + options["segundos"]
+
+        def cliente(n):
+            # Una conexión keep-alive por cliente, como un navegador.
+            conexion = None
+            i = n
+            propias = []
+            propios = Counter()
+            while time.monotonic() < fin:
+                if conexion is None:
+                    conexion = http.client.HTTPConnection(
+                        destino.hostname, destino.port or 80, timeout=30
+                    )
+                ruta = rutas[i % len(rutas)]
+                i += 1
+                inicio = time.perf_counter()
+                try:
+                    conexion.request("GET", ruta, headers=headers)
+                    respuesta = conexion.getresponse()
+                    respuesta.read()
+                    propios[respuesta.status] += 1
+                    if respuesta.getheader("Connection", "").lower() == "close":
+                        conexion.close()
+                        conexion = None
+                except (OSError, http.client.HTTPException) as exc:
+                    propios[type(exc).__name__] += 1
+                    conexion.close()
+                    conexion = None
+                    continue
+                propias.append((time.perf_counter() - inicio) * 1000)
+            if conexion is not None:
+                conexion.close()
+            with lock:
+                latencias.extend(propias)
+                estados.update(propios)
+
+        memoria_antes = self._memoria(options["pid"])
+        comienzo = time.perf_counter()
+        clientes = [
+            threading.Thread(target=cliente, args=(n,))
+            for n in range(options["concurrencia"])
+        ]
+        for hilo in clientes:
+            hilo.start()
+        for hilo in clientes:
+            hilo.join()
+        duracion = time.perf_counter() - comienzo
+        memoria_despues = self._memoria(options["pid"])
+
+        total = sum(estados.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{options['url']} {options['concurrencia']} clientes, {duracion:.1f} s"
+        ))
+        self.stdout.write(f"  pedidos/s   {total / duracion:8.1f}  ({total} pedidos)")
+        if len(latencias) > 1:
+            latencias.sort()
+            cuantiles = statistics.quantiles(latencias, n=100)
+            self.stdout.write(
+                f"  latencia    p50 {cuantiles[49]:.1f} ms  p95 {cuantiles[94]:.1f} ms  "
+                f"p99 {cuantiles[98]:.1f} ms"
+            )
+        for estado, cantidad in sorted(estados.items(), key=str):
+            estilo = self.style.SUCCESS if estado == 200 else self.style.WARNING
+            self.stdout.write(estilo(f"  {estado!s:<22} {cantidad:>7}"))
+        if memoria_antes is not None:
+            self.stdout.write(
+                f"  memoria PSS {memoria_antes / 1024:8.1f} MB antes, "
+                f"{memoria_despues / 1024:.1f} MB después"
+            )
+
+    def _memoria(self, pid):
+        """
+        PSS total del master y sus workers: con preload, las páginas
+        compartidas se reparten entre procesos en lugar de sumarse.
+        """
+        if pid is None:
+            return None
+        return _pss_kb(pid) + sum(_pss_kb(hijo) for hijo in _hijos(pid))
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.metadatos import LOTE, PROCESOS, crear_pool, procesar_lote
+from core.models import Documento
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrae los metadatos (tamaño, tipo, checksum, páginas y miniatura) "
+        "de los documentos pendientes en un pool de procesos. Sin --loop "
+        "vacía la cola y sale: sirve para completar los documentos existentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=LOTE)
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=PROCESOS,
+            help="Procesos del pool (por defecto, uno por CPU).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Queda corriendo como worker en lugar de vaciar la cola y salir.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5.0,
+            help="Segundos de espera cuando la cola está vacía (con --loop).",
+        )
+        parser.add_argument(
+            "--reintentar",
+            action="store_true",
+            help="Vuelve a encolar los documentos que terminaron con error.",
+        )
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Vuelve a encolar todos los documentos (recalcula todo).",
+        )
+
+    def handle(self, *args, **options):
+        estados = Documento.EstadosMetadatos
+        encolar = Documento.all_objects.exclude(metadatos_estado=estados.PENDIENTE)
+        if not options["todos"]:
+            encolar = encolar.filter(metadatos_estado=estados.ERROR)
+        if options["todos"] or options["reintentar"]:
+            encolados = encolar.update(metadatos_estado=estados.PENDIENTE)
+            self.stdout.write(f"Encolados de nuevo: {encolados}")
+
+        total_procesados = 0
+        total_errores = 0
+        inicio = time.perf_counter()
+        with crear_pool(options["procesos"]) as pool:
+            while True:
+                procesados, errores = procesar_lote(pool, options["lote"])
+                total_procesados += procesados
+                total_errores += errores
+                if procesados or errores:
+                    self.stdout.write(f"Lote: {procesados} procesados, {errores} con error")
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["intervalo"])
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Listo. Procesados: {total_procesados}, con error: {total_errores} "
+                f"en {segundos:.1f} s."
+            )
+        )
@@ -0,0 +1,83 @@
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from core import busqueda
+from core.models import Evolucion, Informe
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula el índice de texto completo de evoluciones e informes "
+        "(registros previos a la búsqueda o tras cambiar la configuración)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument(
+            "--todo",
+            action="store_true",
+            help="Recalcula también los que ya tienen índice.",
+        )
+
+    def handle(self, *args, **options):
+        if not busqueda.disponible(Evolucion):
+            raise CommandError("La búsqueda de texto completo requiere PostgreSQL.")
+
+        lote = options["lote"]
+        evoluciones = self._pendientes(Evolucion, options["todo"])
+        total_evoluciones = 0
+        for ids in self._lotes(evoluciones, lote):
+            # version=F("version"): el índice no es un cambio visible en /api/changes/.
+            total_evoluciones += Evolucion.all_objects.filter(pk__in=ids).update(
+                busqueda=SearchVector("texto", config=busqueda.CONFIG),
+                version=F("version"),
+            )
+
+        informes = self._pendientes(Informe, options["todo"])
+        total_informes = 0
+        for ids in self._lotes(informes, lote):
+            # El texto plano sale de Python (HTML), el tsvector de la base:
+            # un UPDATE por lote para cada uno en vez de uno por informe.
+            filas = Informe.all_objects.filter(pk__in=ids).only(
+                "pk", "titulo", "contenido_html"
+            )
+            informes = []
+            for informe in filas:
+                informe.texto_busqueda = (
+                    f"{informe.titulo}\n{busqueda.texto_plano(informe.contenido_html)}"
+                )
+                informe.version = F("version")
+                informes.append(informe)
+            with transaction.atomic():
+                Informe.all_objects.bulk_update(informes, ["texto_busqueda", "version"])
+                total_informes += Informe.all_objects.filter(pk__in=ids).update(
+                    busqueda=SearchVector("texto_busqueda", config=busqueda.CONFIG),
+                    version=F("version"),
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Listo. Evoluciones: {total_evoluciones}. Informes: {total_informes}."
+            )
+        )
+
+    def _pendientes(self, model, todo):
+        qs = model.all_objects.all()
+        if not todo:
+            qs = qs.filter(busqueda__isnull=True)
+        return qs
+
+    def _lotes(self, queryset, lote):
+        ultimo = 0
+        while True:
+            ids = list(
+                queryset.filter(pk__gt=ultimo)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:lote]
+            )
+            if not ids:
+                return
+            yield ids
+            ultimo = ids[-1]
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from core.models import OcupacionDiaria
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de ocupación diaria a partir de los turnos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument("--hasta", help="Fecha final inclusive (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        desde = self._fecha(options["desde"])
+        hasta = self._fecha(options["hasta"])
+        if desde and hasta and hasta < desde:
+            raise CommandError("--hasta debe ser posterior a --desde.")
+
+        grupos = OcupacionDiaria.reconstruir(desde, hasta)
+        self.stdout.write(
+            self.style.SUCCESS(f"Listo. Grupos recalculados: {grupos}")
+        )
+
+    def _fecha(self, value):
+        if not value:
+            return None
+        fecha = parse_date(value)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {value}")
+        return fecha
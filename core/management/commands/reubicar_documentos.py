@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Case, CharField, Value, When
+
+from core import archivos
+from core.models import Documento
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los archivos de documentos del directorio plano a los "
+        "subdirectorios por hash, en lotes. Se puede interrumpir y repetir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0.0,
+            help="Segundos de espera entre lotes.",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo informa cuántos archivos se moverían.",
+        )
+
+    def handle(self, *args, **options):
+        # Incluye eliminados: se pueden restaurar y su archivo también se mueve.
+        pendientes = Documento.all_objects.exclude(
+            archivo__regex=archivos.PATRON_FRAGMENTADO
+        ).exclude(archivo="")
+        ultimo = 0
+        movidos = 0
+        faltantes = 0
+        while True:
+            filas = list(
+                pendientes.filter(pk__gt=ultimo)
+                .order_by("pk")
+                .values_list("pk", "archivo")[: options["lote"]]
+            )
+            if not filas:
+                break
+            ultimo = filas[-1][0]
+
+            nuevos = {}
+            for pk, nombre in filas:
+                nuevo = archivos.destino(nombre)
+                if archivos.existe(nombre):
+                    if not options["simular"]:
+                        nuevo = archivos.mover(nombre, nuevo)
+                elif not archivos.existe(nuevo):
+                    # Ni en el lugar viejo ni en el nuevo: no se toca la fila.
+                    faltantes += 1
+                    self.stderr.write(f"Falta el archivo del documento {pk}: {nombre}")
+                    continue
+                # Si ya estaba en el destino, una corrida anterior lo movió
+                # y se cortó antes de actualizar la fila.
+                nuevos[pk] = nuevo
+
+            if nuevos and not options["simular"]:
+                # Un UPDATE por lote. Cambia la URL del archivo, así que sí
+                # cuenta como cambio para /api/changes/.
+                Documento.all_objects.filter(pk__in=nuevos).update(
+                    archivo=Case(
+                        *[When(pk=pk, then=Value(nuevo)) for pk, nuevo in nuevos.items()],
+                        output_field=CharField(),
+                    )
+                )
+            movidos += len(nuevos)
+            if options["pausa"]:
+                time.sleep(options["pausa"])
+
+        verbo = "Se moverían" if options["simular"] else "Movidos"
+        self.stdout.write(
+            self.style.SUCCESS(f"Listo. {verbo}: {movidos}. Faltantes: {faltantes}.")
+        )
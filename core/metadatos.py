@@ -0,0 +1,291 @@
+"""
+Metadatos de documentos: tamaño, tipo MIME, checksum, páginas y miniatura.
+
+Un documento nuevo (o con el archivo reemplazado) queda en estado
+PENDIENTE; el worker `procesar_documentos` lo reserva con SKIP LOCKED y
+lee el archivo en un pool de procesos, ya sin locks. Así los listados solo leen columnas y
+nunca abren archivos.
+"""
+import hashlib
+import io
+import logging
+import mimetypes
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow es opcional
+    Image = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - pypdf es opcional
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+LOTE = getattr(settings, "DOCUMENTOS_METADATOS_LOTE", 20)
+PROCESOS = getattr(settings, "DOCUMENTOS_METADATOS_PROCESOS", None)
+# Tiempo que un worker tiene para procesar lo que reservó.
+RESERVA_SEGUNDOS = getattr(settings, "DOCUMENTOS_METADATOS_RESERVA_SEGUNDOS", 10 * 60)
+MINIATURA_LADO = 256
+CARPETA_MINIATURAS = "miniaturas"
+BLOQUE = 1024 * 1024
+
+# Firmas de los primeros bytes: el nombre del archivo no es confiable.
+FIRMAS = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+]
+_PAGINA_PDF = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def tipo_mime(nombre, cabecera):
+    for firma, mime in FIRMAS:
+        if cabecera.startswith(firma):
+            return mime
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "image/webp"
+    # ZIP (docx, xlsx, ...) y texto: la extensión decide.
+    return mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+
+
+def _paginas_pdf(archivo):
+    if PdfReader is not None:
+        try:
+            return len(PdfReader(archivo).pages)
+        except Exception:
+            archivo.seek(0)
+    # Sin pypdf (o PDF dañado): cuenta los objetos /Page.
+    return len(_PAGINA_PDF.findall(archivo.read())) or None
+
+
+def _imagen(archivo):
+    """
+    Páginas y miniatura JPEG de una imagen, o (1, None) sin Pillow.
+    """
+    if Image is None:
+        return 1, None
+    with Image.open(archivo) as imagen:
+        paginas = getattr(imagen, "n_frames", 1)
+        imagen.thumbnail((MINIATURA_LADO, MINIATURA_LADO))
+        salida = io.BytesIO()
+        imagen.convert("RGB").save(salida, "JPEG", quality=80)
+    return paginas, salida.getvalue()
+
+
+def extraer(pk, nombre):
+    """
+    Corre en el pool: lee el archivo una vez para el checksum y el tipo, y
+    otra solo si hace falta contar páginas o armar la miniatura.
+    """
+    sha = hashlib.sha256()
+    tamano = 0
+    cabecera = b""
+    with default_storage.open(nombre, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(BLOQUE), b""):
+            if not cabecera:
+                cabecera = bloque[:16]
+            sha.update(bloque)
+            tamano += len(bloque)
+    checksum = sha.hexdigest()
+    mime = tipo_mime(nombre, cabecera)
+
+    paginas = None
+    miniatura = ""
+    if mime == "application/pdf":
+        with default_storage.open(nombre, "rb") as archivo:
+            paginas = _paginas_pdf(archivo)
+    elif mime.startswith("image/"):
+        with default_storage.open(nombre, "rb") as archivo:
+            paginas, contenido = _imagen(archivo)
+        if contenido:
+            miniatura = ruta_miniatura(pk, checksum)
+            default_storage.delete(miniatura)
+            miniatura = default_storage.save(miniatura, ContentFile(contenido))
+
+    return {
+        "tamano": tamano,
+        "tipo_mime": mime,
+        "checksum": checksum,
+        "paginas": paginas,
+        "miniatura": miniatura,
+    }
+
+
+def ruta_miniatura(pk, checksum):
+    return f"{CARPETA_MINIATURAS}/{checksum[:2]}/{checksum[2:4]}/{pk}.jpg"
+
+
+def _iniciar():
+    import django
+
+    django.setup()
+
+
+class Pool:
+    """
+    Pool de extracción. Los procesos arrancan con spawn: no heredan las
+    conexiones a la base del proceso padre. Si un proceso muere (Pillow con
+    un archivo armado a propósito, falta de memoria), el ProcessPoolExecutor
+    queda roto y rechaza todo lo que sigue; reiniciar() arma uno nuevo.
+    """
+
+    def __init__(self, procesos=PROCESOS):
+        self.procesos = procesos
+        self._executor = self._crear()
+
+    def _crear(self):
+        return ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_iniciar,
+        )
+
+    def submit(self, *args):
+        try:
+            return self._executor.submit(*args)
+        except BrokenProcessPool:
+            self.reiniciar()
+            return self._executor.submit(*args)
+
+    def reiniciar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._crear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._executor.shutdown()
+
+
+def crear_pool(procesos=PROCESOS):
+    return Pool(procesos)
+
+
+def _reservar(lote):
+    """
+    Toma hasta `lote` documentos de la cola y los deja PROCESANDO por
+    RESERVA_SEGUNDOS, en una transacción corta: la lectura del archivo corre
+    sin locks y sin bloquear ediciones. Un documento PROCESANDO con la
+    reserva vencida es de un worker que se cayó y se vuelve a tomar.
+    """
+    from .models import Documento
+
+    estados = Documento.EstadosMetadatos
+    ahora = timezone.now()
+    with transaction.atomic():
+        documentos = list(
+            Documento.all_objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(metadatos_estado=estados.PENDIENTE)
+                | Q(metadatos_estado=estados.PROCESANDO, metadatos_reserva__lte=ahora)
+            )
+            .order_by("pk")
+            .only("pk", "archivo")[:lote]
+        )
+        if documentos:
+            # La reserva es interna: no cuenta como cambio para /api/changes/.
+            Documento.all_objects.filter(pk__in=[d.pk for d in documentos]).update(
+                metadatos_estado=estados.PROCESANDO,
+                metadatos_reserva=ahora + timezone.timedelta(seconds=RESERVA_SEGUNDOS),
+                version=F("version"),
+            )
+    return documentos
+
+
+def _resultado(documento, futuro):
+    if futuro is None:
+        raise FileNotFoundError("El documento no tiene archivo.")
+    return futuro.result()
+
+
+def procesar_lote(pool, lote=LOTE):
+    """
+    Extrae los metadatos de hasta `lote` documentos pendientes. Las filas
+    se reservan con SKIP LOCKED, así que varios workers pueden correr a la
+    vez. Devuelve (procesados, con_error).
+    """
+    # Import local: los procesos del pool importan este módulo antes de
+    # django.setup().
+    from .models import Documento
+
+    documentos = _reservar(lote)
+    if not documentos:
+        return 0, 0
+
+    futuros = {
+        documento.pk: pool.submit(extraer, documento.pk, documento.archivo.name)
+        for documento in documentos
+        if documento.archivo
+    }
+    resultados = {}
+    caidos = []
+    for documento in documentos:
+        try:
+            resultados[documento.pk] = _resultado(documento, futuros.get(documento.pk))
+        except BrokenProcessPool:
+            caidos.append(documento)
+        except Exception as exc:
+            resultados[documento.pk] = exc
+
+    if caidos:
+        # No se sabe qué archivo tiró el proceso: de a uno, para que solo
+        # ese termine con error.
+        pool.reiniciar()
+        for documento in caidos:
+            try:
+                datos = pool.submit(extraer, documento.pk, documento.archivo.name).result()
+            except BrokenProcessPool:
+                pool.reiniciar()
+                datos = RuntimeError("El proceso de extracción murió con este archivo.")
+            except Exception as exc:
+                datos = exc
+            resultados[documento.pk] = datos
+
+    errores = 0
+    for documento in documentos:
+        datos = resultados[documento.pk]
+        if isinstance(datos, Exception):
+            logger.warning("Sin metadatos para el documento %s: %s", documento.pk, datos)
+            errores += 1
+            documento.metadatos_estado = Documento.EstadosMetadatos.ERROR
+            documento.metadatos_error = str(datos)[:2000]
+            continue
+        for campo, valor in datos.items():
+            setattr(documento, campo, valor)
+        documento.metadatos_estado = Documento.EstadosMetadatos.LISTO
+        documento.metadatos_error = ""
+
+    with transaction.atomic():
+        # Solo los que siguen reservados con el mismo archivo: uno
+        # reemplazado mientras tanto volvió a PENDIENTE y se procesa de nuevo.
+        vigentes = set(
+            Documento.all_objects.select_for_update()
+            .filter(
+                pk__in=[d.pk for d in documentos],
+                metadatos_estado=Documento.EstadosMetadatos.PROCESANDO,
+            )
+            .values_list("pk", "archivo")
+        )
+        guardar = [d for d in documentos if (d.pk, d.archivo.name) in vigentes]
+        # Un UPDATE por lote. Los metadatos se ven en la API, así que
+        # cuentan como cambio para /api/changes/.
+        Documento.all_objects.bulk_update(guardar, Documento.campos_metadatos)
+    return len(documentos) - errores, errores
@@ -0,0 +1,134 @@
+"""
+Compresión de respuestas negociada por Accept-Encoding.
+
+Prefiere zstd, después br y por último gzip, entre los que el cliente
+acepte y estén instalados (zstandard y brotli son opcionales). Las
+respuestas chicas, las ya comprimidas y las de streaming (SSE, .ics) se
+dejan como están.
+
+Las rutas de COMPRESION_EXCLUIR no se comprimen nunca: devuelven tokens
+junto a datos del pedido, y el tamaño comprimido permitiría adivinarlos
+(BREACH).
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+MINIMO = getattr(settings, "COMPRESION_MINIMO", 1024)
+NIVEL_GZIP = getattr(settings, "COMPRESION_NIVEL_GZIP", 6)
+NIVEL_BROTLI = getattr(settings, "COMPRESION_NIVEL_BROTLI", 4)
+NIVEL_ZSTD = getattr(settings, "COMPRESION_NIVEL_ZSTD", 3)
+
+EXCLUIDAS = tuple(
+    getattr(
+        settings,
+        "COMPRESION_EXCLUIR",
+        ("/api/auth/", "/api/invitaciones/accept/", "/api/agenda-tokens/"),
+    )
+)
+
+TIPOS_COMPRIMIBLES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+_ACCEPT = re.compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+def _compresores():
+    compresores = []
+    if zstandard is not None:
+        compresores.append(
+            ("zstd", lambda data: zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(data))
+        )
+    if brotli is not None:
+        compresores.append(("br", lambda data: brotli.compress(data, quality=NIVEL_BROTLI)))
+    compresores.append(("gzip", _gzip))
+    return compresores
+
+
+COMPRESORES = _compresores()
+
+
+def pesos(accept_encoding):
+    """
+    {codificación: q} de un header Accept-Encoding. q=0 es un rechazo
+    explícito y se conserva: le gana a "*".
+    """
+    resultado = {}
+    for parte in (accept_encoding or "").split(","):
+        match = _ACCEPT.match(parte)
+        if not match:
+            continue
+        try:
+            q = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        resultado[match.group(1).lower()] = q
+    return resultado
+
+
+def elegir(accept_encoding):
+    """
+    (nombre, función) del compresor con mayor q para el cliente; entre
+    iguales, el preferido por el servidor. None si no acepta ninguno.
+    """
+    cliente = pesos(accept_encoding)
+    mejor = None
+    for nombre, comprimir in COMPRESORES:
+        q = cliente.get(nombre, cliente.get("*", 0))
+        if q > 0 and (mejor is None or q > mejor[0]):
+            mejor = (q, nombre, comprimir)
+    return mejor and mejor[1:]
+
+
+class CompresionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if request.path.startswith(EXCLUIDAS):
+            return response
+        tipo = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if not tipo.startswith(TIPOS_COMPRIMIBLES):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < MINIMO:
+            return response
+        compresor = elegir(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if compresor is None:
+            return response
+
+        nombre, comprimir = compresor
+        comprimido = comprimir(response.content)
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response["Content-Length"] = str(len(comprimido))
+        response["Content-Encoding"] = nombre
+        # El cuerpo ya no es byte a byte el mismo: el ETag pasa a ser débil.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_alter_consultorio_deleted_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='turno',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='consultorio',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='consultorio_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='documento_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['paciente', '-creado_en'], name='documento_paciente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evolucion',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='evolucion_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evolucion',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['paciente', '-creado_en'], name='evolucion_paciente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informe',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='informe_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informe',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['paciente', '-actualizado_en'], name='informe_paciente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='paciente_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='paciente_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='turno_papelera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['profesional', 'inicio'], name='turno_profesional_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['inicio'], name='turno_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_at'], name='user_papelera_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='turno',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('consultorio', 'inicio'), name='turno_consultorio_inicio_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_soft_delete_managers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('CREATE', 'Crear'), ('UPDATE', 'Actualizar'), ('DELETE', 'Eliminar'), ('RESTORE', 'Restaurar'), ('LOGIN', 'Login'), ('PASSWORD_CHANGE', 'Cambio de contraseña'), ('INVITE_ACCEPT', 'Acepta invitación')], max_length=30),
+        ),
+    ]
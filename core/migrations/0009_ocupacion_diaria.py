@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_auditlog_restore_action'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('CONFIRMADO', 'Confirmado'), ('EN_ESPERA', 'En espera'), ('FINALIZADO', 'Finalizado'), ('CANCELADO', 'Cancelado')], max_length=20)),
+                ('turnos', models.IntegerField(default=0)),
+                ('minutos', models.IntegerField(default=0)),
+                ('consultorio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacion', to='core.consultorio')),
+                ('profesional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profesional', 'fecha'], name='ocupacion_profesional_idx'), models.Index(fields=['consultorio', 'fecha'], name='ocupacion_consultorio_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'consultorio', 'profesional', 'estado'), name='ocupacion_diaria_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_ocupacion_diaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendaToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='turno',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(fields=['profesional', 'actualizado_en'], name='turno_prof_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(fields=['consultorio', 'actualizado_en'], name='turno_cons_actualizado_idx'),
+        ),
+        migrations.AddField(
+            model_name='agendatoken',
+            name='consultorio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='agenda_tokens', to='core.consultorio'),
+        ),
+        migrations.AddField(
+            model_name='agendatoken',
+            name='creado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='agenda_tokens_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='agendatoken',
+            name='profesional',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='agenda_tokens', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='agendatoken',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('consultorio__isnull', True), ('profesional__isnull', False)), models.Q(('consultorio__isnull', False), ('profesional__isnull', True)), _connector='OR'), name='agenda_token_un_destino'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_correo_saliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correosaliente',
+            name='clave',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
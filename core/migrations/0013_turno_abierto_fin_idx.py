@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_correo_clave'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(condition=models.Q(('estado__in', ['CONFIRMADO', 'EN_ESPERA']), ('is_active', True)), fields=['fin'], name='turno_abierto_fin_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_turno_abierto_fin_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultorio',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evolucion',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='turno',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='consultorio',
+            index=models.Index(fields=['version'], name='consultorio_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(fields=['version'], name='documento_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evolucion',
+            index=models.Index(fields=['version'], name='evolucion_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informe',
+            index=models.Index(fields=['version'], name='informe_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['version'], name='paciente_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(fields=['version'], name='turno_version_idx'),
+        ),
+    ]
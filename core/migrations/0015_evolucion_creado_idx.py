@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_version_cambios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evolucion',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['creado_en'], name='evolucion_creado_idx'),
+        ),
+    ]
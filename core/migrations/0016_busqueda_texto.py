@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_evolucion_creado_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evolucion',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='informe',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='evolucion',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('is_active', True)), fields=['busqueda'], name='evolucion_busqueda_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informe',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('is_active', True)), fields=['busqueda'], name='informe_busqueda_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_auditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sede',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('codigo', models.SlugField(unique=True)),
+                ('cantidad_consultorios', models.PositiveSmallIntegerField(default=8)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='consultorio',
+            name='numero',
+            field=models.IntegerField(),
+        ),
+        migrations.AddField(
+            model_name='consultorio',
+            name='sede',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='consultorios', to='core.sede'),
+        ),
+        migrations.AddField(
+            model_name='invitacion',
+            name='sede',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invitaciones', to='core.sede'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='sede',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pacientes', to='core.sede'),
+        ),
+        migrations.AddField(
+            model_name='turno',
+            name='sede',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='turnos', to='core.sede'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='sedes',
+            field=models.ManyToManyField(blank=True, related_name='usuarios', to='core.sede'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['sede', '-created_at'], name='paciente_sede_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turno',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['sede', 'inicio'], name='turno_sede_inicio_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='consultorio',
+            constraint=models.UniqueConstraint(fields=('sede', 'numero'), name='consultorio_sede_numero_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def crear_sede_principal(apps, schema_editor):
+    """
+    Todo lo existente pasa a una sede "principal": la instalación de una
+    sola clínica sigue funcionando igual.
+    """
+    Sede = apps.get_model("core", "Sede")
+    Consultorio = apps.get_model("core", "Consultorio")
+    Paciente = apps.get_model("core", "Paciente")
+    Turno = apps.get_model("core", "Turno")
+    User = apps.get_model("core", "User")
+
+    sede, _ = Sede.objects.get_or_create(
+        codigo="principal", defaults={"nombre": "Sede principal"}
+    )
+    Consultorio.objects.filter(sede__isnull=True).update(sede=sede)
+    Paciente.objects.filter(sede__isnull=True).update(sede=sede)
+    Turno.objects.filter(sede__isnull=True).update(sede=sede)
+    Membresia = User.sedes.through
+    Membresia.objects.bulk_create(
+        [
+            Membresia(user_id=user_id, sede_id=sede.pk)
+            for user_id in User.objects.values_list("pk", flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_sedes'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_sede_principal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_sede_principal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='consultorio',
+            name='sede',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='consultorios', to='core.sede'),
+        ),
+        migrations.AlterField(
+            model_name='paciente',
+            name='sede',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pacientes', to='core.sede'),
+        ),
+        migrations.AlterField(
+            model_name='turno',
+            name='sede',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='turnos', to='core.sede'),
+        ),
+    ]
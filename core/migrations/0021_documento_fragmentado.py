@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:54
+
+import core.archivos
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_sede_obligatoria'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documento',
+            name='archivo',
+            field=models.FileField(max_length=255, upload_to=core.archivos.ruta_documento),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_documento_fragmentado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='checksum',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='metadatos_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='metadatos_estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='miniatura',
+            field=models.FileField(blank=True, default='', max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='paginas',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='tamano',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='tipo_mime',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['paciente', 'tipo_mime'], name='documento_paciente_mime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(fields=['checksum'], name='documento_checksum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('metadatos_estado', 'PENDIENTE')), fields=['id'], name='documento_metadatos_pend_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+from core.busqueda import texto_plano
+
+
+def completar_texto(apps, schema_editor):
+    """
+    Texto indexado de los informes existentes, el mismo que arma
+    Informe.save(). Por lotes y sin tocar version: no es un cambio visible.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Informe = apps.get_model("core", "Informe")
+    ultimo = 0
+    while True:
+        lote = list(
+            Informe.objects.filter(pk__gt=ultimo)
+            .order_by("pk")
+            .only("pk", "titulo", "contenido_html")[:500]
+        )
+        if not lote:
+            return
+        for informe in lote:
+            informe.texto_busqueda = (
+                f"{informe.titulo}\n{texto_plano(informe.contenido_html)}"
+            )
+        Informe.objects.bulk_update(lote, ["texto_busqueda"])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_documento_metadatos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informe',
+            name='texto_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(completar_texto, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_informe_texto_busqueda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='correosaliente',
+            name='estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIANDO', 'Enviando'), ('ENVIADO', 'Enviado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_correo_enviando'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='documento',
+            name='documento_metadatos_pend_idx',
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='metadatos_reserva',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='documento',
+            name='metadatos_estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('metadatos_estado__in', ['PENDIENTE', 'PROCESANDO'])), fields=['id'], name='documento_metadatos_cola_idx'),
+        ),
+    ]
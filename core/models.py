@@ -1,4 +1,10 @@
-from django.db import models
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models.functions import TruncDate
 from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -7,8 +13,193 @@ from django.contrib.auth.models import (
 )
 from django.utils import timezone
 
+from . import archivos, busqueda, realtime
+
+
+class VersionCambio(models.Expression):
+    """
+    Número de cambio de una fila: el id de la transacción que la escribe
+    (xid8 de PostgreSQL). Crece con cada transacción y, junto con
+    marca_cambios(), permite un feed sin saltear commits tardíos.
+    """
+    output_field = models.BigIntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return "pg_current_xact_id()::text::bigint", []
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Solo para desarrollo: SQLite serializa las escrituras, alcanza
+        # con microsegundos desde epoch.
+        return "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)", []
+
+
+def marca_cambios(using="default"):
+    """
+    Toda versión menor a este valor pertenece a una transacción ya
+    terminada: es el límite seguro para el cursor del feed de cambios.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        sql = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+    else:
+        sql = "SELECT CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()[0]
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if getattr(self.model, "registra_cambios", False):
+            kwargs.setdefault("version", VersionCambio())
+        return super().update(**kwargs)
+
+    def alive(self):
+        return self.filter(is_active=True)
+
+    def dead(self):
+        return self.filter(is_active=False)
+
+    def _cascade(self):
+        for label, fk, solo_futuros in getattr(self.model, "soft_delete_cascade", ()):
+            yield apps.get_model(label), fk, solo_futuros
+
+    def soft_delete(self, user=None):
+        """
+        Baja lógica por UPDATEs de conjunto, incluyendo los dependientes
+        declarados en `soft_delete_cascade`. Como QuerySet.delete(),
+        devuelve (total, {modelo: filas}).
+        """
+        now = timezone.now()
+        counts = {}
+        with transaction.atomic(using=self.db):
+            parents = self.alive().values("pk")
+            for related, fk, solo_futuros in self._cascade():
+                qs = related.all_objects.alive().filter(**{f"{fk}__in": parents})
+                if solo_futuros:
+                    qs = qs.filter(inicio__gte=now)
+                counts[related._meta.label] = qs._mark_deleted(now, user)
+            counts[self.model._meta.label] = self.alive()._mark_deleted(now, user)
+        counts = {label: n for label, n in counts.items() if n}
+        return sum(counts.values()), counts
+
+    def restore(self):
+        """
+        Inverso de soft_delete(): los dependientes se restauran solo si
+        cayeron en la misma baja (mismo deleted_at que el padre).
+        """
+        counts = {}
+        with transaction.atomic(using=self.db):
+            parents = self.dead()
+            for related, fk, _solo_futuros in self._cascade():
+                qs = related.all_objects.dead().filter(
+                    **{
+                        f"{fk}__in": parents.values("pk"),
+                        "deleted_at": models.F(f"{fk}__deleted_at"),
+                    }
+                )
+                if hasattr(qs, "without_conflicts"):
+                    qs = qs.without_conflicts()
+                counts[related._meta.label] = qs._mark_restored()
+            counts[self.model._meta.label] = parents._mark_restored()
+        counts = {label: n for label, n in counts.items() if n}
+        return sum(counts.values()), counts
+
+    def _mark_deleted(self, now, user):
+        return self.update(is_active=False, deleted_at=now, deleted_by=user)
+
+    def _mark_restored(self):
+        return self.update(is_active=True, deleted_at=None, deleted_by=None)
+
+
+class TurnoQuerySet(SoftDeleteQuerySet):
+    # Las bajas y restauraciones en lote mantienen OcupacionDiaria al día
+    # y tocan actualizado_en, que usan los feeds de agenda para el ETag.
+    def _mark_deleted(self, now, user):
+        OcupacionDiaria.registrar(self, -1)
+        self._publicar("eliminado")
+        return self.update(
+            is_active=False, deleted_at=now, deleted_by=user, actualizado_en=now
+        )
+
+    def _mark_restored(self):
+        # Los ids se toman antes: el filtro puede depender de deleted_at y
+        # registrar() solo suma turnos activos, así que va después del UPDATE.
+        ids = list(self.dead().values_list("pk", flat=True))
+        turnos = self.model.all_objects.filter(pk__in=ids)
+        cantidad = turnos.update(
+            is_active=True,
+            deleted_at=None,
+            deleted_by=None,
+            actualizado_en=timezone.now(),
+        )
+        OcupacionDiaria.registrar(turnos, 1)
+        turnos._publicar("restaurado")
+        return cantidad
+
+    def cambiar_estado(self, estado):
+        """
+        Cambia el estado de todos los turnos del queryset en un UPDATE,
+        manteniendo OcupacionDiaria (que agrupa por estado).
+        """
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list("pk", flat=True))
+            turnos = self.model.all_objects.filter(pk__in=ids)
+            OcupacionDiaria.registrar(turnos, -1)
+            cantidad = turnos.update(estado=estado, actualizado_en=timezone.now())
+            OcupacionDiaria.registrar(turnos, 1)
+            turnos._publicar("actualizado")
+        return cantidad
+
+    def _publicar(self, tipo):
+        realtime.publicar_turnos(
+            tipo,
+            list(self.alive().values("id", "consultorio_id", "profesional_id", "inicio")),
+            using=self.db,
+        )
+
+    def without_conflicts(self):
+        """
+        Excluye turnos cuyo horario ya está ocupado por un turno activo.
+        """
+        ocupado = Turno.objects.filter(
+            consultorio=models.OuterRef("consultorio"),
+            inicio__lt=models.OuterRef("fin"),
+            fin__gt=models.OuterRef("inicio"),
+        ).exclude(pk=models.OuterRef("pk"))
+        return self.exclude(models.Exists(ocupado))
+
+    def without_overlaps(self):
+        """
+        Excluye turnos que se superponen con otro del mismo queryset (por
+        ejemplo, dos eliminados que se quieren restaurar juntos).
+        """
+        pisado = (
+            self.order_by()
+            .filter(
+                consultorio=models.OuterRef("consultorio"),
+                inicio__lt=models.OuterRef("fin"),
+                fin__gt=models.OuterRef("inicio"),
+            )
+            .exclude(pk=models.OuterRef("pk"))
+        )
+        return self.exclude(models.Exists(pisado))
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager por defecto: solo devuelve registros activos.
+    Los eliminados se consultan con `all_objects.dead()`.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
+class UserManager(BaseUserManager.from_queryset(SoftDeleteQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
 
-class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("El usuario debe tener un email")
@@ -34,7 +225,22 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class SoftDeleteModel(models.Model):
+class SoftDeleteMixin:
+    # (modelo, FK hacia este modelo, solo turnos futuros)
+    soft_delete_cascade = ()
+
+    def soft_delete(self, user=None):
+        result = type(self).all_objects.filter(pk=self.pk).soft_delete(user)
+        self.refresh_from_db(fields=["is_active", "deleted_at", "deleted_by"])
+        return result
+
+    def restore(self):
+        result = type(self).all_objects.filter(pk=self.pk).restore()
+        self.refresh_from_db(fields=["is_active", "deleted_at", "deleted_by"])
+        return result
+
+
+class SoftDeleteModel(SoftDeleteMixin, models.Model):
     is_active = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     deleted_by = models.ForeignKey(
@@ -44,19 +250,52 @@ class SoftDeleteModel(models.Model):
         blank=True,
         related_name="deleted_%(class)s_set",
     )
+    # Se renueva en cada escritura (save y update); lo usa /api/changes/.
+    version = models.BigIntegerField(default=0)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    registra_cambios = True
 
     class Meta:
         abstract = True
+        # Camino de acceso propio para la papelera: los eliminados no
+        # engordan los índices parciales que usan las consultas activas.
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                name="%(class)s_papelera_idx",
+                condition=models.Q(is_active=False),
+            ),
+            models.Index(fields=["version"], name="%(class)s_version_idx"),
+        ]
 
-    def soft_delete(self, user=None):
-        self.is_active = False
-        self.deleted_at = timezone.now()
-        if user is not None:
-            self.deleted_by = user
-        self.save(update_fields=["is_active", "deleted_at", "deleted_by"])
+    def save(self, *args, **kwargs):
+        self.version = VersionCambio()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "version" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "version"]
+        super().save(*args, **kwargs)
+        # El valor lo asigna la base: queda diferido hasta que se lea.
+        self.__dict__.pop("version", None)
+
+
+class Sede(models.Model):
+    """
+    Sede de la clínica. Consultorios, turnos y pacientes pertenecen a una;
+    los profesionales trabajan en una o varias (User.sedes).
+    """
+    nombre = models.CharField(max_length=100)
+    codigo = models.SlugField(max_length=50, unique=True)
+    cantidad_consultorios = models.PositiveSmallIntegerField(default=8)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.nombre
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(SoftDeleteMixin, AbstractBaseUser, PermissionsMixin):
     class Role(models.TextChoices):
         DUENA = "DUENA", "Dueña"
         PROFESIONAL = "PROFESIONAL", "Profesional"
@@ -72,6 +311,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     is_enabled = models.BooleanField(default=False)
+    sedes = models.ManyToManyField(Sede, related_name="usuarios", blank=True)
 
     is_active = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
@@ -87,10 +327,23 @@ class User(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(default=timezone.now)
 
     objects = UserManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    soft_delete_cascade = (("core.Turno", "profesional", True),)
+    sede_lookup = "sedes"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                name="user_papelera_idx",
+                condition=models.Q(is_active=False),
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -99,23 +352,33 @@ class User(AbstractBaseUser, PermissionsMixin):
             self.email = self.email.strip().lower()
         super().save(*args, **kwargs)
 
-    def soft_delete(self, user=None):
-        self.is_active = False
-        self.deleted_at = timezone.now()
-        if user is not None:
-            self.deleted_by = user
-        self.save(update_fields=["is_active", "deleted_at", "deleted_by"])
-
 
 class Consultorio(SoftDeleteModel):
+    sede = models.ForeignKey(
+        Sede, on_delete=models.PROTECT, related_name="consultorios"
+    )
     nombre = models.CharField(max_length=100)
-    numero = models.IntegerField(unique=True)
+    numero = models.IntegerField()
+
+    soft_delete_cascade = (("core.Turno", "consultorio", True),)
+    sede_lookup = "sede"
+
+    class Meta(SoftDeleteModel.Meta):
+        constraints = [
+            # Incluye eliminados, para que restaurar nunca choque.
+            models.UniqueConstraint(
+                fields=["sede", "numero"], name="consultorio_sede_numero_uniq"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.numero})"
 
 
 class Paciente(SoftDeleteModel):
+    sede = models.ForeignKey(
+        Sede, on_delete=models.PROTECT, related_name="pacientes"
+    )
     nombre_completo = models.CharField(max_length=255)
     dni = models.CharField(max_length=50, unique=True)
     fecha_nacimiento = models.DateField(null=True, blank=True)
@@ -127,6 +390,29 @@ class Paciente(SoftDeleteModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    soft_delete_cascade = (
+        ("core.Turno", "paciente", True),
+        ("core.Evolucion", "paciente", False),
+        ("core.Informe", "paciente", False),
+        ("core.Documento", "paciente", False),
+    )
+    sede_lookup = "sede"
+
+    class Meta(SoftDeleteModel.Meta):
+        indexes = [
+            *SoftDeleteModel.Meta.indexes,
+            models.Index(
+                fields=["-created_at"],
+                name="paciente_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["sede", "-created_at"],
+                name="paciente_sede_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
     def __str__(self):
         return self.nombre_completo
 
@@ -147,12 +433,201 @@ class Turno(SoftDeleteModel):
     consultorio = models.ForeignKey(
         Consultorio, on_delete=models.CASCADE, related_name="turnos"
     )
+    # Copia de consultorio.sede: deja los índices de agenda encabezados por sede.
+    sede = models.ForeignKey(Sede, on_delete=models.PROTECT, related_name="turnos")
     inicio = models.DateTimeField()
     fin = models.DateTimeField()
     estado = models.CharField(max_length=20, choices=Estados.choices)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    objects = SoftDeleteManager.from_queryset(TurnoQuerySet)()
+    all_objects = TurnoQuerySet.as_manager()
+
+    sede_lookup = "sede"
+
+    class Meta(SoftDeleteModel.Meta):
+        constraints = [
+            # Un turno eliminado no debe bloquear el horario del consultorio.
+            models.UniqueConstraint(
+                fields=["consultorio", "inicio"],
+                condition=models.Q(is_active=True),
+                name="turno_consultorio_inicio_uniq",
+            ),
+        ]
+        indexes = [
+            *SoftDeleteModel.Meta.indexes,
+            models.Index(
+                fields=["profesional", "inicio"],
+                name="turno_profesional_inicio_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["inicio"],
+                name="turno_inicio_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["sede", "inicio"],
+                name="turno_sede_inicio_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Solo turnos todavía abiertos: lo recorre cerrar_turnos_vencidos.
+            models.Index(
+                fields=["fin"],
+                name="turno_abierto_fin_idx",
+                condition=models.Q(
+                    is_active=True, estado__in=["CONFIRMADO", "EN_ESPERA"]
+                ),
+            ),
+            # Incluyen eliminados: una baja también cambia el feed.
+            models.Index(
+                fields=["profesional", "actualizado_en"],
+                name="turno_prof_actualizado_idx",
+            ),
+            models.Index(
+                fields=["consultorio", "actualizado_en"],
+                name="turno_cons_actualizado_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Se descuenta la versión anterior y se suma la nueva en OcupacionDiaria.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "consultorio" in update_fields:
+            self.sede_id = self.consultorio.sede_id
+            if update_fields is not None and "sede" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "sede"]
+        with transaction.atomic():
+            creado = self.pk is None
+            anterior = None
+            if not creado:
+                # Lock de la fila antes de leer su estado anterior: dos
+                # ediciones simultáneas descontarían el mismo estado.
+                fila = Turno.all_objects.filter(pk=self.pk)
+                anterior = (
+                    fila.select_for_update()
+                    .values("consultorio_id", "profesional_id", "inicio")
+                    .first()
+                )
+                OcupacionDiaria.registrar(fila, -1)
+            super().save(*args, **kwargs)
+            OcupacionDiaria.registrar(Turno.all_objects.filter(pk=self.pk), 1)
+            evento = {
+                "id": self.pk,
+                "consultorio_id": self.consultorio_id,
+                "profesional_id": self.profesional_id,
+                "inicio": self.inicio,
+            }
+            if anterior and any(anterior[clave] != evento[clave] for clave in anterior):
+                # Un turno que se va de un profesional, consultorio o día
+                # también tiene que llegar a quien lo tenía.
+                evento["anterior"] = anterior
+            realtime.publicar_turnos("creado" if creado else "actualizado", [evento])
+
+
+class OcupacionDiaria(models.Model):
+    """
+    Resumen de turnos activos por día, consultorio, profesional y estado.
+    Se mantiene en forma incremental desde Turno; el comando
+    `reconstruir_ocupacion` lo recalcula desde cero.
+    """
+    fecha = models.DateField()
+    consultorio = models.ForeignKey(
+        Consultorio, on_delete=models.CASCADE, related_name="ocupacion"
+    )
+    profesional = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="ocupacion"
+    )
+    estado = models.CharField(max_length=20, choices=Turno.Estados.choices)
+    turnos = models.IntegerField(default=0)
+    minutos = models.IntegerField(default=0)
 
     class Meta:
-        unique_together = ("consultorio", "inicio")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "consultorio", "profesional", "estado"],
+                name="ocupacion_diaria_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["profesional", "fecha"], name="ocupacion_profesional_idx"),
+            models.Index(fields=["consultorio", "fecha"], name="ocupacion_consultorio_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.consultorio_id} {self.profesional_id} {self.estado}"
+
+    @classmethod
+    def registrar(cls, turnos, signo):
+        """
+        Suma (signo=1) o descuenta (signo=-1) los turnos activos del
+        queryset: un GROUP BY y un upsert por grupo, nunca por turno.
+        """
+        filas = (
+            turnos.alive()
+            .order_by()
+            .annotate(
+                dia=TruncDate("inicio", tzinfo=timezone.get_current_timezone()),
+                duracion=models.ExpressionWrapper(
+                    models.F("fin") - models.F("inicio"),
+                    output_field=models.DurationField(),
+                ),
+            )
+            .values("dia", "consultorio_id", "profesional_id", "estado")
+            .annotate(cantidad=models.Count("id"), total=models.Sum("duracion"))
+        )
+        valores = [
+            (
+                fila["dia"],
+                fila["consultorio_id"],
+                fila["profesional_id"],
+                fila["estado"],
+                signo * fila["cantidad"],
+                signo * int(fila["total"].total_seconds() // 60),
+            )
+            for fila in filas
+        ]
+        if not valores:
+            return 0
+
+        connection = connections[router.db_for_write(cls)]
+        tabla = connection.ops.quote_name(cls._meta.db_table)
+        sql = (
+            f"INSERT INTO {tabla} "
+            "(fecha, consultorio_id, profesional_id, estado, turnos, minutos) "
+            "VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (fecha, consultorio_id, profesional_id, estado) "
+            f"DO UPDATE SET turnos = {tabla}.turnos + EXCLUDED.turnos, "
+            f"minutos = {tabla}.minutos + EXCLUDED.minutos"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, valores)
+        return len(valores)
+
+    @classmethod
+    def reconstruir(cls, desde=None, hasta=None):
+        """
+        Recalcula el rango [desde, hasta] (fechas locales, ambos
+        opcionales) desde la tabla de turnos.
+        """
+        tz = timezone.get_current_timezone()
+        resumen = cls.objects.all()
+        turnos = Turno.objects.all()
+        if desde:
+            resumen = resumen.filter(fecha__gte=desde)
+            turnos = turnos.filter(
+                inicio__gte=timezone.make_aware(datetime.combine(desde, time.min), tz)
+            )
+        if hasta:
+            resumen = resumen.filter(fecha__lte=hasta)
+            turnos = turnos.filter(
+                inicio__lt=timezone.make_aware(
+                    datetime.combine(hasta + timedelta(days=1), time.min), tz
+                )
+            )
+        with transaction.atomic():
+            resumen.delete()
+            return cls.registrar(turnos, 1)
 
 
 class Evolucion(SoftDeleteModel):
@@ -164,15 +639,123 @@ class Evolucion(SoftDeleteModel):
     )
     texto = models.TextField()
     creado_en = models.DateTimeField(auto_now_add=True)
+    busqueda = SearchVectorField(null=True, editable=False)
+
+    sede_lookup = "paciente__sede"
+
+    class Meta(SoftDeleteModel.Meta):
+        indexes = [
+            *SoftDeleteModel.Meta.indexes,
+            models.Index(
+                fields=["paciente", "-creado_en"],
+                name="evolucion_paciente_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Listado general filtrado por día, semana o mes.
+            models.Index(
+                fields=["creado_en"],
+                name="evolucion_creado_idx",
+                condition=models.Q(is_active=True),
+            ),
+            GinIndex(
+                fields=["busqueda"],
+                name="evolucion_busqueda_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        busqueda.preparar(self, self.texto, ["texto"], kwargs)
+        super().save(*args, **kwargs)
+        self.__dict__.pop("busqueda", None)
 
 
 class Documento(SoftDeleteModel):
+    class EstadosMetadatos(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        PROCESANDO = "PROCESANDO", "Procesando"
+        LISTO = "LISTO", "Listo"
+        ERROR = "ERROR", "Error"
+
     paciente = models.ForeignKey(
         Paciente, on_delete=models.CASCADE, related_name="documentos"
     )
     nombre = models.CharField(max_length=255)
-    archivo = models.FileField(upload_to="documentos/")
+    archivo = models.FileField(upload_to=archivos.ruta_documento, max_length=255)
     creado_en = models.DateTimeField(auto_now_add=True)
+    # Metadatos del archivo: los completa el worker procesar_documentos
+    # (ver core/metadatos.py) para que los listados no abran archivos.
+    tamano = models.PositiveBigIntegerField(null=True, blank=True)
+    tipo_mime = models.CharField(max_length=100, blank=True, default="")
+    checksum = models.CharField(max_length=64, blank=True, default="")
+    paginas = models.PositiveIntegerField(null=True, blank=True)
+    miniatura = models.FileField(max_length=255, blank=True, default="")
+    metadatos_estado = models.CharField(
+        max_length=10,
+        choices=EstadosMetadatos.choices,
+        default=EstadosMetadatos.PENDIENTE,
+    )
+    metadatos_error = models.TextField(blank=True, default="")
+    # Vencimiento de la reserva de un worker (estado PROCESANDO): pasado
+    # ese momento, otro worker lo vuelve a tomar.
+    metadatos_reserva = models.DateTimeField(null=True, blank=True, editable=False)
+
+    sede_lookup = "paciente__sede"
+    campos_metadatos = (
+        "tamano",
+        "tipo_mime",
+        "checksum",
+        "paginas",
+        "miniatura",
+        "metadatos_estado",
+        "metadatos_error",
+    )
+
+    class Meta(SoftDeleteModel.Meta):
+        indexes = [
+            *SoftDeleteModel.Meta.indexes,
+            models.Index(
+                fields=["paciente", "-creado_en"],
+                name="documento_paciente_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["paciente", "tipo_mime"],
+                name="documento_paciente_mime_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(fields=["checksum"], name="documento_checksum_idx"),
+            # Solo la cola: la recorre el worker de metadatos.
+            models.Index(
+                fields=["id"],
+                name="documento_metadatos_cola_idx",
+                condition=models.Q(metadatos_estado__in=["PENDIENTE", "PROCESANDO"]),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Al reemplazar el archivo, el anterior y su miniatura se borran
+        # tras el commit y los metadatos vuelven a la cola.
+        update_fields = kwargs.get("update_fields")
+        anterior = None
+        if self.pk and (update_fields is None or "archivo" in update_fields):
+            anterior = (
+                type(self).all_objects.filter(pk=self.pk)
+                .values_list("archivo", "miniatura")
+                .first()
+            )
+        reemplazado = anterior is not None and anterior[0] != self.archivo.name
+        if reemplazado:
+            self.tamano = self.paginas = None
+            self.tipo_mime = self.checksum = self.miniatura = self.metadatos_error = ""
+            self.metadatos_estado = self.EstadosMetadatos.PENDIENTE
+            if update_fields is not None:
+                kwargs["update_fields"] = [*update_fields, *self.campos_metadatos]
+        super().save(*args, **kwargs)
+        if reemplazado:
+            for nombre in anterior:
+                if nombre:
+                    archivos.descartar_al_confirmar(nombre, using=self._state.db)
 
 
 class Informe(SoftDeleteModel):
@@ -186,6 +769,38 @@ class Informe(SoftDeleteModel):
     contenido_html = models.TextField()
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
+    busqueda = SearchVectorField(null=True, editable=False)
+    # Lo que se indexó en `busqueda`; de acá salen los fragmentos resaltados.
+    texto_busqueda = models.TextField(blank=True, default="", editable=False)
+
+    sede_lookup = "paciente__sede"
+
+    class Meta(SoftDeleteModel.Meta):
+        indexes = [
+            *SoftDeleteModel.Meta.indexes,
+            models.Index(
+                fields=["paciente", "-actualizado_en"],
+                name="informe_paciente_idx",
+                condition=models.Q(is_active=True),
+            ),
+            GinIndex(
+                fields=["busqueda"],
+                name="informe_busqueda_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        texto = f"{self.titulo}\n{busqueda.texto_plano(self.contenido_html)}"
+        busqueda.preparar(
+            self,
+            texto,
+            ["titulo", "contenido_html"],
+            kwargs,
+            campo_texto="texto_busqueda",
+        )
+        super().save(*args, **kwargs)
+        self.__dict__.pop("busqueda", None)
 
 
 class Invitacion(models.Model):
@@ -206,16 +821,111 @@ class Invitacion(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     expira_en = models.DateTimeField()
     usado_en = models.DateTimeField(null=True, blank=True)
+    # Sede a la que se suma el usuario al aceptar.
+    sede = models.ForeignKey(
+        Sede,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="invitaciones",
+    )
+
+    sede_lookup = "sede"
 
     def __str__(self):
         return f"{self.email} ({self.role})"
 
 
+class AgendaToken(models.Model):
+    """
+    Token de solo lectura para suscribirse al feed .ics de un
+    profesional o de un consultorio.
+    """
+    token = models.CharField(max_length=64, unique=True)
+    profesional = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="agenda_tokens",
+    )
+    consultorio = models.ForeignKey(
+        Consultorio,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="agenda_tokens",
+    )
+    creado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="agenda_tokens_creados",
+    )
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(profesional__isnull=False, consultorio__isnull=True)
+                    | models.Q(profesional__isnull=True, consultorio__isnull=False)
+                ),
+                name="agenda_token_un_destino",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Agenda {self.profesional or self.consultorio}"
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida: los emails se escriben en la misma transacción que
+    el cambio que los origina y los envía el comando `enviar_correos`.
+    Mientras un worker lo envía, el email queda ENVIANDO y proximo_intento
+    es el vencimiento de esa reserva.
+    """
+    class Estados(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        ENVIANDO = "ENVIANDO", "Enviando"
+        ENVIADO = "ENVIADO", "Enviado"
+        FALLIDO = "FALLIDO", "Fallido"
+
+    # Clave de idempotencia opcional: un mismo aviso nunca se encola dos veces.
+    clave = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    destinatarios = models.JSONField(default=list)
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=255, null=True, blank=True)
+    estado = models.CharField(
+        max_length=20, choices=Estados.choices, default=Estados.PENDIENTE
+    )
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(null=True, blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["estado", "proximo_intento"],
+                name="correo_estado_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} ({self.estado})"
+
+
 class AuditLog(models.Model):
     class Action(models.TextChoices):
         CREATE = "CREATE", "Crear"
         UPDATE = "UPDATE", "Actualizar"
         DELETE = "DELETE", "Eliminar"
+        RESTORE = "RESTORE", "Restaurar"
         LOGIN = "LOGIN", "Login"
         PASSWORD_CHANGE = "PASSWORD_CHANGE", "Cambio de contraseña"
         INVITE_ACCEPT = "INVITE_ACCEPT", "Acepta invitación"
@@ -226,6 +936,8 @@ class AuditLog(models.Model):
         null=True,
         blank=True,
         related_name="audit_logs",
+        # Lo cubre auditlog_actor_idx.
+        db_index=False,
     )
     action = models.CharField(max_length=30, choices=Action.choices)
     target_type = models.CharField(max_length=100)
@@ -233,5 +945,22 @@ class AuditLog(models.Model):
     metadata = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Cada filtro de /api/audit-logs/ termina ordenando por fecha.
+            models.Index(fields=["-created_at"], name="auditlog_created_idx"),
+            models.Index(
+                fields=["target_type", "target_id", "-created_at"],
+                name="auditlog_target_idx",
+            ),
+            models.Index(fields=["actor", "-created_at"], name="auditlog_actor_idx"),
+            models.Index(fields=["action", "-created_at"], name="auditlog_action_idx"),
+            GinIndex(
+                fields=["metadata"],
+                name="auditlog_metadata_idx",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ]
+
     def __str__(self):
         return f"{self.action} {self.target_type} {self.target_id}"
@@ -0,0 +1,184 @@
+"""
+Eventos de agenda en tiempo real (Server-Sent Events).
+
+Los cambios de turnos se publican al confirmar la transacción en un
+broker. El broker por defecto vive en el proceso; para varios nodos se
+configura REALTIME_BROKER = "core.realtime.PostgresBroker", que reparte
+los eventos con LISTEN/NOTIFY sobre la misma base.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+COLA_MAXIMA = 1000
+
+
+class Suscripcion:
+    def __init__(self, loop, filtro):
+        self.loop = loop
+        self.filtro = filtro
+        self.cola = asyncio.Queue(maxsize=COLA_MAXIMA)
+        self.desbordada = False
+
+    def acepta(self, evento):
+        # Un turno movido llega tanto a quien lo tiene como a quien lo tenía.
+        return self._coincide(evento) or self._coincide(evento.get("anterior"))
+
+    def _coincide(self, datos):
+        if datos is None:
+            return False
+        for clave, valor in self.filtro.items():
+            if valor is not None and datos.get(clave) != valor:
+                return False
+        return True
+
+    def entregar(self, evento):
+        # Corre en el loop del suscriptor.
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # El cliente no da abasto: se le pide recargar la agenda.
+            self.desbordada = True
+
+
+class MemoryBroker:
+    """
+    Broker en memoria: solo reparte eventos dentro de este proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscripciones = set()
+
+    def suscribir(self, filtro):
+        suscripcion = Suscripcion(asyncio.get_running_loop(), filtro)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, eventos):
+        self._repartir(eventos)
+
+    def _repartir(self, eventos):
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            for evento in eventos:
+                if suscripcion.acepta(evento):
+                    try:
+                        suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, evento)
+                    except RuntimeError:
+                        # El loop ya cerró; la suscripción se limpia sola.
+                        pass
+
+
+class PostgresBroker(MemoryBroker):
+    """
+    Reparte los eventos entre procesos y nodos con pg_notify. Un hilo por
+    proceso escucha el canal y entrega localmente.
+    """
+    canal = "lazos_agenda"
+
+    def __init__(self):
+        super().__init__()
+        self._escucha = None
+
+    def suscribir(self, filtro):
+        self._iniciar_escucha()
+        return super().suscribir(filtro)
+
+    def publicar(self, eventos):
+        with connections["default"].cursor() as cursor:
+            for evento in eventos:
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)", [self.canal, json.dumps(evento)]
+                )
+
+    def _iniciar_escucha(self):
+        with self._lock:
+            if self._escucha is None or not self._escucha.is_alive():
+                self._escucha = threading.Thread(
+                    target=self._escuchar, name="realtime-listen", daemon=True
+                )
+                self._escucha.start()
+
+    def _escuchar(self):
+        import psycopg2
+
+        params = connections["default"].get_connection_params()
+        while True:
+            try:
+                conn = psycopg2.connect(**params)
+                conn.set_isolation_level(0)  # autocommit
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.canal}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    eventos = []
+                    while conn.notifies:
+                        eventos.append(json.loads(conn.notifies.pop(0).payload))
+                    self._repartir(eventos)
+            except Exception:
+                logger.exception("Se perdió la escucha de eventos; reintentando")
+                threading.Event().wait(5)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                ruta = getattr(settings, "REALTIME_BROKER", "core.realtime.MemoryBroker")
+                _broker = import_string(ruta)()
+    return _broker
+
+
+def publicar_turnos(tipo, filas, using=None):
+    """
+    Publica un evento por turno cuando la transacción actual confirma.
+    `filas` son dicts con id, consultorio_id, profesional_id e inicio y,
+    si el turno cambió de lugar, "anterior" con los valores previos.
+    """
+    eventos = []
+    for fila in filas:
+        evento = {"tipo": tipo, "id": fila["id"], **_ubicacion(fila)}
+        if fila.get("anterior"):
+            evento["anterior"] = _ubicacion(fila["anterior"])
+        eventos.append(evento)
+    if eventos:
+        transaction.on_commit(lambda: _publicar(eventos), using=using)
+
+
+def _ubicacion(fila):
+    return {
+        "consultorio": fila["consultorio_id"],
+        "profesional": fila["profesional_id"],
+        "fecha": timezone.localtime(fila["inicio"]).date().isoformat(),
+    }
+
+
+def _publicar(eventos):
+    try:
+        broker().publicar(eventos)
+    except Exception:
+        # Un fallo del canal en vivo nunca debe romper la escritura.
+        logger.exception("No se pudieron publicar eventos de agenda")
@@ -0,0 +1,206 @@
+"""
+Lecturas en réplicas de PostgreSQL.
+
+Los pedidos GET/HEAD/OPTIONS leen de una réplica (una por pedido, para
+que todas sus consultas vean el mismo estado); las escrituras y todo lo
+que corre fuera de un pedido usan la primaria, salvo que se pida lo
+contrario con lecturas_en_replica().
+
+Después de escribir, el usuario queda pegado a la primaria durante
+REPLICA_PEGADO_SEGUNDOS para leer lo que acaba de guardar. La marca se
+guarda en el cache (por id de usuario, tomado del JWT o la sesión) y en
+una cookie, que un cliente de otro origen sin credenciales no manda. El
+siguiente pedido puede caer en otro worker, así que el cache tiene que ser
+compartido (REDIS_URL); si no responde, se lee de la primaria.
+
+Una réplica con más de REPLICA_LAG_MAXIMO segundos de atraso, o que no
+responde, se saltea hasta el próximo chequeo.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+LAG_MAXIMO = getattr(settings, "REPLICA_LAG_MAXIMO", 2.0)
+PEGADO_SEGUNDOS = getattr(settings, "REPLICA_PEGADO_SEGUNDOS", 10)
+CHEQUEO_SEGUNDOS = getattr(settings, "REPLICA_CHEQUEO_SEGUNDOS", 5)
+COOKIE = "lazos_primaria"
+
+# Atraso en segundos; 0 si ya aplicó todo lo recibido (una primaria
+# inactiva no debe hacer parecer atrasada a la réplica).
+SQL_LAG = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_lecturas = contextvars.ContextVar("lecturas", default=None)
+_estado = {}
+_estado_lock = threading.Lock()
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def _atraso(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(SQL_LAG)
+        return float(cursor.fetchone()[0] or 0)
+
+
+def replica_sana(alias):
+    """
+    Si la réplica está al día. El resultado se reutiliza durante
+    CHEQUEO_SEGUNDOS para no consultar el atraso en cada pedido.
+    """
+    ahora = time.monotonic()
+    with _estado_lock:
+        revisado, sana = _estado.get(alias, (None, False))
+    if revisado is not None and ahora - revisado < CHEQUEO_SEGUNDOS:
+        return sana
+    try:
+        atraso = _atraso(alias)
+    except Exception as exc:
+        logger.warning("Réplica %s no disponible: %s", alias, exc)
+        sana = False
+    else:
+        sana = atraso <= LAG_MAXIMO
+        if not sana:
+            logger.warning("Réplica %s atrasada %.1f s", alias, atraso)
+    with _estado_lock:
+        _estado[alias] = (ahora, sana)
+    return sana
+
+
+def elegir_replica():
+    """
+    Una réplica sana al azar, o None (se lee de la primaria).
+    """
+    sanas = [alias for alias in replicas() if replica_sana(alias)]
+    return random.choice(sanas) if sanas else None
+
+
+@contextmanager
+def lecturas_en_replica():
+    """
+    Manda a una réplica las lecturas del bloque (reportes, comandos).
+    """
+    token = _lecturas.set(elegir_replica())
+    try:
+        yield
+    finally:
+        _lecturas.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _lecturas.get()
+        # Dentro de una transacción en la primaria se lee lo propio.
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplicas tienen los mismos datos.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _clave(user_id):
+    return f"replicas:pegado:{user_id}"
+
+
+def _usuario_token(request):
+    autenticacion = JWTAuthentication()
+    header = autenticacion.get_header(request)
+    if header is None:
+        return None
+    raw = autenticacion.get_raw_token(header)
+    if raw is None:
+        return None
+    try:
+        token = autenticacion.get_validated_token(raw)
+    except (InvalidToken, TokenError):
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        backend = settings.CACHES["default"]["BACKEND"]
+        if replicas() and backend.endswith(".LocMemCache"):
+            logger.warning(
+                "Réplicas con cache local por proceso: después de escribir, un "
+                "pedido atendido por otro worker puede leer datos viejos. "
+                "Configurar REDIS_URL."
+            )
+
+    def process_request(self, request):
+        alias = None
+        if replicas() and request.method in SAFE_METHODS and not self._pegado(request):
+            alias = elegir_replica()
+        # Por ASGI, process_request y process_response corren en contextos
+        # distintos y un token de set() no se puede usar en reset(): se
+        # guarda el valor anterior y se vuelve a él.
+        request._replicas_previo = _lecturas.get()
+        _lecturas.set(alias)
+
+    def process_response(self, request, response):
+        if hasattr(request, "_replicas_previo"):
+            _lecturas.set(request._replicas_previo)
+        if (
+            replicas()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            self._pegar(request, response)
+        return response
+
+    def _pegado(self, request):
+        if request.COOKIES.get(COOKIE):
+            return True
+        user = getattr(request, "user", None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        if user_id is None:
+            user_id = _usuario_token(request)
+        if user_id is None:
+            return False
+        try:
+            return bool(cache.get(_clave(user_id)))
+        except Exception as exc:
+            # Sin saber si acaba de escribir, lo seguro es la primaria.
+            logger.warning("Cache no disponible para réplicas: %s", exc)
+            return True
+
+    def _pegar(self, request, response):
+        # DRF deja en request.user al usuario del JWT una vez autenticado.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            try:
+                cache.set(_clave(user.pk), True, PEGADO_SEGUNDOS)
+            except Exception as exc:
+                logger.warning("Cache no disponible para réplicas: %s", exc)
+        response.set_cookie(
+            COOKIE, "1", max_age=PEGADO_SEGUNDOS, httponly=True, samesite="Lax"
+        )
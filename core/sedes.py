@@ -0,0 +1,106 @@
+"""
+Sedes (multi-clínica).
+
+El cliente elige la sede con el header X-Sede (código o id). Sin header,
+la dueña ve todas las sedes y un profesional, las suyas. Cada modelo con
+sede declara en `sede_lookup` el camino hasta ella; filtrar() lo aplica
+como igualdad cuando hay una sola sede, que es lo que aprovechan los
+índices encabezados por sede.
+"""
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .models import Sede, User
+
+HEADER = "HTTP_X_SEDE"
+CACHE_SEGUNDOS = 60
+
+
+def resolver(valor):
+    """
+    Sede por código o id, con cache corto: se resuelve en cada pedido.
+    Solo dígitos ASCII cuentan como id; cualquier otro valor ("²", "٣")
+    se busca como código y, si no existe, es una sede inexistente.
+    """
+    clave = f"sedes:{valor}"
+    sede = cache.get(clave)
+    if sede is None:
+        es_id = valor.isascii() and valor.isdecimal()
+        filtro = {"pk": int(valor)} if es_id else {"codigo": valor}
+        sede = Sede.objects.filter(**filtro).first()
+        if sede is not None:
+            cache.set(clave, sede, CACHE_SEGUNDOS)
+    return sede
+
+
+class SedeMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        request.sede = None
+        valor = request.META.get(HEADER, "").strip()
+        if valor:
+            request.sede = resolver(valor)
+            if request.sede is None:
+                return JsonResponse({"detail": "Sede inexistente."}, status=400)
+
+
+def sedes_visibles(request):
+    """
+    Ids de las sedes que el pedido puede ver, o None si son todas.
+    """
+    visibles = getattr(request, "_sedes_visibles", False)
+    if visibles is not False:
+        return visibles
+
+    user = request.user
+    sede = getattr(request, "sede", None)
+    if user.role == User.Role.DUENA:
+        visibles = None if sede is None else [sede.pk]
+    else:
+        propias = list(user.sedes.values_list("pk", flat=True))
+        if sede is None:
+            visibles = propias
+        elif sede.pk in propias:
+            visibles = [sede.pk]
+        else:
+            raise PermissionDenied("No tiene acceso a esta sede.")
+    request._sedes_visibles = visibles
+    return visibles
+
+
+def filtrar(queryset, request, lookup=None):
+    lookup = lookup or getattr(queryset.model, "sede_lookup", None)
+    if lookup is None:
+        return queryset
+    ids = sedes_visibles(request)
+    if ids is None:
+        return queryset
+    filtro = {lookup: ids[0]} if len(ids) == 1 else {f"{lookup}__in": ids}
+    campo = queryset.model._meta.get_field(lookup.split("__")[0])
+    if campo.many_to_many:
+        # Por subconsulta, para no duplicar filas con varias sedes.
+        filtro = {"pk__in": queryset.model._base_manager.filter(**filtro).values("pk")}
+    return queryset.filter(**filtro)
+
+
+def sede_para_crear(request):
+    """
+    Sede en la que se crea un registro: la del header o, si el usuario
+    solo ve una, esa.
+    """
+    sede = getattr(request, "sede", None)
+    ids = sedes_visibles(request)
+    if sede is not None:
+        return sede
+    if ids is None:
+        ids = list(Sede.objects.values_list("pk", flat=True)[:2])
+    if len(ids) == 1:
+        return Sede.objects.get(pk=ids[0])
+    raise ValidationError({"sede": "Indique la sede con el header X-Sede."})
+
+
+def validar(request, sede_id, campo):
+    ids = sedes_visibles(request)
+    if ids is not None and sede_id not in ids:
+        raise ValidationError({campo: "No pertenece a una sede habilitada."})
@@ -2,7 +2,9 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import exceptions
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.utils import timezone
+from . import sedes
 from .models import (
     User,
     Paciente,
@@ -13,9 +15,41 @@ from .models import (
     Informe,
     Invitacion,
     AuditLog,
+    AgendaToken,
+    Sede,
 )
 
 
+def nombre_completo(first_name, last_name):
+    nombre = f"{first_name or ''} {last_name or ''}".strip()
+    return nombre or None
+
+
+# Equivalentes de profesional_email/profesional_nombre para core.lectura.
+VALORES_PROFESIONAL = {
+    "profesional_email": (("profesional__email",), None),
+    "profesional_nombre": (
+        ("profesional__first_name", "profesional__last_name"),
+        nombre_completo,
+    ),
+}
+
+
+class PacienteDeSedeMixin:
+    """
+    Limita el campo `paciente` a los pacientes de las sedes visibles del
+    pedido: un paciente de otra sede es un id inexistente.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        campo = fields.get("paciente")
+        if request is not None and campo is not None and not campo.read_only:
+            campo.queryset = sedes.filtrar(campo.queryset, request)
+        return fields
+
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
@@ -107,11 +141,24 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class SedeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Sede
+        fields = ["id", "nombre", "codigo", "cantidad_consultorios"]
+
+
 class PacienteSerializer(serializers.ModelSerializer):
+    # El DNI es único también contra pacientes eliminados.
+    dni = serializers.CharField(
+        max_length=50,
+        validators=[UniqueValidator(queryset=Paciente.all_objects.all())],
+    )
+
     class Meta:
         model = Paciente
         fields = [
             "id",
+            "sede",
             "nombre_completo",
             "dni",
             "fecha_nacimiento",
@@ -126,11 +173,18 @@ class PacienteSerializer(serializers.ModelSerializer):
             "deleted_at",
             "deleted_by",
         ]
-        read_only_fields = ["is_active", "deleted_at", "deleted_by"]
+        read_only_fields = ["sede", "is_active", "deleted_at", "deleted_by"]
 
 
 class UserSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(
+        max_length=254,
+        validators=[UniqueValidator(queryset=User.all_objects.all())],
+    )
     password = serializers.CharField(write_only=True, required=False)
+    sedes = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Sede.objects.all(), required=False
+    )
 
     class Meta:
         model = User
@@ -141,6 +195,7 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name",
             "role",
             "is_enabled",
+            "sedes",
             "is_active",
             "deleted_at",
             "deleted_by",
@@ -150,33 +205,64 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop("password", None)
-        return User.objects.create_user(password=password, **validated_data)
+        sedes = validated_data.pop("sedes", None)
+        user = User.objects.create_user(password=password, **validated_data)
+        if sedes is not None:
+            user.sedes.set(sedes)
+        return user
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
+        sedes = validated_data.pop("sedes", None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if password:
             instance.set_password(password)
         instance.save()
+        if sedes is not None:
+            instance.sedes.set(sedes)
         return instance
 
 
 class ConsultorioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Consultorio
-        fields = ["id", "nombre", "numero", "is_active", "deleted_at", "deleted_by"]
-        read_only_fields = ["is_active", "deleted_at", "deleted_by"]
+        fields = [
+            "id",
+            "sede",
+            "nombre",
+            "numero",
+            "is_active",
+            "deleted_at",
+            "deleted_by",
+        ]
+        read_only_fields = ["sede", "is_active", "deleted_at", "deleted_by"]
 
-    def validate_numero(self, value):
-        if value < 1 or value > 8:
+    def validate(self, attrs):
+        # La sede la fija la vista al crear (header X-Sede) y no cambia.
+        sede = self.instance.sede if self.instance else self.context.get("sede")
+        numero = attrs.get("numero", getattr(self.instance, "numero", None))
+        if sede is None or numero is None:
+            return attrs
+        if numero < 1 or numero > sede.cantidad_consultorios:
             raise serializers.ValidationError(
-                "El número de consultorio debe estar entre 1 y 8."
+                {
+                    "numero": "El número de consultorio debe estar entre 1 y "
+                    f"{sede.cantidad_consultorios}."
+                }
             )
-        return value
+        # Único por sede, también contra consultorios eliminados.
+        existentes = Consultorio.all_objects.filter(sede=sede, numero=numero)
+        if self.instance:
+            existentes = existentes.exclude(pk=self.instance.pk)
+        if existentes.exists():
+            raise serializers.ValidationError(
+                {"numero": "Ya existe un consultorio con este número en la sede."}
+            )
+        return attrs
 
 
-class TurnoSerializer(serializers.ModelSerializer):
+class TurnoSerializer(PacienteDeSedeMixin, serializers.ModelSerializer):
     class Meta:
         model = Turno
         fields = [
@@ -184,6 +270,7 @@ class TurnoSerializer(serializers.ModelSerializer):
             "paciente",
             "profesional",
             "consultorio",
+            "sede",
             "inicio",
             "fin",
             "estado",
@@ -191,13 +278,22 @@ class TurnoSerializer(serializers.ModelSerializer):
             "deleted_at",
             "deleted_by",
         ]
-        read_only_fields = ["profesional", "is_active", "deleted_at", "deleted_by"]
+        read_only_fields = ["profesional", "sede", "is_active", "deleted_at", "deleted_by"]
 
     def validate(self, attrs):
         inicio = attrs.get("inicio")
         fin = attrs.get("fin")
         consultorio = attrs.get("consultorio")
 
+        paciente = attrs.get("paciente") or getattr(self.instance, "paciente", None)
+        sede_consultorio = (
+            consultorio.sede_id if consultorio else getattr(self.instance, "sede_id", None)
+        )
+        if paciente and sede_consultorio and paciente.sede_id != sede_consultorio:
+            raise serializers.ValidationError(
+                {"paciente": "El paciente es de otra sede que el consultorio."}
+            )
+
         if inicio and fin and fin <= inicio:
             raise serializers.ValidationError(
                 {"fin": "La fecha y hora de fin debe ser posterior al inicio."}
@@ -249,9 +345,10 @@ class TurnoSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class EvolucionSerializer(serializers.ModelSerializer):
+class EvolucionSerializer(PacienteDeSedeMixin, serializers.ModelSerializer):
     profesional_email = serializers.SerializerMethodField()
     profesional_nombre = serializers.SerializerMethodField()
+    valores = VALORES_PROFESIONAL
 
     class Meta:
         model = Evolucion
@@ -279,13 +376,13 @@ class EvolucionSerializer(serializers.ModelSerializer):
         return getattr(obj.profesional, "email", None)
 
     def get_profesional_nombre(self, obj):
-        first = getattr(obj.profesional, "first_name", "") or ""
-        last = getattr(obj.profesional, "last_name", "") or ""
-        nombre = f"{first} {last}".strip()
-        return nombre or None
+        return nombre_completo(
+            getattr(obj.profesional, "first_name", ""),
+            getattr(obj.profesional, "last_name", ""),
+        )
 
 
-class DocumentoSerializer(serializers.ModelSerializer):
+class DocumentoSerializer(PacienteDeSedeMixin, serializers.ModelSerializer):
     class Meta:
         model = Documento
         fields = [
@@ -293,17 +390,36 @@ class DocumentoSerializer(serializers.ModelSerializer):
             "paciente",
             "nombre",
             "archivo",
+            "tamano",
+            "tipo_mime",
+            "checksum",
+            "paginas",
+            "miniatura",
+            "metadatos_estado",
+            "creado_en",
+            "is_active",
+            "deleted_at",
+            "deleted_by",
+        ]
+        # Los metadatos los completa el worker (ver core/metadatos.py).
+        read_only_fields = [
+            "tamano",
+            "tipo_mime",
+            "checksum",
+            "paginas",
+            "miniatura",
+            "metadatos_estado",
             "creado_en",
             "is_active",
             "deleted_at",
             "deleted_by",
         ]
-        read_only_fields = ["creado_en", "is_active", "deleted_at", "deleted_by"]
 
 
-class InformeSerializer(serializers.ModelSerializer):
+class InformeSerializer(PacienteDeSedeMixin, serializers.ModelSerializer):
     profesional_email = serializers.SerializerMethodField()
     profesional_nombre = serializers.SerializerMethodField()
+    valores = VALORES_PROFESIONAL
 
     class Meta:
         model = Informe
@@ -334,10 +450,24 @@ class InformeSerializer(serializers.ModelSerializer):
         return getattr(obj.profesional, "email", None)
 
     def get_profesional_nombre(self, obj):
-        first = getattr(obj.profesional, "first_name", "") or ""
-        last = getattr(obj.profesional, "last_name", "") or ""
-        nombre = f"{first} {last}".strip()
-        return nombre or None
+        return nombre_completo(
+            getattr(obj.profesional, "first_name", ""),
+            getattr(obj.profesional, "last_name", ""),
+        )
+
+
+class InformeResumenSerializer(InformeSerializer):
+    class Meta(InformeSerializer.Meta):
+        fields = [
+            "id",
+            "paciente",
+            "profesional",
+            "profesional_email",
+            "profesional_nombre",
+            "titulo",
+            "creado_en",
+            "actualizado_en",
+        ]
 
 
 class InvitacionSerializer(serializers.ModelSerializer):
@@ -351,14 +481,65 @@ class InvitacionSerializer(serializers.ModelSerializer):
             "creado_en",
             "expira_en",
             "usado_en",
+            "sede",
         ]
-        read_only_fields = ["token", "creado_en", "expira_en", "usado_en"]
+        read_only_fields = ["token", "creado_en", "expira_en", "usado_en", "sede"]
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"], default="GET"
+    )
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not value.startswith("/api/"):
+            raise serializers.ValidationError("Solo se admiten rutas de /api/.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > 20:
+            raise serializers.ValidationError("Máximo 20 pedidos por lote.")
+        return value
+
+
+class AgendaTokenSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AgendaToken
+        fields = ["id", "profesional", "consultorio", "token", "url", "creado_en"]
+        read_only_fields = ["token", "creado_en"]
+
+    def get_url(self, obj):
+        path = f"/api/agenda/{obj.token}.ics"
+        request = self.context.get("request")
+        return request.build_absolute_uri(path) if request else path
+
+    def validate(self, attrs):
+        if bool(attrs.get("profesional")) == bool(attrs.get("consultorio")):
+            raise serializers.ValidationError(
+                "Indique un profesional o un consultorio (solo uno)."
+            )
+        return attrs
 
 
 class ProfileSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(
+        max_length=254,
+        validators=[UniqueValidator(queryset=User.all_objects.all())],
+    )
+    sedes = SedeSerializer(many=True, read_only=True)
+
     class Meta:
         model = User
-        fields = ["id", "email", "first_name", "last_name", "role", "is_enabled"]
+        fields = ["id", "email", "first_name", "last_name", "role", "is_enabled", "sedes"]
         read_only_fields = ["role", "is_enabled"]
 
 
@@ -366,8 +547,18 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(min_length=8)
 
 
+class BulkActionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=10000,
+    )
+
+
 class AuditLogSerializer(serializers.ModelSerializer):
     actor_email = serializers.SerializerMethodField()
+    valores = {"actor_email": (("actor__email",), None)}
 
     class Meta:
         model = AuditLog
@@ -1,3 +1,1395 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.db import IntegrityError, connection
+from django.db.models import F
+from django.http import JsonResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .renderers import OrjsonRenderer
+
+from . import (
+    archivos,
+    busqueda,
+    correo,
+    fechas,
+    lectura,
+    metadatos,
+    middleware,
+    realtime,
+    replicas,
+    views,
+)
+from .models import (
+    AgendaToken,
+    AuditLog,
+    Consultorio,
+    CorreoSaliente,
+    Documento,
+    Evolucion,
+    Informe,
+    OcupacionDiaria,
+    Paciente,
+    Sede,
+    Turno,
+    User,
+)
+
+
+def _en(dias, hora=9):
+    """
+    Instante local a `dias` de hoy, a la hora en punto.
+    """
+    dia = timezone.localtime() + timedelta(days=dias)
+    return dia.replace(hour=hora, minute=0, second=0, microsecond=0)
+
+
+class DatosMixin:
+    """
+    Sede, dueña, profesional, paciente y consultorio de base.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.sede = Sede.objects.get(codigo="principal")
+        self.duena = User.objects.create_user(
+            "duena@lazos.test", "clave", role=User.Role.DUENA, is_enabled=True
+        )
+        self.profesional = User.objects.create_user(
+            "profesional@lazos.test", "clave", is_enabled=True
+        )
+        self.profesional.sedes.add(self.sede)
+        self.paciente = Paciente.objects.create(
+            nombre_completo="Ana Pérez", dni="30111222", sede=self.sede
+        )
+        self.consultorio = Consultorio.objects.create(
+            nombre="Consultorio 1", numero=1, sede=self.sede
+        )
+
+    def turno(self, dias=1, hora=9, **kwargs):
+        datos = {
+            "paciente": self.paciente,
+            "profesional": self.profesional,
+            "consultorio": self.consultorio,
+            "inicio": _en(dias, hora),
+            "fin": _en(dias, hora) + timedelta(hours=1),
+            "estado": Turno.Estados.CONFIRMADO,
+        }
+        datos.update(kwargs)
+        return Turno.objects.create(**datos)
+
+    def evolucion(self, **kwargs):
+        datos = {
+            "paciente": self.paciente,
+            "profesional": self.profesional,
+            "texto": "Evoluciona bien.",
+        }
+        datos.update(kwargs)
+        return Evolucion.objects.create(**datos)
+
+
+class SoftDeleteTests(DatosMixin, TestCase):
+    def test_managers(self):
+        vivo = self.turno(hora=9)
+        muerto = self.turno(hora=10)
+        muerto.soft_delete(self.duena)
+
+        self.assertQuerySetEqual(Turno.objects.all(), [vivo])
+        self.assertQuerySetEqual(Turno.all_objects.order_by("pk"), [vivo, muerto])
+        self.assertQuerySetEqual(Turno.all_objects.alive(), [vivo])
+        self.assertQuerySetEqual(Turno.all_objects.dead(), [muerto])
+        self.assertFalse(muerto.is_active)
+        self.assertEqual(muerto.deleted_by, self.duena)
+        self.assertIsNotNone(muerto.deleted_at)
+
+    def test_baja_libera_el_horario(self):
+        turno = self.turno()
+        turno.soft_delete()
+        # El índice único es parcial: el horario queda libre.
+        self.turno()
+        self.assertEqual(Turno.all_objects.count(), 2)
+
+    def test_cascada_paciente(self):
+        pasado = self.turno(dias=-3)
+        futuro = self.turno(dias=3)
+        evolucion = self.evolucion()
+
+        total, cantidades = self.paciente.soft_delete(self.duena)
+
+        self.assertEqual(total, 3)
+        self.assertEqual(
+            cantidades,
+            {"core.Turno": 1, "core.Evolucion": 1, "core.Paciente": 1},
+        )
+        # Los turnos pasados son historia clínica: no se dan de baja.
+        self.assertQuerySetEqual(Turno.objects.all(), [pasado])
+        futuro.refresh_from_db()
+        evolucion.refresh_from_db()
+        self.assertFalse(futuro.is_active)
+        self.assertFalse(evolucion.is_active)
+        self.assertEqual(futuro.deleted_at, self.paciente.deleted_at)
+        self.assertEqual(evolucion.deleted_by, self.duena)
+
+    def test_cascada_profesional_y_consultorio(self):
+        pasado = self.turno(dias=-1)
+        self.turno(dias=1)
+        self.profesional.soft_delete()
+        self.assertQuerySetEqual(Turno.objects.all(), [pasado])
+        self.assertQuerySetEqual(User.objects.filter(pk=self.profesional.pk), [])
+        self.assertTrue(User.all_objects.filter(pk=self.profesional.pk).exists())
+
+        self.profesional.restore()
+        self.consultorio.soft_delete()
+        self.assertQuerySetEqual(Turno.objects.all(), [pasado])
+
+    def test_restaurar_solo_lo_de_la_misma_baja(self):
+        anterior = self.evolucion(texto="Dada de baja antes.")
+        anterior.soft_delete()
+        evolucion = self.evolucion()
+        turno = self.turno()
+        self.paciente.soft_delete()
+
+        total, cantidades = self.paciente.restore()
+
+        self.assertEqual(total, 3)
+        self.assertEqual(
+            cantidades,
+            {"core.Turno": 1, "core.Evolucion": 1, "core.Paciente": 1},
+        )
+        self.assertTrue(self.paciente.is_active)
+        self.assertIsNone(self.paciente.deleted_at)
+        self.assertQuerySetEqual(Evolucion.objects.all(), [evolucion])
+        self.assertQuerySetEqual(Evolucion.all_objects.dead(), [anterior])
+        self.assertQuerySetEqual(Turno.objects.all(), [turno])
+
+    def test_restaurar_no_pisa_un_turno_nuevo(self):
+        turno = self.turno()
+        self.paciente.soft_delete()
+        otro = Paciente.objects.create(
+            nombre_completo="Beto Gómez", dni="30999888", sede=self.sede
+        )
+        ocupante = self.turno(paciente=otro)
+
+        self.paciente.restore()
+
+        self.assertTrue(Paciente.objects.filter(pk=self.paciente.pk).exists())
+        self.assertQuerySetEqual(Turno.objects.all(), [ocupante])
+        self.assertQuerySetEqual(Turno.all_objects.dead(), [turno])
+
+    def test_soft_delete_ignora_eliminados(self):
+        self.turno()
+        self.paciente.soft_delete()
+        pacientes = Paciente.all_objects.filter(pk=self.paciente.pk)
+        self.assertEqual(pacientes.soft_delete(), (0, {}))
+        self.paciente.restore()
+        self.assertEqual(pacientes.restore(), (0, {}))
+
+
+class AccionesEnLoteTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        self.otro = Paciente.objects.create(
+            nombre_completo="Beto Gómez", dni="30999888", sede=self.sede
+        )
+
+    def test_sin_ids_ni_filtros(self):
+        for url in (
+            "/api/pacientes/bulk-delete/",
+            "/api/pacientes/bulk-delete/?format=json",
+            "/api/pacientes/bulk-delete/?page=2",
+            "/api/pacientes/bulk-delete/?date=no-es-fecha",
+            "/api/pacientes/bulk-delete/?paciente=1",
+        ):
+            with self.subTest(url=url):
+                respuesta = self.client.post(url, {}, format="json")
+                self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Paciente.objects.count(), 2)
+
+    def test_ids_vacios(self):
+        respuesta = self.client.post(
+            "/api/pacientes/bulk-delete/", {"ids": []}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Paciente.objects.count(), 2)
+
+    def test_por_ids(self):
+        respuesta = self.client.post(
+            "/api/pacientes/bulk-delete/?format=json",
+            {"ids": [self.otro.pk]},
+            format="json",
+        )
+        self.assertEqual(respuesta.data, {"matched": 1, "affected": 1})
+        self.assertQuerySetEqual(Paciente.objects.all(), [self.paciente])
+        self.assertEqual(AuditLog.objects.filter(action=AuditLog.Action.DELETE).count(), 1)
+
+    def test_por_filtro(self):
+        propio = self.turno()
+        self.turno(paciente=self.otro, hora=11)
+        respuesta = self.client.post(
+            f"/api/turnos/bulk-delete/?paciente={self.otro.pk}", {}, format="json"
+        )
+        self.assertEqual(respuesta.data, {"matched": 1, "affected": 1})
+        self.assertQuerySetEqual(Turno.objects.all(), [propio])
+
+        respuesta = self.client.post(
+            f"/api/turnos/bulk-restore/?paciente={self.otro.pk}", {}, format="json"
+        )
+        self.assertEqual(respuesta.data, {"matched": 1, "affected": 1})
+        self.assertEqual(Turno.objects.count(), 2)
+
+    def test_restaurar_superpuestos(self):
+        # Dos eliminados en el mismo horario: ninguno vuelve, el resto sí.
+        primero = self.turno()
+        primero.soft_delete()
+        segundo = self.turno()
+        segundo.soft_delete()
+        otro = self.turno(hora=11)
+        otro.soft_delete()
+        respuesta = self.client.post(
+            f"/api/turnos/bulk-restore/?paciente={self.paciente.pk}", {}, format="json"
+        )
+        self.assertEqual(respuesta.data, {"matched": 1, "affected": 1})
+        self.assertQuerySetEqual(Turno.objects.all(), [otro])
+
+    def test_todo_o_nada(self):
+        # Si falla un lote, los anteriores tampoco quedan aplicados.
+        lotes = []
+
+        def registrar(*args, **kwargs):
+            lotes.append(args)
+            if len(lotes) == 2:
+                raise IntegrityError("conflicto")
+
+        with mock.patch.object(views.PacienteViewSet, "bulk_batch_size", 1), \
+                mock.patch.object(views, "log_actions", registrar):
+            respuesta = self.client.post(
+                "/api/pacientes/bulk-delete/",
+                {"ids": [self.paciente.pk, self.otro.pk]},
+                format="json",
+            )
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertIn("eliminar", respuesta.data["detail"])
+        self.assertEqual(respuesta.data["affected"], 0)
+        self.assertEqual(Paciente.objects.count(), 2)
+
+    def test_filtro_ignorado_no_cuenta(self):
+        # Para un profesional, ?profesional= no filtra: serían todos sus turnos.
+        self.turno()
+        self.client.force_authenticate(self.profesional)
+        respuesta = self.client.post(
+            f"/api/turnos/bulk-delete/?profesional={self.duena.pk}", {}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Turno.objects.count(), 1)
+
+
+class FiltroFechaTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        # Martes: la semana va del lunes 9 al lunes 16.
+        self.dia = timezone.localdate() + timedelta(days=30)
+        self.dia -= timedelta(days=self.dia.weekday() - 1)
+        desde, hasta = fechas.rango_dia(self.dia)
+        self.bordes = {
+            "inicio": self.turno(inicio=desde, fin=desde + timedelta(hours=1)),
+            "ultimo": self.turno(inicio=hasta - timedelta(hours=1), fin=hasta),
+            "siguiente": self.turno(inicio=hasta, fin=hasta + timedelta(hours=1)),
+            "anterior": self.turno(inicio=desde - timedelta(hours=1), fin=desde),
+        }
+
+    def ids(self, **params):
+        respuesta = self.client.get("/api/turnos/", params)
+        self.assertEqual(respuesta.status_code, 200)
+        filas = respuesta.data["results"] if "results" in respuesta.data else respuesta.data
+        return {fila["id"] for fila in filas}
+
+    def esperados(self, *nombres):
+        return {self.bordes[nombre].pk for nombre in nombres}
+
+    def test_dia_semiabierto(self):
+        self.assertEqual(
+            self.ids(date=self.dia.isoformat()), self.esperados("inicio", "ultimo")
+        )
+
+    def test_semana_semiabierta(self):
+        lunes = self.dia - timedelta(days=1)
+        desde, hasta = fechas.rango_semana(self.dia)
+        self.assertEqual(desde, fechas.rango_dia(lunes)[0])
+        self.assertEqual(hasta, fechas.rango_dia(lunes + timedelta(days=7))[0])
+        hora = timedelta(hours=1)
+        dentro = {self.turno(inicio=desde, fin=desde + hora).pk}
+        dentro.add(self.turno(inicio=hasta - hora, fin=hasta).pk)
+        self.turno(inicio=desde - hora, fin=desde)
+        self.turno(inicio=hasta, fin=hasta + hora)
+        dentro |= set(self.esperados(*self.bordes))
+        for semana in (self.dia.isoformat(), self.dia.strftime("%G-W%V")):
+            with self.subTest(semana=semana):
+                self.assertEqual(self.ids(week=semana), dentro)
+
+    def test_mes_semiabierto(self):
+        desde, hasta = fechas.rango_mes(2024, 12)
+        self.assertEqual(timezone.localtime(desde).date(), date(2024, 12, 1))
+        self.assertEqual(timezone.localtime(hasta).date(), date(2025, 1, 1))
+        self.assertEqual(
+            timezone.localtime(fechas.rango_mes(2024, 2)[1]).date(), date(2024, 3, 1)
+        )
+
+    def test_detalle_ignora_el_rango(self):
+        # El turno cae fuera del día pedido: ?date= solo filtra listados.
+        turno = self.bordes["siguiente"]
+        url = f"/api/turnos/{turno.pk}/?date={self.dia.isoformat()}"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        respuesta = self.client.patch(
+            url, {"estado": Turno.Estados.EN_ESPERA}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        turno.refresh_from_db()
+        self.assertEqual(turno.estado, Turno.Estados.EN_ESPERA)
+
+    def test_lote_usa_el_rango(self):
+        respuesta = self.client.post(
+            f"/api/turnos/bulk-delete/?date={self.dia.isoformat()}", {}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            set(Turno.objects.values_list("pk", flat=True)),
+            self.esperados("siguiente", "anterior"),
+        )
+
+
+class SedeHeaderTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+
+    def test_por_codigo_o_id(self):
+        for valor in ("principal", str(self.sede.pk)):
+            with self.subTest(valor=valor):
+                respuesta = self.client.get("/api/pacientes/", HTTP_X_SEDE=valor)
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_inexistente(self):
+        for valor in ("otra", "999999", "²", "٣", "1²", "99999999999999999999"):
+            with self.subTest(valor=valor):
+                respuesta = self.client.get("/api/pacientes/", HTTP_X_SEDE=valor)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {"detail": "Sede inexistente."})
+
+
+class ReplicaMiddlewareTests(TestCase):
+    async def test_asgi(self):
+        # Por ASGI, request y response corren en contextos distintos.
+        respuesta = await self.async_client.get("/api/pacientes/")
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertIsNone(replicas._lecturas.get())
+
+
+class AislamientoSedesTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.norte = Sede.objects.create(nombre="Norte", codigo="norte")
+        self.ajeno = Paciente.objects.create(
+            nombre_completo="Carla Díaz", dni="30555666", sede=self.norte
+        )
+        self.client.force_authenticate(self.profesional)
+
+    def crear(self, url, datos, **kwargs):
+        respuesta = self.client.post(url, datos, **kwargs)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("paciente", respuesta.data)
+
+    def test_paciente_de_otra_sede(self):
+        inicio = _en(1, 10)
+        self.crear(
+            "/api/turnos/",
+            {
+                "paciente": self.ajeno.pk,
+                "consultorio": self.consultorio.pk,
+                "inicio": inicio.isoformat(),
+                "fin": (inicio + timedelta(hours=1)).isoformat(),
+                "estado": Turno.Estados.CONFIRMADO,
+            },
+            format="json",
+        )
+        self.crear(
+            "/api/evoluciones/",
+            {"paciente": self.ajeno.pk, "texto": "Nota."},
+            format="json",
+        )
+        self.crear(
+            "/api/informes/",
+            {"paciente": self.ajeno.pk, "titulo": "Informe", "contenido_html": "<p>x</p>"},
+            format="json",
+        )
+        self.crear(
+            "/api/documentos/",
+            {
+                "paciente": self.ajeno.pk,
+                "nombre": "estudio.txt",
+                "archivo": SimpleUploadedFile("estudio.txt", b"hola"),
+            },
+            format="multipart",
+        )
+        self.assertFalse(Turno.all_objects.exists())
+        self.assertFalse(Evolucion.all_objects.exists())
+        self.assertFalse(Informe.all_objects.exists())
+        self.assertFalse(Documento.all_objects.exists())
+
+    def test_misma_sede(self):
+        respuesta = self.client.post(
+            "/api/evoluciones/", {"paciente": self.paciente.pk, "texto": "Nota."}
+        )
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_turno_con_consultorio_de_otra_sede(self):
+        # La dueña ve las dos sedes, pero paciente y consultorio deben coincidir.
+        self.client.force_authenticate(self.duena)
+        turno = self.turno()
+        respuesta = self.client.patch(
+            f"/api/turnos/{turno.pk}/", {"paciente": self.ajeno.pk}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("paciente", respuesta.data)
+        turno.refresh_from_db()
+        self.assertEqual(turno.paciente, self.paciente)
+
+
+class CorreoTests(TestCase):
+    def test_envia_y_marca(self):
+        correo.encolar("Hola", "Cuerpo", ["a@lazos.test"])
+        self.assertEqual(correo.procesar_lote(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        enviado = CorreoSaliente.objects.get()
+        self.assertEqual(enviado.estado, CorreoSaliente.Estados.ENVIADO)
+        self.assertEqual(enviado.intentos, 1)
+        self.assertEqual(correo.procesar_lote(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_envia_con_la_fila_reservada(self):
+        # El SMTP corre después de confirmar la reserva, sin locks tomados.
+        correo.encolar("Hola", "Cuerpo", ["a@lazos.test"])
+        estados = []
+
+        def enviar(conexion, mensajes):
+            estados.append(CorreoSaliente.objects.get().estado)
+            return len(mensajes)
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages", enviar
+        ):
+            correo.procesar_lote()
+        self.assertEqual(estados, [CorreoSaliente.Estados.ENVIANDO])
+
+    def test_reintento_y_fallido(self):
+        correo.encolar("Hola", "Cuerpo", ["a@lazos.test"])
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=OSError("smtp caído"),
+        ):
+            self.assertEqual(correo.procesar_lote(), (0, 1))
+            pendiente = CorreoSaliente.objects.get()
+            self.assertEqual(pendiente.estado, CorreoSaliente.Estados.PENDIENTE)
+            self.assertEqual(pendiente.intentos, 1)
+            self.assertGreater(pendiente.proximo_intento, timezone.now())
+            self.assertEqual(correo.procesar_lote(), (0, 0))
+
+            CorreoSaliente.objects.update(
+                intentos=correo.MAX_INTENTOS - 1, proximo_intento=timezone.now()
+            )
+            self.assertEqual(correo.procesar_lote(), (0, 1))
+        self.assertEqual(
+            CorreoSaliente.objects.get().estado, CorreoSaliente.Estados.FALLIDO
+        )
+
+    def test_reserva_vencida(self):
+        # Un worker que se cayó a mitad del lote deja emails ENVIANDO.
+        correo.encolar("Hola", "Cuerpo", ["a@lazos.test"])
+        CorreoSaliente.objects.update(
+            estado=CorreoSaliente.Estados.ENVIANDO,
+            proximo_intento=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(correo.procesar_lote(), (0, 0))
+        CorreoSaliente.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(correo.procesar_lote(), (1, 0))
+
+
+class RecordatoriosTests(DatosMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.paciente.email = "ana@lazos.test"
+        self.paciente.save()
+        self.turno()
+
+    def recordar(self):
+        salida = StringIO()
+        call_command("enviar_recordatorios", fecha=_en(1).date().isoformat(), stdout=salida)
+        return salida.getvalue()
+
+    def test_repetir_no_duplica(self):
+        self.assertIn("recordatorios nuevos: 1", self.recordar())
+        self.assertIn("recordatorios nuevos: 0", self.recordar())
+        self.assertEqual(CorreoSaliente.objects.count(), 1)
+
+    def test_agrega_solo_los_nuevos(self):
+        self.recordar()
+        self.turno(hora=11)
+        self.assertIn("recordatorios nuevos: 1", self.recordar())
+        self.assertEqual(CorreoSaliente.objects.count(), 2)
+
+    def test_cuenta_lo_insertado(self):
+        def mensaje(clave):
+            return CorreoSaliente(
+                clave=clave, destinatarios=["a@lazos.test"], asunto="A", cuerpo="B"
+            )
+
+        # La clave repetida dentro de la tanda la descarta ignore_conflicts.
+        tanda = [mensaje("a"), mensaje("a"), mensaje("b"), mensaje(None)]
+        self.assertEqual(correo.encolar_lote(tanda), 3)
+        self.assertEqual(correo.encolar_lote([mensaje("a"), mensaje("c")]), 1)
+        self.assertEqual(CorreoSaliente.objects.count(), 4)
+
+
+class _FuturoEnProceso:
+    def __init__(self, pool, funcion, args):
+        self.pool = pool
+        self.generacion = pool.generacion
+        self.funcion = funcion
+        self.args = args
+
+    def result(self):
+        if self.generacion in self.pool.rotas:
+            raise BrokenProcessPool("Un proceso del pool murió.")
+        return self.funcion(*self.args)
+
+
+class PoolEnProceso:
+    """
+    Reemplaza al pool de procesos: extrae en este proceso (con el
+    MEDIA_ROOT del test). Un pk de `caer` rompe el pool entero, como un
+    proceso que muere.
+    """
+
+    def __init__(self, caer=()):
+        self.caer = set(caer)
+        self.generacion = 0
+        self.rotas = set()
+
+    def submit(self, funcion, pk, nombre):
+        if pk in self.caer:
+            self.rotas.add(self.generacion)
+        return _FuturoEnProceso(self, funcion, (pk, nombre))
+
+    def reiniciar(self):
+        self.generacion += 1
+
+
+class DocumentoMetadatosTests(DatosMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def documento(self, nombre="nota.txt", contenido=b"hola"):
+        return Documento.objects.create(
+            paciente=self.paciente,
+            nombre=nombre,
+            archivo=SimpleUploadedFile(nombre, contenido),
+        )
+
+    def test_tipo_mime(self):
+        casos = [
+            ("a.jpg", b"%PDF-1.7\n", "application/pdf"),
+            ("a", b"\x89PNG\r\n\x1a\n\x00", "image/png"),
+            ("a", b"\xff\xd8\xff\xe0", "image/jpeg"),
+            ("a", b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+            ("informe.docx", b"PK\x03\x04", mimetypes.guess_type("a.docx")[0]),
+            ("notas.txt", b"hola", "text/plain"),
+            ("sin_extension", b"\x00\x01", "application/octet-stream"),
+        ]
+        for nombre, cabecera, esperado in casos:
+            with self.subTest(nombre=nombre, cabecera=cabecera):
+                self.assertEqual(metadatos.tipo_mime(nombre, cabecera), esperado)
+
+    def test_extraer(self):
+        texto = self.documento()
+        datos = metadatos.extraer(texto.pk, texto.archivo.name)
+        self.assertEqual(
+            datos,
+            {
+                "tamano": 4,
+                "tipo_mime": "text/plain",
+                "checksum": hashlib.sha256(b"hola").hexdigest(),
+                "paginas": None,
+                "miniatura": "",
+            },
+        )
+        pdf = self.documento(
+            "estudio.pdf",
+            b"%PDF-1.4\n1 0 obj << /Type /Pages /Kids [2 0 R 3 0 R] >> endobj\n"
+            b"2 0 obj << /Type /Page >> endobj\n3 0 obj << /Type/Page >> endobj\n",
+        )
+        datos = metadatos.extraer(pdf.pk, pdf.archivo.name)
+        self.assertEqual(datos["tipo_mime"], "application/pdf")
+        self.assertEqual(datos["paginas"], 2)
+
+    def test_reemplazar_archivo_vuelve_a_la_cola(self):
+        documento = self.documento()
+        metadatos.procesar_lote(PoolEnProceso())
+        documento.refresh_from_db()
+        self.assertEqual(documento.metadatos_estado, Documento.EstadosMetadatos.LISTO)
+        anterior = documento.archivo.name
+
+        documento.archivo = SimpleUploadedFile("otra.txt", b"chau!")
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.save()
+        documento.refresh_from_db()
+        self.assertEqual(documento.metadatos_estado, Documento.EstadosMetadatos.PENDIENTE)
+        self.assertEqual((documento.tamano, documento.checksum), (None, ""))
+        self.assertFalse(default_storage.exists(anterior))
+
+    def test_procesar_lote(self):
+        documento = self.documento()
+        self.assertEqual(metadatos.procesar_lote(PoolEnProceso()), (1, 0))
+        documento.refresh_from_db()
+        self.assertEqual(documento.metadatos_estado, Documento.EstadosMetadatos.LISTO)
+        self.assertEqual(documento.tamano, 4)
+        self.assertEqual(metadatos.procesar_lote(PoolEnProceso()), (0, 0))
+
+    def test_reserva(self):
+        # Reservado por otro worker: no se toma hasta que la reserva vence.
+        self.documento()
+        Documento.all_objects.update(
+            metadatos_estado=Documento.EstadosMetadatos.PROCESANDO,
+            metadatos_reserva=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(metadatos.procesar_lote(PoolEnProceso()), (0, 0))
+        Documento.all_objects.update(metadatos_reserva=timezone.now())
+        self.assertEqual(metadatos.procesar_lote(PoolEnProceso()), (1, 0))
+
+    def test_reemplazado_durante_la_extraccion(self):
+        documento = self.documento()
+        extraer = metadatos.extraer
+
+        def extraer_y_reemplazar(pk, nombre):
+            datos = extraer(pk, nombre)
+            otro = Documento.objects.get(pk=pk)
+            otro.archivo = SimpleUploadedFile("otra.txt", b"chau!")
+            otro.save()
+            return datos
+
+        with mock.patch.object(metadatos, "extraer", extraer_y_reemplazar):
+            metadatos.procesar_lote(PoolEnProceso())
+        documento.refresh_from_db()
+        self.assertEqual(documento.metadatos_estado, Documento.EstadosMetadatos.PENDIENTE)
+        self.assertIsNone(documento.tamano)
+
+    def test_proceso_caido(self):
+        # Solo el archivo que tira el proceso termina con error.
+        malo = self.documento("malo.txt")
+        bueno = self.documento("bueno.txt")
+        pool = PoolEnProceso(caer=[malo.pk])
+        self.assertEqual(metadatos.procesar_lote(pool), (1, 1))
+        malo.refresh_from_db()
+        bueno.refresh_from_db()
+        self.assertEqual(malo.metadatos_estado, Documento.EstadosMetadatos.ERROR)
+        self.assertEqual(bueno.metadatos_estado, Documento.EstadosMetadatos.LISTO)
+
+        # El pool quedó utilizable para el lote siguiente.
+        otro = self.documento("otro.txt")
+        self.assertEqual(metadatos.procesar_lote(pool), (1, 0))
+        otro.refresh_from_db()
+        self.assertEqual(otro.metadatos_estado, Documento.EstadosMetadatos.LISTO)
+
+
+class ArchivosDocumentosTests(DatosMixin, TestCase):
+    """
+    limpiar_documentos y reubicar_documentos sobre un MEDIA_ROOT temporal.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def escribir(self, nombre, horas=48):
+        """
+        Crea el archivo con fecha de modificación de hace `horas` horas.
+        """
+        ruta = default_storage.path(nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "wb") as archivo:
+            archivo.write(b"contenido")
+        antes = (timezone.now() - timedelta(hours=horas)).timestamp()
+        os.utime(ruta, (antes, antes))
+        return nombre
+
+    def documento(self, nombre, **kwargs):
+        return Documento.objects.create(
+            paciente=self.paciente, nombre="Estudio", archivo=self.escribir(nombre), **kwargs
+        )
+
+    def limpiar(self, *args):
+        salida = StringIO()
+        call_command("limpiar_documentos", *args, stdout=salida)
+        return salida.getvalue()
+
+    def reubicar(self):
+        salida = StringIO()
+        call_command("reubicar_documentos", stdout=salida, stderr=StringIO())
+        return salida.getvalue()
+
+    def test_huerfanos(self):
+        referenciado = self.documento("documentos/aa/bb/estudio.pdf").archivo.name
+        viejo = self.escribir("documentos/cc/dd/viejo.pdf")
+        reciente = self.escribir("documentos/cc/dd/reciente.pdf", horas=1)
+        miniatura = self.escribir("miniaturas/ee/ff/9.jpg")
+
+        self.assertIn("0 de documentos eliminados, 2 huérfanos", self.limpiar())
+        self.assertTrue(default_storage.exists(viejo))
+
+        self.limpiar("--aplicar")
+        self.assertFalse(default_storage.exists(viejo))
+        self.assertFalse(default_storage.exists(miniatura))
+        self.assertTrue(default_storage.exists(reciente))
+        self.assertTrue(default_storage.exists(referenciado))
+
+        self.assertIn(" 1 huérfanos", self.limpiar("--aplicar", "--gracia", "0"))
+        self.assertFalse(default_storage.exists(reciente))
+
+    def test_huerfanos_a_cuarentena(self):
+        viejo = self.escribir("documentos/cc/dd/viejo.pdf")
+        self.assertIn("Puestos en cuarentena", self.limpiar("--aplicar", "--cuarentena"))
+        self.assertFalse(default_storage.exists(viejo))
+        self.assertTrue(default_storage.exists(f"{archivos.CUARENTENA}/{viejo}"))
+        # La cuarentena está fuera de documentos/: no se vuelve a recorrer.
+        self.assertIn("0 huérfanos", self.limpiar("--aplicar"))
+
+    def test_vencidos(self):
+        vencido = self.documento("documentos/aa/bb/vencido.pdf")
+        reciente = self.documento("documentos/aa/bb/reciente.pdf")
+        vivo = self.documento("documentos/aa/bb/vivo.pdf")
+        Documento.objects.filter(pk__in=[vencido.pk, reciente.pk]).soft_delete()
+        Documento.all_objects.filter(pk=vencido.pk).update(
+            deleted_at=timezone.now() - timedelta(days=archivos.RETENCION_DIAS + 1)
+        )
+
+        self.assertIn(
+            "Borrados: 1 de documentos eliminados, 0 huérfanos", self.limpiar("--aplicar")
+        )
+        self.assertEqual(
+            set(Documento.all_objects.values_list("pk", flat=True)), {reciente.pk, vivo.pk}
+        )
+        self.assertFalse(default_storage.exists(vencido.archivo.name))
+        self.assertTrue(default_storage.exists(reciente.archivo.name))
+        purga = AuditLog.objects.get(metadata__purga=True)
+        self.assertEqual(purga.metadata["ids"], [vencido.pk])
+
+        self.assertIn("Borrados: 1", self.limpiar("--aplicar", "--retencion", "0"))
+        self.assertFalse(Documento.all_objects.filter(pk=reciente.pk).exists())
+
+    def test_reubicar_tras_una_interrupcion(self):
+        movido = self.documento("documentos/movido.pdf")
+        pendiente = self.documento("documentos/pendiente.pdf")
+        perdido = Documento.objects.create(
+            paciente=self.paciente, nombre="Perdido", archivo="documentos/perdido.pdf"
+        )
+        # Una corrida anterior movió este archivo y se cortó antes del UPDATE.
+        archivos.mover(movido.archivo.name, archivos.destino(movido.archivo.name))
+
+        self.assertIn("Movidos: 2. Faltantes: 1.", self.reubicar())
+        for documento in (movido, pendiente):
+            nombre = documento.archivo.name
+            documento.refresh_from_db()
+            self.assertEqual(documento.archivo.name, archivos.destino(nombre))
+            self.assertTrue(default_storage.exists(documento.archivo.name))
+            self.assertFalse(default_storage.exists(nombre))
+        perdido.refresh_from_db()
+        self.assertEqual(perdido.archivo.name, "documentos/perdido.pdf")
+
+        self.assertIn("Movidos: 0. Faltantes: 1.", self.reubicar())
+        # Lo ya reubicado no es huérfano.
+        self.assertIn("0 huérfanos", self.limpiar("--gracia", "0"))
+
+
+class BatchTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+
+    def lote(self, pedidos, parallel=False):
+        respuesta = self.client.post(
+            "/api/batch/", {"requests": pedidos, "parallel": parallel}, format="json"
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data["responses"]
+
+    def test_en_orden(self):
+        respuestas = self.lote(
+            [
+                {"method": "GET", "path": f"/api/pacientes/{self.paciente.pk}/"},
+                {
+                    "method": "POST",
+                    "path": "/api/pacientes/",
+                    "body": {"nombre_completo": "Beto Gómez", "dni": "30999888"},
+                },
+                {"method": "GET", "path": "/api/pacientes/?q=Beto"},
+                {"method": "GET", "path": "/api/no-existe/"},
+                {"method": "POST", "path": "/api/batch/", "body": {}},
+            ]
+        )
+        self.assertEqual([r["status"] for r in respuestas], [200, 201, 200, 404, 400])
+        self.assertEqual(respuestas[0]["body"]["dni"], "30111222")
+        self.assertIn("30999888", [p["dni"] for p in respuestas[2]["body"]])
+
+
+    def test_error_en_un_subpedido(self):
+        # La escritura que falla no queda a medias y el resto del lote sigue.
+        with mock.patch.object(views, "log_action", side_effect=RuntimeError("falla")):
+            with self.assertLogs("core.views", "ERROR"):
+                respuestas = self.lote(
+                    [
+                        {
+                            "method": "POST",
+                            "path": "/api/pacientes/",
+                            "body": {"nombre_completo": "Beto Gómez", "dni": "30999888"},
+                        },
+                        {"method": "GET", "path": f"/api/pacientes/{self.paciente.pk}/"},
+                    ]
+                )
+        self.assertEqual([r["status"] for r in respuestas], [500, 200])
+        self.assertFalse(Paciente.all_objects.filter(dni="30999888").exists())
+
+
+class BatchParaleloTests(DatosMixin, APITransactionTestCase):
+    # Los hilos usan sus propias conexiones: los datos tienen que estar
+    # confirmados.
+    serialized_rollback = True
+
+    def test_paralelo(self):
+        # Los GET consecutivos corren en hilos y vuelven en el orden pedido.
+        self.client.force_authenticate(self.duena)
+        pedidos = [
+            {"method": "GET", "path": f"/api/pacientes/{self.paciente.pk}/"},
+            {"method": "GET", "path": "/api/pacientes/0/"},
+            {"method": "GET", "path": f"/api/consultorios/{self.consultorio.pk}/"},
+        ]
+        with mock.patch("core.views.ThreadPoolExecutor", wraps=views.ThreadPoolExecutor) as pool:
+            respuesta = self.client.post(
+                "/api/batch/", {"requests": pedidos, "parallel": True}, format="json"
+            )
+        pool.assert_called_once()
+        respuestas = respuesta.data["responses"]
+        self.assertEqual([r["status"] for r in respuestas], [200, 404, 200])
+        self.assertEqual(respuestas[2]["body"]["numero"], 1)
+
+
+class CompresionTests(TestCase):
+    compresores = [("zstd", bytes.upper), ("br", bytes.upper), ("gzip", bytes.upper)]
+
+    def elegido(self, accept_encoding):
+        with mock.patch.object(middleware, "COMPRESORES", self.compresores):
+            compresor = middleware.elegir(accept_encoding)
+        return compresor and compresor[0]
+
+    def test_negociacion(self):
+        casos = [
+            ("zstd;q=0, *", "br"),
+            ("*, zstd;q=0, br;q=0", "gzip"),
+            ("gzip, br", "br"),
+            ("gzip;q=1, br;q=0.5", "gzip"),
+            ("GZIP", "gzip"),
+            ("*", "zstd"),
+            ("*;q=0", None),
+            ("gzip;q=0", None),
+            ("gzip;q=0.5.1", None),
+            ("identity", None),
+            ("", None),
+        ]
+        for accept_encoding, esperado in casos:
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(self.elegido(accept_encoding), esperado)
+
+    def respuesta(self, path):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING="gzip")
+        cuerpo = JsonResponse({"datos": "x" * 4096})
+        return middleware.CompresionMiddleware(lambda r: cuerpo)(request)
+
+    def test_comprime(self):
+        respuesta = self.respuesta("/api/pacientes/")
+        self.assertEqual(respuesta["Content-Encoding"], "gzip")
+        self.assertIn(b"x" * 4096, gzip.decompress(respuesta.content))
+
+    def test_rutas_con_secretos(self):
+        for path in ("/api/auth/token/", "/api/auth/login/", "/api/agenda-tokens/"):
+            with self.subTest(path=path):
+                self.assertFalse(self.respuesta(path).has_header("Content-Encoding"))
+
+
+class AgendaStreamTests(DatosMixin, APITestCase):
+    def abrir(self, **params):
+        async def primer_bloque():
+            respuesta = await views.agenda_stream(
+                AsyncRequestFactory().get("/api/turnos/stream/", params)
+            )
+            if respuesta.status_code == 200:
+                contenido = respuesta.streaming_content.__aiter__()
+                respuesta.primero = await contenido.__anext__()
+                await contenido.aclose()
+            return respuesta
+
+        return async_to_sync(primer_bloque)()
+
+    def ticket(self):
+        self.client.force_authenticate(self.profesional)
+        respuesta = self.client.post("/api/turnos/stream/ticket/")
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data["ticket"]
+
+    def test_wsgi_no_sirve_el_stream(self):
+        respuesta = self.client.get("/api/turnos/stream/")
+        self.assertEqual(respuesta.status_code, 501)
+        self.assertFalse(respuesta.streaming)
+
+    async def test_asgi(self):
+        respuesta = await self.async_client.get("/api/turnos/stream/")
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_ticket_de_un_solo_uso(self):
+        ticket = self.ticket()
+        respuesta = self.abrir(ticket=ticket)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("retry", str(respuesta.primero))
+        self.assertEqual(self.abrir(ticket=ticket).status_code, 401)
+
+    def test_access_token_en_la_url(self):
+        access = str(AccessToken.for_user(self.profesional))
+        self.assertEqual(self.abrir(token=access).status_code, 401)
+        self.assertEqual(self.abrir(ticket=access).status_code, 401)
+
+    def test_ticket_no_sirve_para_la_api(self):
+        ticket = self.ticket()
+        self.client.force_authenticate(None)
+        respuesta = self.client.get(
+            "/api/pacientes/", HTTP_AUTHORIZATION=f"Bearer {ticket}"
+        )
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_turno_movido_llega_al_anterior(self):
+        otro = User.objects.create_user("otro@lazos.test", "clave", is_enabled=True)
+        turno = self.turno()
+        anterior = realtime.Suscripcion(None, {"profesional": self.profesional.pk})
+        nuevo = realtime.Suscripcion(None, {"profesional": otro.pk})
+        with mock.patch("core.realtime._publicar") as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                turno.profesional = otro
+                turno.save()
+        (evento,) = publicar.call_args.args[0]
+        self.assertEqual(evento["anterior"]["profesional"], self.profesional.pk)
+        self.assertTrue(anterior.acepta(evento))
+        self.assertTrue(nuevo.acepta(evento))
+
+    def test_turno_sin_mover(self):
+        turno = self.turno()
+        with mock.patch("core.realtime._publicar") as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                turno.estado = Turno.Estados.EN_ESPERA
+                turno.save()
+        (evento,) = publicar.call_args.args[0]
+        self.assertNotIn("anterior", evento)
+
+
+class OcupacionDiariaTests(DatosMixin, TestCase):
+    def resumen(self):
+        return list(
+            OcupacionDiaria.objects.filter(turnos__gt=0)
+            .order_by("fecha", "estado")
+            .values_list("fecha", "estado", "turnos", "minutos")
+        )
+
+    def test_baja_y_restauracion(self):
+        turno = self.turno()
+        self.turno(hora=11)
+        completo = self.resumen()
+        self.assertEqual(completo, [(_en(1).date(), "CONFIRMADO", 2, 120)])
+
+        turno.soft_delete()
+        self.assertEqual(self.resumen(), [(_en(1).date(), "CONFIRMADO", 1, 60)])
+        turno.restore()
+        self.assertEqual(self.resumen(), completo)
+
+    def test_restauracion_en_cascada(self):
+        self.turno()
+        self.turno(dias=2)
+        completo = self.resumen()
+
+        self.paciente.soft_delete()
+        self.assertEqual(self.resumen(), [])
+        self.paciente.restore()
+        self.assertEqual(self.resumen(), completo)
+
+    def test_edicion_con_instancias_viejas(self):
+        # Cada edición descuenta el estado guardado, no el de la instancia.
+        turno = self.turno()
+        otra = Turno.objects.get(pk=turno.pk)
+        turno.inicio, turno.fin = _en(2), _en(2) + timedelta(hours=1)
+        turno.save()
+        otra.estado = Turno.Estados.EN_ESPERA
+        otra.save()
+        self.assertEqual(self.resumen(), [(_en(1).date(), "EN_ESPERA", 1, 60)])
+
+    @skipUnless(connection.vendor == "postgresql", "SELECT ... FOR UPDATE.")
+    def test_edicion_bloquea_el_turno(self):
+        turno = self.turno()
+        turno.estado = Turno.Estados.EN_ESPERA
+        with CaptureQueriesContext(connection) as consultas:
+            turno.save()
+        sql = [c["sql"] for c in consultas.captured_queries if "core_turno" in c["sql"]]
+        self.assertIn("FOR UPDATE", sql[0])
+
+    def test_coincide_con_reconstruir(self):
+        turno = self.turno()
+        self.turno(dias=2, estado=Turno.Estados.EN_ESPERA)
+        Turno.objects.filter(pk=turno.pk).cambiar_estado(Turno.Estados.FINALIZADO)
+        self.paciente.soft_delete()
+        self.paciente.restore()
+        incremental = self.resumen()
+
+        OcupacionDiaria.reconstruir()
+        self.assertEqual(self.resumen(), incremental)
+
+
+class OcupacionTests(DatosMixin, APITestCase):
+    """
+    Capacidad de una semana hábil: 5 días de 600 minutos por consultorio.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        Consultorio.objects.create(nombre="Consultorio 2", numero=2, sede=self.sede)
+        self.otro = User.objects.create_user("otro@lazos.test", "clave", is_enabled=True)
+        hoy = timezone.localdate()
+        self.lunes = hoy + timedelta(days=14 - hoy.weekday())
+        dias = (self.lunes - hoy).days
+        self.turno(dias=dias)
+        self.turno(dias=dias, hora=11, profesional=self.otro)
+        desde, hasta = fechas.rango_semana(self.lunes)
+        self.rango = {"start": desde.isoformat(), "end": hasta.isoformat()}
+        self.fechas = {
+            "desde": self.lunes.isoformat(),
+            "hasta": (self.lunes + timedelta(days=6)).isoformat(),
+        }
+
+    def pedir(self, url, **params):
+        respuesta = self.client.get(url, params)
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        return respuesta.data
+
+    def test_resumen_por_profesional(self):
+        datos = self.pedir("/api/turnos/resumen/", group_by="profesional", **self.rango)
+        # 60 de 3000 minutos: un profesional no usa los dos consultorios.
+        self.assertEqual([fila["ocupacion"] for fila in datos["resultados"]], [2.0, 2.0])
+        self.assertEqual(datos["totales"]["ocupacion"], 2.0)
+
+        datos = self.pedir("/api/turnos/resumen/", profesional=self.otro.pk, **self.rango)
+        self.assertEqual(datos["totales"]["ocupacion"], 2.0)
+
+    def test_resumen_por_estado(self):
+        datos = self.pedir("/api/turnos/resumen/", **self.rango)
+        self.assertEqual(datos["resultados"][0]["ocupacion"], 2.0)
+
+    def test_ocupacion_por_profesional(self):
+        datos = self.pedir("/api/ocupacion/", group_by="profesional", **self.fechas)
+        self.assertEqual([fila["ocupacion"] for fila in datos["resultados"]], [2.0, 2.0])
+        self.assertEqual(datos["totales"]["ocupacion"], 2.0)
+
+        datos = self.pedir("/api/ocupacion/", profesional=self.otro.pk, **self.fechas)
+        self.assertEqual(datos["totales"]["ocupacion"], 2.0)
+
+    def test_ocupacion_de_un_profesional(self):
+        self.client.force_authenticate(self.profesional)
+        datos = self.pedir("/api/ocupacion/", **self.fechas)
+        self.assertEqual(datos["totales"]["turnos"], 1)
+        self.assertEqual(datos["totales"]["ocupacion"], 2.0)
+
+    def test_ocupacion_filtros_invalidos(self):
+        for params in ({"profesional": "abc"}, {"consultorio": "1.5"}):
+            with self.subTest(params=params):
+                respuesta = self.client.get("/api/ocupacion/", params)
+                self.assertEqual(respuesta.status_code, 400)
+
+
+class AgendaIcsTests(DatosMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.turno()
+        AgendaToken.objects.create(token="feed-profesional", profesional=self.profesional)
+        self.url = "/api/agenda/feed-profesional.ics"
+
+    def pedir(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        respuesta = self.client.get(self.url, **headers)
+        if respuesta.streaming:
+            respuesta.contenido = b"".join(respuesta.streaming_content).decode()
+        return respuesta
+
+    def test_sin_cambios_304(self):
+        respuesta = self.pedir()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("SUMMARY:Ana Pérez", respuesta.contenido)
+        self.assertEqual(self.pedir(respuesta["ETag"]).status_code, 304)
+
+    def test_renombrar_paciente_o_consultorio(self):
+        etag = self.pedir()["ETag"]
+        self.paciente.nombre_completo = "Ana María Pérez"
+        self.paciente.save()
+        respuesta = self.pedir(etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("SUMMARY:Ana María Pérez", respuesta.contenido)
+
+        etag = respuesta["ETag"]
+        Consultorio.objects.filter(pk=self.consultorio.pk).update(nombre="Sala azul")
+        respuesta = self.pedir(etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("LOCATION:Sala azul (1)", respuesta.contenido)
+
+    def test_renombrar_profesional(self):
+        etag = self.pedir()["ETag"]
+        self.profesional.first_name = "Laura"
+        self.profesional.save()
+        respuesta = self.pedir(etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("X-WR-CALNAME:Lazos - Laura", respuesta.contenido)
+
+
+class CambiosTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        Paciente.objects.bulk_create(
+            Paciente(nombre_completo=f"Paciente {i}", dni=f"4000000{i}", sede=self.sede)
+            for i in range(5)
+        )
+        # Una sola transacción grande: todas las filas con la misma versión.
+        Paciente.objects.all().soft_delete(self.duena)
+
+    def recorrer(self):
+        cursor, paginas, vistos = "", [], []
+        while True:
+            respuesta = self.client.get("/api/changes/", {"since": cursor})
+            self.assertEqual(respuesta.status_code, 200)
+            filas = [
+                (clave, pk)
+                for clave in ("consultorios", "pacientes")
+                for pk in respuesta.data[clave]["eliminados"]
+                + [fila["id"] for fila in respuesta.data[clave]["actualizados"]]
+            ]
+            paginas.append(len(filas))
+            vistos.extend(filas)
+            cursor = respuesta.data["cursor"]
+            if not respuesta.data["more"]:
+                return paginas, vistos, cursor
+
+    def test_pagina_dentro_de_una_version(self):
+        with mock.patch.object(views, "CAMBIOS_LIMITE", 2):
+            paginas, vistos, cursor = self.recorrer()
+
+        self.assertTrue(all(cantidad <= 2 for cantidad in paginas))
+        esperados = [("consultorios", self.consultorio.pk)] + [
+            ("pacientes", pk) for pk in Paciente.all_objects.values_list("pk", flat=True)
+        ]
+        self.assertEqual(sorted(vistos), sorted(esperados))
+
+        respuesta = self.client.get("/api/changes/", {"since": cursor})
+        self.assertEqual(respuesta.data["pacientes"]["eliminados"], [])
+        self.assertFalse(respuesta.data["more"])
+
+    def test_sin_limite_una_sola_pagina(self):
+        paginas, vistos, _cursor = self.recorrer()
+        self.assertEqual(paginas, [7])
+
+    def test_cursor_invalido(self):
+        for cursor in ("abc", "1:inexistente:3", "1:pacientes:x"):
+            with self.subTest(cursor=cursor):
+                respuesta = self.client.get("/api/changes/", {"since": cursor})
+                self.assertEqual(respuesta.status_code, 400)
+
+
+class BusquedaTests(DatosMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        self.informe = Informe.objects.create(
+            paciente=self.paciente,
+            profesional=self.profesional,
+            titulo="Control trimestral",
+            contenido_html="<p>Ansiedad &amp; insomnio.</p><p>Sin medicación.</p>",
+        )
+
+    def test_texto_plano(self):
+        self.assertEqual(
+            busqueda.texto_plano("<p>Ansiedad &amp;\n<b>insomnio</b> &lt;leve&gt;</p>"),
+            "Ansiedad & insomnio <leve>",
+        )
+        bloques = "<p>uno</p><p>dos<br>tres</p><ul><li>cua<i>tro</i></li></ul>"
+        self.assertEqual(busqueda.texto_plano(bloques), "uno dos tres cuatro")
+
+    def fragmento(self, consulta):
+        respuesta = self.client.get("/api/busqueda/", {"q": consulta, "tipo": "informes"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data["resultados"]), 1)
+        return respuesta.data["resultados"][0]["fragmento"]
+
+    @skipUnless(connection.vendor == "postgresql", "Búsqueda de texto completo.")
+    def test_fragmento_sin_entidades(self):
+        self.assertEqual(
+            self.informe.texto_busqueda,
+            "Control trimestral\nAnsiedad & insomnio. Sin medicación.",
+        )
+        fragmento = self.fragmento("insomnio")
+        self.assertIn("Ansiedad &amp; <mark>insomnio</mark>", fragmento)
+        self.assertNotIn("&amp;amp;", fragmento)
+
+    @skipUnless(connection.vendor == "postgresql", "Búsqueda de texto completo.")
+    def test_fragmento_con_titulo(self):
+        self.assertIn("<mark>trimestral</mark>", self.fragmento("trimestral"))
+
+    @skipUnless(connection.vendor == "postgresql", "Búsqueda de texto completo.")
+    def test_editar_titulo_actualiza_texto(self):
+        self.informe.titulo = "Control anual"
+        self.informe.save(update_fields=["titulo"])
+        self.informe.refresh_from_db()
+        self.assertTrue(self.informe.texto_busqueda.startswith("Control anual\n"))
+        self.assertIn("<mark>anual</mark>", self.fragmento("anual"))
+
+    @skipUnless(connection.vendor == "postgresql", "Búsqueda de texto completo.")
+    def test_reconstruir_por_lotes(self):
+        for numero in range(3):
+            Informe.objects.create(
+                paciente=self.paciente,
+                profesional=self.profesional,
+                titulo=f"Informe {numero}",
+                contenido_html="<p>Sueño &amp; alimentación.</p>",
+            )
+        Informe.all_objects.update(busqueda=None, texto_busqueda="", version=F("version"))
+        versiones = dict(Informe.all_objects.values_list("pk", "version"))
+
+        with CaptureQueriesContext(connection) as consultas:
+            call_command("reconstruir_busqueda", lote=10, stdout=StringIO())
+        informes = [c for c in consultas.captured_queries if "core_informe" in c["sql"]]
+        # Ids, filas, bulk_update y tsvector del único lote, y el ids vacío.
+        self.assertEqual(len(informes), 5)
+        self.assertEqual(dict(Informe.all_objects.values_list("pk", "version")), versiones)
+        self.informe.refresh_from_db()
+        self.assertTrue(self.informe.texto_busqueda.startswith("Control trimestral\n"))
+        self.assertIn("<mark>insomnio</mark>", self.fragmento("insomnio"))
+
+
+class LecturaRapidaTests(DatosMixin, APITestCase):
+    """
+    La lectura rápida (values_list + core.lectura) debe dar exactamente
+    la misma salida que el serializer de cada listado.
+    """
+    vistas = {
+        "/api/pacientes/": views.PacienteViewSet,
+        "/api/turnos/": views.TurnoViewSet,
+        "/api/evoluciones/": views.EvolucionViewSet,
+        "/api/informes/": views.InformeViewSet,
+        "/api/audit-logs/": views.AuditLogViewSet,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.duena)
+        # Todos los campos opcionales con valor (el paciente base los deja nulos).
+        completo = Paciente.objects.create(
+            nombre_completo="Beto Gómez",
+            dni="30999888",
+            sede=self.sede,
+            fecha_nacimiento=date(1990, 2, 28),
+            email="beto@lazos.test",
+            telefono="351 555-0101",
+            obra_social="OSDE",
+            numero_afiliado="12/345",
+            diagnostico="Ansiedad & <insomnio>",
+        )
+        # Profesional sin nombre y después dado de baja, con lo suyo.
+        baja = User.objects.create_user("baja@lazos.test", "clave", is_enabled=True)
+        self.turno(profesional=baja, hora=10)
+        self.evolucion(profesional=baja)
+        Informe.objects.create(
+            paciente=self.paciente,
+            profesional=baja,
+            titulo="Informe de alta",
+            contenido_html="",
+        )
+        baja.soft_delete(self.duena)
+
+        self.profesional.first_name = "Laura"
+        self.profesional.save()
+        self.turno(paciente=completo, hora=11).soft_delete(self.duena)
+        self.evolucion(paciente=completo, texto="Línea 1\nLínea 2").soft_delete()
+        Informe.objects.create(
+            paciente=completo,
+            profesional=self.profesional,
+            titulo="Informe",
+            contenido_html="<p>Texto con ñ y “comillas”</p>",
+        )
+        AuditLog.objects.create(
+            actor=self.duena,
+            action=AuditLog.Action.DELETE,
+            target_type="core.Paciente",
+            target_id=str(completo.pk),
+            metadata={"cascade": {"core.Turno": 1}, "bulk": True},
+        )
+        AuditLog.objects.create(action=AuditLog.Action.LOGIN, target_type="core.User")
+
+    def test_lector_igual_al_serializer(self):
+        # Incluye eliminados: deleted_at y deleted_by también deben coincidir.
+        for url, vista in self.vistas.items():
+            serializer_class = vista.serializer_class
+            model = serializer_class.Meta.model
+            manager = getattr(model, "all_objects", model._default_manager)
+            queryset = manager.order_by("pk")
+            lector = lectura.lector(serializer_class)
+            with self.subTest(vista=vista.__name__):
+                self.assertGreater(queryset.count(), 1)
+                rapido = lector.filas(lector.queryset(queryset))
+                lento = serializer_class(queryset, many=True).data
+                self.assertEqual(rapido, lento)
+                self.assertEqual(
+                    OrjsonRenderer().render(rapido), OrjsonRenderer().render(lento)
+                )
+
+    def test_listados_iguales(self):
+        for url, vista in self.vistas.items():
+            with self.subTest(url=url):
+                rapido = self.client.get(url)
+                with mock.patch.object(vista, "lectura_rapida", False):
+                    lento = self.client.get(url)
+                self.assertEqual(rapido.status_code, 200)
+                self.assertEqual(rapido.content, lento.content)
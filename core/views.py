@@ -1,11 +1,45 @@
+import asyncio
+import io
+import json
+import logging
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
+from urllib.parse import urlsplit
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
 from rest_framework_simplejwt.views import TokenObtainPairView
+from asgiref.sync import sync_to_async
 from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.db import IntegrityError, connections, router, transaction
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from django.db.models import (
+    Count,
+    DateField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Prefetch,
+    ProtectedError,
+    Q,
+    Sum,
+    prefetch_related_objects,
+)
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
 from django.utils.crypto import get_random_string
 from .serializers import (
     LoginSerializer,
@@ -17,10 +51,15 @@ from .serializers import (
     EvolucionSerializer,
     DocumentoSerializer,
     InformeSerializer,
+    InformeResumenSerializer,
     InvitacionSerializer,
     ProfileSerializer,
     ChangePasswordSerializer,
     AuditLogSerializer,
+    BulkActionSerializer,
+    AgendaTokenSerializer,
+    BatchSerializer,
+    SedeSerializer,
 )
 from .models import (
     Paciente,
@@ -32,9 +71,64 @@ from .models import (
     Informe,
     Invitacion,
     AuditLog,
+    OcupacionDiaria,
+    AgendaToken,
+    Sede,
+    marca_cambios,
 )
+from . import busqueda, correo, fechas, lectura, realtime, sedes
+from .ical import calendario
+from .pagination import ConteoEstimadoPagination
 from .permissions import IsDuena, IsDuenaOrReadOnly
 
+logger = logging.getLogger(__name__)
+
+
+# Jornada de atención de cada consultorio (08:00 a 18:00, lunes a viernes).
+JORNADA_MINUTOS = 10 * 60
+
+RESUMEN_AGRUPACIONES = {
+    "estado": ["estado"],
+    "consultorio": ["consultorio", "consultorio__numero"],
+    "profesional": ["profesional", "profesional__email"],
+    "dia": ["dia"],
+    "semana": ["semana"],
+}
+
+# Ventana publicada en los feeds .ics, relativa a hoy.
+AGENDA_DIAS_ATRAS = 30
+AGENDA_DIAS_ADELANTE = 180
+
+AGENDA_CAMPOS = [
+    "id",
+    "inicio",
+    "fin",
+    "estado",
+    "actualizado_en",
+    "paciente__nombre_completo",
+    "consultorio__nombre",
+    "consultorio__numero",
+]
+
+# Colecciones del feed de cambios: (clave, modelo, serializer, select_related).
+CAMBIOS_COLECCIONES = [
+    ("consultorios", Consultorio, ConsultorioSerializer, ()),
+    ("pacientes", Paciente, PacienteSerializer, ()),
+    ("turnos", Turno, TurnoSerializer, ()),
+    ("evoluciones", Evolucion, EvolucionSerializer, ("profesional",)),
+    ("informes", Informe, InformeSerializer, ("profesional",)),
+    ("documentos", Documento, DocumentoSerializer, ()),
+]
+CAMBIOS_LIMITE = 1000
+
+OCUPACION_AGRUPACIONES = {
+    "estado": ["estado"],
+    "consultorio": ["consultorio", "consultorio__numero"],
+    "profesional": ["profesional", "profesional__email"],
+    "fecha": ["fecha"],
+    "mes": ["mes"],
+}
+
 
 def log_action(actor, action, instance, metadata=None):
     AuditLog.objects.create(
@@ -46,15 +140,149 @@ def log_action(actor, action, instance, metadata=None):
     )
 
 
+def log_actions(actor, action, model, ids, metadata=None):
+    """
+    Versión en lote de log_action: un solo INSERT para muchos registros.
+    """
+    AuditLog.objects.bulk_create(
+        [
+            AuditLog(
+                actor=actor,
+                action=action,
+                target_type=model.__name__,
+                target_id=str(pk),
+                metadata=metadata or {},
+            )
+            for pk in ids
+        ]
+    )
+
+
 def soft_delete_instance(instance, user):
-    instance.is_active = False
-    instance.deleted_at = timezone.now()
-    instance.deleted_by = user
-    instance.save(update_fields=["is_active", "deleted_at", "deleted_by"])
-    log_action(user, AuditLog.Action.DELETE, instance)
+    _total, counts = instance.soft_delete(user)
+    counts.pop(instance._meta.label, None)
+    log_action(
+        user,
+        AuditLog.Action.DELETE,
+        instance,
+        metadata={"cascade": counts} if counts else None,
+    )
+
+
+def _parse_bound(value):
+    if not value:
+        return None
+    value_dt = parse_datetime(value)
+    if value_dt is None:
+        value_date = parse_date(value)
+        if value_date is None:
+            return None
+        value_dt = datetime.combine(value_date, time.min)
+    if timezone.is_naive(value_dt):
+        value_dt = timezone.make_aware(value_dt)
+    return value_dt
+
+
+def _dias_habiles(desde, hasta):
+    """
+    Días de lunes a viernes en [desde, hasta).
+    """
+    dias = 0
+    dia = desde
+    while dia < hasta:
+        if dia.weekday() < 5:
+            dias += 1
+        dia += timezone.timedelta(days=1)
+    return dias
 
 
-class SoftDeleteModelViewSet(viewsets.ModelViewSet):
+def _consultorios_por_fila(group_by, consultorios):
+    """
+    Consultorios que entran en la capacidad de una fila del reporte. Una
+    fila por consultorio o por profesional tiene uno solo a la vez; el
+    resto, todos los de `consultorios`.
+    """
+    if "consultorio" in group_by or "profesional" in group_by:
+        return 1
+    return consultorios
+
+
+def _minutos(duracion):
+    return int(duracion.total_seconds() // 60) if duracion else 0
+
+
+def _porcentaje(parte, total):
+    return round(100 * parte / total, 2) if total else 0.0
+
+
+class FiltroFechaMixin:
+    """
+    Filtra ?date=, ?week= y ?month= sobre `campo_fecha` como un rango de
+    instantes en la zona horaria de la clínica (ver core.fechas). Solo en
+    `acciones_fecha`: un PATCH /api/turnos/5/?date=... no debe dar 404
+    porque el turno cae fuera de ese día.
+    """
+    campo_fecha = None
+    acciones_fecha = ("list", "bulk_delete", "bulk_restore")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.campo_fecha and self.action in self.acciones_fecha:
+            rango = fechas.rango_parametros(self.request.query_params)
+            if rango:
+                queryset = fechas.filtrar_rango(queryset, self.campo_fecha, rango)
+        return queryset
+
+
+class LecturaRapidaMixin:
+    """
+    Con `lectura_rapida`, el listado se arma desde values_list() con
+    core.lectura en vez de instanciar modelos; la salida es la misma.
+    """
+    lectura_rapida = False
+
+    def list(self, request, *args, **kwargs):
+        if not self.lectura_rapida:
+            return super().list(request, *args, **kwargs)
+        lector = lectura.lector(self.get_serializer_class())
+        queryset = lector.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(lector.filas(page))
+        return Response(lector.filas(queryset))
+
+
+class SoftDeleteModelViewSet(FiltroFechaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
+    bulk_batch_size = 500
+    # Parámetros de la query string que get_queryset usa como filtro. Las
+    # acciones en lote sin ids exigen al menos uno (o un rango de fechas).
+    parametros_filtro = ()
+
+    def base_queryset(self, model):
+        """
+        Punto de partida de get_queryset: registros activos, o eliminados
+        cuando se está restaurando en lote, de las sedes visibles.
+        """
+        if self.action == "bulk_restore" and hasattr(model, "all_objects"):
+            queryset = model.all_objects.dead()
+        else:
+            queryset = model.objects.all()
+        return sedes.filtrar(queryset, self.request)
+
+    def filter_restorable(self, queryset):
+        return queryset
+
+    def filtros_pedidos(self):
+        """
+        Filtros que el pedido efectivamente aplica: los de
+        `parametros_filtro` con valor y el rango de fechas, si es válido.
+        """
+        params = self.request.query_params
+        pedidos = [nombre for nombre in self.parametros_filtro if params.get(nombre)]
+        if self.campo_fecha and fechas.rango_parametros(params):
+            pedidos.append("fecha")
+        return pedidos
+
     def perform_create(self, serializer):
         instance = serializer.save()
         log_action(self.request.user, AuditLog.Action.CREATE, instance)
@@ -66,6 +294,83 @@ class SoftDeleteModelViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         soft_delete_instance(instance, self.request.user)
 
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request, *args, **kwargs):
+        return self._bulk_action(request, AuditLog.Action.DELETE)
+
+    @action(detail=False, methods=["post"], url_path="bulk-restore")
+    def bulk_restore(self, request, *args, **kwargs):
+        return self._bulk_action(request, AuditLog.Action.RESTORE)
+
+    def _bulk_action(self, request, audit_action):
+        """
+        Acepta {"ids": [...]} en el body o los mismos filtros del listado
+        en la query string. El alcance es siempre el de get_queryset.
+        """
+        serializer = BulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get("ids")
+
+        # Parámetros que no filtran (?format=, ?page=) no cuentan: sin ids ni
+        # filtros la acción alcanzaría a todo el recurso.
+        if not ids and not self.filtros_pedidos():
+            return Response(
+                {"detail": "Debe enviar ids o filtros."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        qs = self.filter_queryset(self.get_queryset())
+        model = qs.model
+        if not hasattr(model, "all_objects"):
+            return Response(
+                {"detail": "Este recurso no admite bajas en lote."},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+
+        if ids:
+            qs = qs.filter(pk__in=ids)
+        if audit_action == AuditLog.Action.RESTORE:
+            qs = self.filter_restorable(qs)
+        matched = list(qs.order_by().values_list("pk", flat=True))
+
+        # Un UPDATE por lote, todos en una transacción: si un lote falla no
+        # queda aplicada solo una parte.
+        affected = 0
+        try:
+            with transaction.atomic():
+                for start in range(0, len(matched), self.bulk_batch_size):
+                    batch = matched[start:start + self.bulk_batch_size]
+                    rows = model.all_objects.select_for_update().filter(pk__in=batch)
+                    if audit_action == AuditLog.Action.DELETE:
+                        batch_ids = list(rows.alive().values_list("pk", flat=True))
+                        model.all_objects.filter(pk__in=batch_ids).soft_delete(
+                            request.user
+                        )
+                    else:
+                        batch_ids = list(rows.dead().values_list("pk", flat=True))
+                        model.all_objects.filter(pk__in=batch_ids).restore()
+                    log_actions(
+                        request.user,
+                        audit_action,
+                        model,
+                        batch_ids,
+                        metadata={"bulk": True},
+                    )
+                    affected += len(batch_ids)
+        except IntegrityError:
+            verbo = "eliminar" if audit_action == AuditLog.Action.DELETE else "restaurar"
+            return Response(
+                {
+                    "detail": f"No se pudieron {verbo} los registros por conflictos; "
+                    "no se aplicó ningún cambio.",
+                    "matched": len(matched),
+                    "affected": 0,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response({"matched": len(matched), "affected": affected})
+
 
 class LoginView(APIView):
     authentication_classes = []  # no exigimos auth para loguear
@@ -129,28 +434,157 @@ class PacienteViewSet(SoftDeleteModelViewSet):
     CRUD de pacientes.
     Requiere estar autenticado con JWT.
     """
-    queryset = Paciente.objects.filter(is_active=True).order_by("-created_at")
     serializer_class = PacienteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    campo_fecha = "created_at"
+    lectura_rapida = True
+
+    def get_queryset(self):
+        return self.base_queryset(Paciente).order_by("-created_at")
+
+    def perform_create(self, serializer):
+        instance = serializer.save(sede=sedes.sede_para_crear(self.request))
+        log_action(self.request.user, AuditLog.Action.CREATE, instance)
+
+    @action(detail=True, methods=["get"])
+    def expediente(self, request, *args, **kwargs):
+        """
+        Paciente con sus últimas evoluciones, informes (sin contenido),
+        documentos y próximos turnos. Cada colección se trae con un
+        Prefetch recortado (ROW_NUMBER en SQL): son 5 consultas sin
+        importar el largo de la historia.
+        """
+        try:
+            limite = min(max(int(request.query_params.get("limite", 10)), 1), 50)
+        except ValueError:
+            limite = 10
+
+        paciente = self.get_object()
+        turnos = Turno.objects.filter(inicio__gte=timezone.now()).select_related(
+            "profesional", "consultorio"
+        )
+        if request.user.role != User.Role.DUENA:
+            turnos = turnos.filter(profesional=request.user)
+
+        prefetch_related_objects(
+            [paciente],
+            Prefetch(
+                "evoluciones",
+                queryset=Evolucion.objects.select_related("profesional").order_by(
+                    "-creado_en"
+                )[:limite],
+                to_attr="ultimas_evoluciones",
+            ),
+            Prefetch(
+                "informes",
+                queryset=Informe.objects.select_related("profesional")
+                .defer("contenido_html", "texto_busqueda")
+                .order_by("-actualizado_en")[:limite],
+                to_attr="ultimos_informes",
+            ),
+            Prefetch(
+                "documentos",
+                queryset=Documento.objects.order_by("-creado_en")[:limite],
+                to_attr="ultimos_documentos",
+            ),
+            Prefetch(
+                "turnos",
+                queryset=turnos.order_by("inicio")[:limite],
+                to_attr="proximos_turnos",
+            ),
+        )
+
+        context = self.get_serializer_context()
+        return Response(
+            {
+                "paciente": PacienteSerializer(paciente, context=context).data,
+                "evoluciones": EvolucionSerializer(
+                    paciente.ultimas_evoluciones, many=True, context=context
+                ).data,
+                "informes": InformeResumenSerializer(
+                    paciente.ultimos_informes, many=True, context=context
+                ).data,
+                "documentos": DocumentoSerializer(
+                    paciente.ultimos_documentos, many=True, context=context
+                ).data,
+                "turnos": TurnoSerializer(
+                    paciente.proximos_turnos, many=True, context=context
+                ).data,
+            }
+        )
 
 
 class UserViewSet(SoftDeleteModelViewSet):
     """
     Gestión de usuarios (solo dueña).
     """
-    queryset = User.objects.filter(is_active=True).order_by("email")
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsDuena]
 
+    def get_queryset(self):
+        return self.base_queryset(User).prefetch_related("sedes").order_by("email")
+
+    def perform_create(self, serializer):
+        if "sedes" in serializer.validated_data:
+            instance = serializer.save()
+        else:
+            instance = serializer.save(sedes=[sedes.sede_para_crear(self.request)])
+        log_action(self.request.user, AuditLog.Action.CREATE, instance)
+
+
+class SedeViewSet(viewsets.ModelViewSet):
+    """
+    Sedes de la clínica. La dueña las administra; cada profesional ve las
+    suyas.
+    """
+    serializer_class = SedeSerializer
+    permission_classes = [permissions.IsAuthenticated, IsDuenaOrReadOnly]
+
+    def get_queryset(self):
+        qs = Sede.objects.all()
+        if self.request.user.role != User.Role.DUENA:
+            qs = qs.filter(usuarios=self.request.user)
+        return qs.order_by("nombre")
+
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        log_action(self.request.user, AuditLog.Action.CREATE, instance)
+
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        log_action(self.request.user, AuditLog.Action.UPDATE, instance)
+
+    def perform_destroy(self, instance):
+        try:
+            with transaction.atomic():
+                log_action(self.request.user, AuditLog.Action.DELETE, instance)
+                instance.delete()
+        except ProtectedError:
+            raise ValidationError(
+                {"detail": "La sede tiene consultorios, pacientes o turnos."}
+            )
+
 
 class ConsultorioViewSet(SoftDeleteModelViewSet):
     """
     CRUD de consultorios.
     """
-    queryset = Consultorio.objects.filter(is_active=True).order_by("numero")
     serializer_class = ConsultorioSerializer
     permission_classes = [permissions.IsAuthenticated, IsDuenaOrReadOnly]
 
+    def get_queryset(self):
+        return self.base_queryset(Consultorio).order_by("sede", "numero")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "create":
+            context["sede"] = sedes.sede_para_crear(self.request)
+        return context
+
+    def perform_create(self, serializer):
+        instance = serializer.save(sede=serializer.context["sede"])
+        log_action(self.request.user, AuditLog.Action.CREATE, instance)
+
 
 class TurnoViewSet(SoftDeleteModelViewSet):
     """
@@ -158,12 +592,23 @@ class TurnoViewSet(SoftDeleteModelViewSet):
     """
     serializer_class = TurnoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    campo_fecha = "inicio"
+    lectura_rapida = True
+    parametros_filtro = (
+        "paciente",
+        "profesional",
+        "consultorio",
+        "consultorio_numero",
+        "estado",
+        "start",
+        "end",
+    )
 
     def get_queryset(self):
         user = self.request.user
-        qs = Turno.objects.select_related(
+        qs = self.base_queryset(Turno).select_related(
             "paciente", "profesional", "consultorio"
-        ).filter(is_active=True)
+        )
         if user.role != User.Role.DUENA:
             qs = qs.filter(profesional=user)
 
@@ -173,7 +618,6 @@ class TurnoViewSet(SoftDeleteModelViewSet):
         consultorio_id = params.get("consultorio")
         consultorio_numero = params.get("consultorio_numero")
         estado = params.get("estado")
-        date_str = params.get("date")
         start_str = params.get("start")
         end_str = params.get("end")
 
@@ -191,11 +635,6 @@ class TurnoViewSet(SoftDeleteModelViewSet):
         if user.role == User.Role.DUENA and profesional_id:
             qs = qs.filter(profesional_id=profesional_id)
 
-        if date_str:
-            date_value = parse_date(date_str)
-            if date_value:
-                qs = qs.filter(inicio__date=date_value)
-
         start_dt = parse_datetime(start_str) if start_str else None
         end_dt = parse_datetime(end_str) if end_str else None
 
@@ -208,7 +647,147 @@ class TurnoViewSet(SoftDeleteModelViewSet):
 
         return qs.order_by("inicio")
 
+    def filtros_pedidos(self):
+        pedidos = super().filtros_pedidos()
+        params = self.request.query_params
+        # Los que get_queryset ignora no acotan nada.
+        if self.request.user.role != User.Role.DUENA:
+            pedidos = [p for p in pedidos if p != "profesional"]
+        return [
+            p for p in pedidos if p not in ("start", "end") or parse_datetime(params[p])
+        ]
+
+    def filter_restorable(self, queryset):
+        # No se restauran turnos cuyo horario ya fue ocupado por otro, ni
+        # candidatos que se pisan entre sí: no hay cómo elegir cuál vuelve.
+        return queryset.without_conflicts().without_overlaps()
+
+    @action(detail=False, methods=["get"])
+    def resumen(self, request, *args, **kwargs):
+        """
+        Conteos, horas reservadas y ocupación agrupados por estado,
+        consultorio, profesional, día o semana, en un único GROUP BY.
+        """
+        params = request.query_params
+        group_by = [g for g in (params.get("group_by") or "estado").split(",") if g]
+        invalidos = [g for g in group_by if g not in RESUMEN_AGRUPACIONES]
+        if invalidos:
+            return Response(
+                {"group_by": f"Valores inválidos: {', '.join(invalidos)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start, end = self._resumen_rango(params)
+        if end <= start:
+            return Response(
+                {"end": "El fin del rango debe ser posterior al inicio."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tz = timezone.get_current_timezone()
+        duracion = ExpressionWrapper(F("fin") - F("inicio"), output_field=DurationField())
+        campos = [c for g in group_by for c in RESUMEN_AGRUPACIONES[g]]
+        filas = (
+            self.get_queryset()
+            .filter(inicio__lt=end, fin__gt=start)
+            .order_by()
+            .annotate(
+                dia=TruncDate("inicio", tzinfo=tz),
+                semana=TruncWeek("inicio", output_field=DateField(), tzinfo=tz),
+            )
+            .values(*campos)
+            .annotate(
+                turnos=Count("id"),
+                reservado=Sum(duracion),
+                ocupado=Sum(duracion, filter=~Q(estado=Turno.Estados.CANCELADO)),
+            )
+            .order_by(*campos)
+        )
+
+        desde = timezone.localtime(start).date()
+        hasta = timezone.localtime(end - timezone.timedelta(microseconds=1)).date()
+        hasta += timezone.timedelta(days=1)
+        # Un consultorio o un solo profesional (el suyo, o ?profesional=)
+        # ocupan a lo sumo un consultorio a la vez.
+        if (
+            params.get("consultorio")
+            or params.get("consultorio_numero")
+            or request.user.role != User.Role.DUENA
+            or params.get("profesional")
+        ):
+            consultorios = 1
+        else:
+            consultorios = sedes.filtrar(Consultorio.objects.all(), request).count()
+        por_fila = _consultorios_por_fila(group_by, consultorios)
+
+        def capacidad(fila):
+            if "dia" in group_by:
+                dias = _dias_habiles(fila["dia"], fila["dia"] + timezone.timedelta(days=1))
+            elif "semana" in group_by:
+                semana = fila["semana"]
+                dias = _dias_habiles(
+                    max(semana, desde), min(semana + timezone.timedelta(days=7), hasta)
+                )
+            else:
+                dias = _dias_habiles(desde, hasta)
+            return dias * JORNADA_MINUTOS * por_fila
+
+        resultados = []
+        total_turnos = 0
+        total_reservado = 0
+        total_ocupado = 0
+        for fila in filas:
+            reservado = _minutos(fila.pop("reservado"))
+            ocupado = _minutos(fila.pop("ocupado"))
+            total_turnos += fila["turnos"]
+            total_reservado += reservado
+            total_ocupado += ocupado
+            fila["horas"] = round(reservado / 60, 2)
+            fila["ocupacion"] = _porcentaje(ocupado, capacidad(fila))
+            resultados.append(fila)
+
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "group_by": group_by,
+                "totales": {
+                    "turnos": total_turnos,
+                    "horas": round(total_reservado / 60, 2),
+                    "ocupacion": _porcentaje(
+                        total_ocupado,
+                        _dias_habiles(desde, hasta) * JORNADA_MINUTOS * consultorios,
+                    ),
+                },
+                "resultados": resultados,
+            }
+        )
+
+    def _resumen_rango(self, params):
+        """
+        Rango [start, end) del resumen; por defecto, la semana actual.
+        """
+        start = _parse_bound(params.get("start"))
+        end = _parse_bound(params.get("end"))
+        if start is None:
+            hoy = timezone.localdate()
+            lunes = hoy - timezone.timedelta(days=hoy.weekday())
+            start = timezone.make_aware(datetime.combine(lunes, time.min))
+        if end is None:
+            end = start + timezone.timedelta(days=7)
+        return start, end
+
+    def _validar_sede(self, serializer):
+        consultorio = serializer.validated_data.get("consultorio")
+        if consultorio is not None:
+            sedes.validar(self.request, consultorio.sede_id, "consultorio")
+
+    def perform_update(self, serializer):
+        self._validar_sede(serializer)
+        super().perform_update(serializer)
+
     def perform_create(self, serializer):
+        self._validar_sede(serializer)
         user = self.request.user
         if user.role == User.Role.DUENA:
             profesional_id = self.request.data.get("profesional")
@@ -231,24 +810,20 @@ class EvolucionViewSet(SoftDeleteModelViewSet):
     """
     serializer_class = EvolucionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    campo_fecha = "creado_en"
+    lectura_rapida = True
+    parametros_filtro = ("paciente", "profesional")
 
     def get_queryset(self):
-        qs = Evolucion.objects.select_related("paciente", "profesional").filter(
-            is_active=True
-        )
+        qs = self.base_queryset(Evolucion).select_related("paciente", "profesional")
         params = self.request.query_params
         paciente_id = params.get("paciente")
         profesional_id = params.get("profesional")
-        date_str = params.get("date")
 
         if paciente_id:
             qs = qs.filter(paciente_id=paciente_id)
         if profesional_id:
             qs = qs.filter(profesional_id=profesional_id)
-        if date_str:
-            date_value = parse_date(date_str)
-            if date_value:
-                qs = qs.filter(creado_en__date=date_value)
 
         return qs.order_by("-creado_en")
 
@@ -275,17 +850,25 @@ class DocumentoViewSet(SoftDeleteModelViewSet):
     """
     serializer_class = DocumentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    campo_fecha = "creado_en"
+    parametros_filtro = ("paciente", "q", "tipo", "checksum")
 
     def get_queryset(self):
-        qs = Documento.objects.select_related("paciente").filter(is_active=True)
+        qs = self.base_queryset(Documento).select_related("paciente")
         params = self.request.query_params
         paciente_id = params.get("paciente")
         query = params.get("q")
+        tipo = params.get("tipo")
+        checksum = params.get("checksum")
 
         if paciente_id:
             qs = qs.filter(paciente_id=paciente_id)
         if query:
             qs = qs.filter(nombre__icontains=query)
+        if tipo:
+            qs = qs.filter(tipo_mime=tipo)
+        if checksum:
+            qs = qs.filter(checksum=checksum)
 
         return qs.order_by("-creado_en")
 
@@ -296,11 +879,12 @@ class InformeViewSet(SoftDeleteModelViewSet):
     """
     serializer_class = InformeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    campo_fecha = "creado_en"
+    lectura_rapida = True
+    parametros_filtro = ("paciente", "profesional")
 
     def get_queryset(self):
-        qs = Informe.objects.select_related("paciente", "profesional").filter(
-            is_active=True
-        )
+        qs = self.base_queryset(Informe).select_related("paciente", "profesional")
         params = self.request.query_params
         paciente_id = params.get("paciente")
         profesional_id = params.get("profesional")
@@ -343,9 +927,10 @@ class InvitacionViewSet(SoftDeleteModelViewSet):
     """
     serializer_class = InvitacionSerializer
     permission_classes = [permissions.IsAuthenticated, IsDuena]
+    campo_fecha = "creado_en"
 
     def get_queryset(self):
-        return Invitacion.objects.all().order_by("-creado_en")
+        return self.base_queryset(Invitacion).order_by("-creado_en")
 
     def perform_create(self, serializer):
         email = serializer.validated_data["email"].strip().lower()
@@ -353,28 +938,31 @@ class InvitacionViewSet(SoftDeleteModelViewSet):
         token = get_random_string(48)
         expira_en = timezone.now() + timezone.timedelta(days=7)
 
-        invitacion = serializer.save(
-            email=email,
-            role=role,
-            token=token,
-            expira_en=expira_en,
-            creado_por=self.request.user,
-        )
-        log_action(self.request.user, AuditLog.Action.CREATE, invitacion)
-
         frontend_base = getattr(settings, "FRONTEND_BASE_URL", "http://localhost:5173")
         link = f"{frontend_base}/?invite={token}"
-        send_mail(
-            subject="Invitación a Lazos Digital",
-            message=(
-                "Fuiste invitado/a a Lazos Digital.\n\n"
-                f"Creá tu contraseña aquí: {link}\n\n"
-                "El enlace expira en 7 días."
-            ),
-            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
-            recipient_list=[email],
-            fail_silently=True,
-        )
+        # El email queda en la bandeja de salida dentro de la misma
+        # transacción; lo envía el comando enviar_correos.
+        # La dueña ve todas las sedes: su invitación no necesita una.
+        sede = None if role == User.Role.DUENA else sedes.sede_para_crear(self.request)
+        with transaction.atomic():
+            invitacion = serializer.save(
+                email=email,
+                role=role,
+                token=token,
+                expira_en=expira_en,
+                creado_por=self.request.user,
+                sede=sede,
+            )
+            log_action(self.request.user, AuditLog.Action.CREATE, invitacion)
+            correo.encolar(
+                asunto="Invitación a Lazos Digital",
+                cuerpo=(
+                    "Fuiste invitado/a a Lazos Digital.\n\n"
+                    f"Creá tu contraseña aquí: {link}\n\n"
+                    "El enlace expira en 7 días."
+                ),
+                destinatarios=[email],
+            )
         return invitacion
 
 
@@ -411,13 +999,15 @@ class InvitacionAcceptView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user, _created = User.objects.get_or_create(
+        user, _created = User.all_objects.get_or_create(
             email=invitacion.email,
             defaults={"role": invitacion.role, "is_enabled": True},
         )
         user.set_password(password)
         user.is_enabled = True
         user.save(update_fields=["password", "is_enabled"])
+        if invitacion.sede_id:
+            user.sedes.add(invitacion.sede_id)
 
         invitacion.usado_en = timezone.now()
         invitacion.save(update_fields=["usado_en"])
@@ -426,10 +1016,658 @@ class InvitacionAcceptView(APIView):
         return Response({"detail": "Contraseña creada correctamente."})
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class OcupacionView(APIView):
+    """
+    Reportes de ocupación por mes o año. Lee de OcupacionDiaria, así que
+    el costo depende de la cantidad de días y no de la de turnos.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        group_by = [g for g in (params.get("group_by") or "mes").split(",") if g]
+        invalidos = [g for g in group_by if g not in OCUPACION_AGRUPACIONES]
+        if invalidos:
+            return Response(
+                {"group_by": f"Valores inválidos: {', '.join(invalidos)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        hoy = timezone.localdate()
+        desde = parse_date(params.get("desde") or "") or hoy.replace(month=1, day=1)
+        hasta = parse_date(params.get("hasta") or "") or hoy.replace(month=12, day=31)
+        if hasta < desde:
+            return Response(
+                {"hasta": "La fecha final debe ser posterior a la inicial."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            profesional = int(params["profesional"]) if params.get("profesional") else None
+            consultorio = int(params["consultorio"]) if params.get("consultorio") else None
+        except ValueError:
+            return Response(
+                {"detail": "Filtros inválidos."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        qs = OcupacionDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        qs = sedes.filtrar(qs, request, "consultorio__sede")
+        user = request.user
+        if user.role != User.Role.DUENA:
+            qs = qs.filter(profesional=user)
+        elif profesional:
+            qs = qs.filter(profesional_id=profesional)
+
+        if consultorio:
+            qs = qs.filter(consultorio_id=consultorio)
+        if params.get("estado"):
+            qs = qs.filter(estado=params["estado"])
+        # Igual que en TurnoViewSet.resumen: un consultorio o un profesional
+        # ocupan a lo sumo un consultorio a la vez.
+        if consultorio or user.role != User.Role.DUENA or profesional:
+            consultorios = 1
+        else:
+            consultorios = sedes.filtrar(Consultorio.objects.all(), request).count()
+        por_fila = _consultorios_por_fila(group_by, consultorios)
+
+        campos = [c for g in group_by for c in OCUPACION_AGRUPACIONES[g]]
+        filas = (
+            qs.annotate(mes=TruncMonth("fecha"))
+            .values(*campos)
+            .annotate(
+                total_turnos=Sum("turnos"),
+                reservado=Sum("minutos"),
+                ocupado=Sum("minutos", filter=~Q(estado=Turno.Estados.CANCELADO)),
+            )
+            .order_by(*campos)
+        )
+
+        fin = hasta + timezone.timedelta(days=1)
+
+        def capacidad(fila):
+            if "fecha" in group_by:
+                dias = _dias_habiles(fila["fecha"], fila["fecha"] + timezone.timedelta(days=1))
+            elif "mes" in group_by:
+                mes = fila["mes"]
+                siguiente = (mes + timezone.timedelta(days=32)).replace(day=1)
+                dias = _dias_habiles(max(mes, desde), min(siguiente, fin))
+            else:
+                dias = _dias_habiles(desde, fin)
+            return dias * JORNADA_MINUTOS * por_fila
+
+        resultados = []
+        total_turnos = 0
+        total_reservado = 0
+        total_ocupado = 0
+        for fila in filas:
+            turnos = fila.pop("total_turnos") or 0
+            reservado = fila.pop("reservado") or 0
+            ocupado = fila.pop("ocupado") or 0
+            if not turnos:
+                continue
+            total_turnos += turnos
+            total_reservado += reservado
+            total_ocupado += ocupado
+            fila["turnos"] = turnos
+            fila["horas"] = round(reservado / 60, 2)
+            fila["ocupacion"] = _porcentaje(ocupado, capacidad(fila))
+            resultados.append(fila)
+
+        return Response(
+            {
+                "desde": desde,
+                "hasta": hasta,
+                "group_by": group_by,
+                "totales": {
+                    "turnos": total_turnos,
+                    "horas": round(total_reservado / 60, 2),
+                    "ocupacion": _porcentaje(
+                        total_ocupado,
+                        _dias_habiles(desde, fin) * JORNADA_MINUTOS * consultorios,
+                    ),
+                },
+                "resultados": resultados,
+            }
+        )
+
+
+class BusquedaView(APIView):
+    """
+    Búsqueda de texto completo en evoluciones e informes, ordenada por
+    relevancia y con fragmentos resaltados. Un profesional ve lo que
+    escribió y lo de los pacientes que atiende.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    tipos = ("evoluciones", "informes")
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        consulta = (params.get("q") or "").strip()
+        if not consulta:
+            return Response(
+                {"q": "Debe indicar qué buscar."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        tipos = [t for t in (params.get("tipo") or ",".join(self.tipos)).split(",") if t]
+        invalidos = [t for t in tipos if t not in self.tipos]
+        if invalidos:
+            return Response(
+                {"tipo": f"Valores inválidos: {', '.join(invalidos)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not busqueda.disponible(Evolucion):
+            return Response(
+                {"detail": "La búsqueda de texto completo requiere PostgreSQL."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        try:
+            limite = min(max(int(params.get("limite", 20)), 1), 100)
+        except ValueError:
+            limite = 20
+
+        resultados = []
+        if "evoluciones" in tipos:
+            qs = busqueda.buscar(self._alcance(Evolucion, params), consulta, "texto")
+            for evolucion in qs.defer("texto", "busqueda")[:limite]:
+                resultados.append(self._resultado("evolucion", evolucion))
+        if "informes" in tipos:
+            qs = busqueda.buscar(
+                self._alcance(Informe, params), consulta, "texto_busqueda"
+            ).defer("contenido_html", "busqueda", "texto_busqueda")
+            for informe in qs[:limite]:
+                resultado = self._resultado("informe", informe)
+                resultado["titulo"] = informe.titulo
+                resultados.append(resultado)
+
+        resultados.sort(key=lambda r: r["rank"], reverse=True)
+        return Response({"q": consulta, "resultados": resultados[:limite]})
+
+    def _alcance(self, model, params):
+        qs = sedes.filtrar(
+            model.objects.select_related("paciente", "profesional"), self.request
+        )
+        user = self.request.user
+        if user.role != User.Role.DUENA:
+            atendidos = Turno.objects.filter(profesional=user).values("paciente_id")
+            qs = qs.filter(Q(profesional=user) | Q(paciente_id__in=atendidos))
+        if params.get("paciente"):
+            qs = qs.filter(paciente_id=params["paciente"])
+        if params.get("profesional"):
+            qs = qs.filter(profesional_id=params["profesional"])
+        return qs
+
+    def _resultado(self, tipo, obj):
+        return {
+            "tipo": tipo,
+            "id": obj.id,
+            "paciente": obj.paciente_id,
+            "paciente_nombre": obj.paciente.nombre_completo,
+            "profesional": obj.profesional_id,
+            "profesional_nombre": (
+                f"{obj.profesional.first_name} {obj.profesional.last_name}".strip() or None
+            ),
+            "creado_en": obj.creado_en,
+            "rank": round(obj.rank, 4),
+            "fragmento": busqueda.resaltar(obj.fragmento),
+        }
+
+
+class AgendaTokenViewSet(viewsets.ModelViewSet):
+    """
+    Tokens de suscripción a la agenda. Un profesional solo gestiona el
+    feed de sus propios turnos; la dueña, cualquiera.
+    """
+    serializer_class = AgendaTokenSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ["get", "post", "delete", "head", "options"]
+
+    def get_queryset(self):
+        qs = AgendaToken.objects.select_related("profesional", "consultorio")
+        if self.request.user.role != User.Role.DUENA:
+            qs = qs.filter(profesional=self.request.user)
+        return qs.order_by("-creado_en")
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        extra = {"token": get_random_string(48), "creado_por": user}
+        if user.role != User.Role.DUENA:
+            extra.update(profesional=user, consultorio=None)
+        instance = serializer.save(**extra)
+        log_action(user, AuditLog.Action.CREATE, instance)
+
+    def perform_destroy(self, instance):
+        log_action(self.request.user, AuditLog.Action.DELETE, instance)
+        instance.delete()
+
+
+def _agenda_token(request, token):
+    if not hasattr(request, "_agenda_token"):
+        request._agenda_token = (
+            AgendaToken.objects.select_related("profesional", "consultorio")
+            .filter(token=token)
+            .first()
+        )
+    agenda = request._agenda_token
+    if agenda is None:
+        raise Http404("Feed inexistente.")
+    return agenda
+
+
+def _agenda_turnos(agenda):
+    hoy = timezone.localtime()
+    qs = Turno.objects.filter(
+        inicio__gte=hoy - timezone.timedelta(days=AGENDA_DIAS_ATRAS),
+        inicio__lt=hoy + timezone.timedelta(days=AGENDA_DIAS_ADELANTE),
+    )
+    if agenda.profesional_id:
+        return qs.filter(profesional_id=agenda.profesional_id)
+    return qs.filter(consultorio_id=agenda.consultorio_id)
+
+
+def _agenda_nombre(agenda):
+    if agenda.profesional_id:
+        profesional = agenda.profesional
+        nombre = f"{profesional.first_name} {profesional.last_name}".strip()
+        return f"Lazos - {nombre or profesional.email}"
+    return f"Lazos - {agenda.consultorio}"
+
+
+def _agenda_etag(request, token):
+    """
+    Validador barato: último cambio de cualquier turno del destino
+    (incluidas bajas, por índice), la cantidad de turnos vigentes en la
+    ventana y el día, que desplaza la ventana. El feed también muestra
+    nombres de pacientes y consultorios: entra la versión más alta de los
+    de la ventana, que cambia si alguno se renombra, y el nombre del
+    calendario.
+    """
+    agenda = _agenda_token(request, token)
+    if agenda.profesional_id:
+        cambios = Turno.all_objects.filter(profesional_id=agenda.profesional_id)
+    else:
+        cambios = Turno.all_objects.filter(consultorio_id=agenda.consultorio_id)
+    ultimo = cambios.aggregate(ultimo=Max("actualizado_en"))["ultimo"]
+    vigentes = _agenda_turnos(agenda).aggregate(
+        cantidad=Count("id"),
+        pacientes=Max("paciente__version"),
+        consultorios=Max("consultorio__version"),
+    )
+    marca = ultimo.timestamp() if ultimo else 0
+    nombre = zlib.crc32(_agenda_nombre(agenda).encode())
+    return (
+        f"{agenda.pk}-{timezone.localdate().isoformat()}-{marca}-{vigentes['cantidad']}-"
+        f"{vigentes['pacientes'] or 0}-{vigentes['consultorios'] or 0}-{nombre:x}"
+    )
+
+
+@require_GET
+@condition(etag_func=_agenda_etag)
+def agenda_ics(request, token):
+    """
+    Feed .ics de solo lectura; el token de la URL es la credencial.
+    """
+    agenda = _agenda_token(request, token)
+    nombre = _agenda_nombre(agenda)
+    filas = (
+        _agenda_turnos(agenda)
+        .values(*AGENDA_CAMPOS)
+        .order_by("inicio")
+        .iterator(chunk_size=500)
+    )
+    response = StreamingHttpResponse(
+        calendario(nombre, filas), content_type="text/calendar; charset=utf-8"
+    )
+    response["Content-Disposition"] = 'inline; filename="agenda.ics"'
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
+
+
+TICKET_STREAM_SEGUNDOS = getattr(settings, "TICKET_STREAM_SEGUNDOS", 30)
+
+
+class TicketStream(Token):
+    """
+    Ticket para abrir /api/turnos/stream/. EventSource no permite headers
+    propios y lo que va en la URL queda en proxies y logs, así que ahí no
+    viaja el access token sino esto: vale unos segundos, una sola vez y
+    solo para el stream (JWTAuthentication lo rechaza por su tipo).
+    """
+    token_type = "stream"
+    lifetime = timezone.timedelta(seconds=TICKET_STREAM_SEGUNDOS)
+
+
+class TicketStreamView(APIView):
+    """
+    Emite un ticket de stream para el usuario autenticado. Al reconectar,
+    el cliente pide uno nuevo.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        ticket = TicketStream.for_user(request.user)
+        return Response({"ticket": str(ticket), "expira_en": TICKET_STREAM_SEGUNDOS})
+
+
+def _usuario_jwt(request):
+    """
+    Usuario del stream: por el header Authorization o, desde EventSource,
+    por un ticket de TicketStreamView en ?ticket=.
+    """
+    auth = JWTAuthentication()
+    raw = request.GET.get("ticket")
+    try:
+        if raw:
+            ticket = TicketStream(raw)
+            # Un solo uso: el cache compartido recuerda los ya usados hasta
+            # que vencen.
+            if not cache.add(f"stream:ticket:{ticket['jti']}", True, TICKET_STREAM_SEGUNDOS):
+                return None
+            return auth.get_user(ticket)
+        header = auth.get_header(request)
+        raw = auth.get_raw_token(header) if header else None
+        if not raw:
+            return None
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+async def agenda_stream(request):
+    """
+    Server-Sent Events con los cambios de turnos (creado, actualizado,
+    eliminado, restaurado). Filtros: consultorio, profesional y fecha. Un
+    profesional solo recibe sus turnos, igual que en TurnoViewSet.
+    Requiere servir la app por ASGI: por WSGI el stream nunca empezaría y
+    retendría el hilo (ver lazos_backend/gunicorn_conf.py).
+    """
+    if isinstance(request, WSGIRequest):
+        return JsonResponse(
+            {"detail": "El stream se sirve por ASGI (servicio stream, worker uvicorn)."},
+            status=501,
+        )
+    user = await sync_to_async(_usuario_jwt)(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"detail": "Las credenciales de autenticación no se proveyeron."},
+            status=401,
+        )
+
+    params = request.GET
+    try:
+        filtro = {
+            "consultorio": int(params["consultorio"]) if params.get("consultorio") else None,
+            "profesional": int(params["profesional"]) if params.get("profesional") else None,
+            "fecha": params.get("fecha") or None,
+        }
+    except ValueError:
+        return JsonResponse({"detail": "Filtros inválidos."}, status=400)
+    if user.role != User.Role.DUENA:
+        filtro["profesional"] = user.id
+
+    broker = realtime.broker()
+    suscripcion = broker.suscribir(filtro)
+
+    async def eventos():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    evento = await asyncio.wait_for(suscripcion.cola.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if suscripcion.desbordada:
+                    while not suscripcion.cola.empty():
+                        suscripcion.cola.get_nowait()
+                    suscripcion.desbordada = False
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
+                yield f"event: turno\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            broker.desuscribir(suscripcion)
+
+    response = StreamingHttpResponse(eventos(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _cursor_cambios(valor):
+    """
+    Cursor de /api/changes/: "<version>" (desde esa versión inclusive) o
+    "<version>:<colección>:<pk>" (dentro de esa versión, después de esa
+    fila). Devuelve (version, orden de la colección o None, pk o None).
+    """
+    if not valor:
+        return 0, None, None
+    version, _, resto = valor.partition(":")
+    if not resto:
+        return int(version), None, None
+    clave, _, pk = resto.partition(":")
+    claves = [c[0] for c in CAMBIOS_COLECCIONES]
+    if clave not in claves:
+        raise ValueError(clave)
+    return int(version), claves.index(clave), int(pk)
+
+
+class ChangesView(APIView):
+    """
+    Feed incremental para sincronizar una réplica local en el cliente.
+
+    Devuelve las filas creadas, modificadas o eliminadas (como lápidas)
+    con version en [since, límite seguro), en orden de (version, colección,
+    pk). El límite seguro es marca_cambios(): nunca pasa por encima de una
+    transacción abierta, así que un commit tardío no se pierde. Si `more`
+    es true, hay que volver a pedir con el cursor devuelto. El cursor es
+    opaco: puede cortar en medio de una transacción grande (por ejemplo,
+    una baja en lote), así ninguna respuesta pasa de CAMBIOS_LIMITE filas.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            version, orden, pk = _cursor_cambios(request.query_params.get("since"))
+        except ValueError:
+            return Response(
+                {"since": "Cursor inválido."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # El límite sale de la misma base de la que se leen las filas: una
+        # réplica atrasada no puede dar un cursor por delante de sus datos.
+        limite_seguro = marca_cambios(router.db_for_read(Turno))
+        filas = []
+        for i, (clave, model, _serializer, related) in enumerate(CAMBIOS_COLECCIONES):
+            qs = model.all_objects.filter(version__gte=version, version__lt=limite_seguro)
+            if orden is not None and i <= orden:
+                # Lo ya entregado de la versión del cursor.
+                if i < orden:
+                    qs = qs.exclude(version=version)
+                else:
+                    qs = qs.exclude(version=version, pk__lte=pk)
+            qs = sedes.filtrar(qs, request)
+            if model is Turno and request.user.role != User.Role.DUENA:
+                qs = qs.filter(profesional=request.user)
+            if related:
+                qs = qs.select_related(*related)
+            # Cada colección aporta a lo sumo lo que entra en la página.
+            for obj in qs.order_by("version", "pk")[: CAMBIOS_LIMITE + 1]:
+                filas.append((obj.version, i, obj.pk, obj))
+        filas.sort(key=lambda fila: fila[:3])
+
+        cursor = limite_seguro
+        more = len(filas) > CAMBIOS_LIMITE
+        if more:
+            filas = filas[:CAMBIOS_LIMITE]
+            version, orden, pk, _obj = filas[-1]
+            cursor = f"{version}:{CAMBIOS_COLECCIONES[orden][0]}:{pk}"
+
+        data = {"cursor": cursor, "more": more}
+        for i, (clave, _model, serializer_class, _related) in enumerate(CAMBIOS_COLECCIONES):
+            objs = [fila[3] for fila in filas if fila[1] == i]
+            vivos = [obj for obj in objs if obj.is_active]
+            data[clave] = {
+                "actualizados": serializer_class(
+                    vivos, many=True, context={"request": request}
+                ).data,
+                "eliminados": [obj.pk for obj in objs if not obj.is_active],
+            }
+        return Response(data)
+
+
+class BatchView(APIView):
+    """
+    Ejecuta varios pedidos a la API en un solo viaje:
+
+        {"requests": [{"method": "GET", "path": "/api/pacientes/1/"}, ...],
+         "parallel": true}
+
+    La autenticación se hace una vez y se reutiliza en cada subpedido.
+    Con parallel, los GET consecutivos corren en un pool de hilos; el
+    resto se ejecuta en orden. Cada subpedido es independiente (no
+    comparten transacción): las escrituras corren cada una en su propia
+    transacción y un error en un subpedido se informa como status 500 en su
+    respuesta, sin cortar el lote ni dejar a medias lo que ese subpedido
+    escribió.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_workers = getattr(settings, "BATCH_MAX_WORKERS", 4)
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pedidos = serializer.validated_data["requests"]
+        parallel = serializer.validated_data["parallel"]
+
+        respuestas = [None] * len(pedidos)
+        i = 0
+        while i < len(pedidos):
+            if parallel and pedidos[i]["method"] in permissions.SAFE_METHODS:
+                j = i
+                while j < len(pedidos) and pedidos[j]["method"] in permissions.SAFE_METHODS:
+                    j += 1
+                if j - i > 1:
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                        resultados = pool.map(
+                            lambda pedido: self._en_hilo(request, pedido),
+                            pedidos[i:j],
+                        )
+                        respuestas[i:j] = list(resultados)
+                    i = j
+                    continue
+            respuestas[i] = self._ejecutar(request, pedidos[i])
+            i += 1
+
+        return Response({"responses": respuestas})
+
+    def _en_hilo(self, request, pedido):
+        try:
+            return self._ejecutar(request, pedido)
+        finally:
+            connections.close_all()
+
+    def _ejecutar(self, request, pedido):
+        partes = urlsplit(pedido["path"])
+        try:
+            match = resolve(partes.path)
+        except Resolver404:
+            return {"status": 404, "body": {"detail": "No encontrado."}}
+
+        view_class = getattr(match.func, "cls", None)
+        if view_class is None or not issubclass(view_class, APIView) or view_class is BatchView:
+            return {"status": 400, "body": {"detail": "Ruta no admitida en lote."}}
+
+        body = b""
+        if "body" in pedido:
+            body = json.dumps(pedido["body"]).encode("utf-8")
+        environ = {
+            key: value
+            for key, value in request.META.items()
+            if key.startswith("HTTP_") or key in ("SERVER_NAME", "SERVER_PORT", "REMOTE_ADDR")
+        }
+        environ.update(
+            {
+                "REQUEST_METHOD": pedido["method"],
+                "PATH_INFO": partes.path,
+                "SCRIPT_NAME": "",
+                "QUERY_STRING": partes.query,
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(body)),
+                "wsgi.input": io.BytesIO(body),
+                "wsgi.url_scheme": request.scheme,
+            }
+        )
+        environ.pop("HTTP_AUTHORIZATION", None)
+        subrequest = WSGIRequest(environ)
+        # DRF usa ForcedAuthentication: no se vuelve a validar el JWT.
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+        subrequest.sede = getattr(request, "sede", None)
+
+        try:
+            if pedido["method"] in permissions.SAFE_METHODS:
+                response = match.func(subrequest, *match.args, **match.kwargs)
+            else:
+                with transaction.atomic():
+                    response = match.func(subrequest, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception("Error en el subpedido %s %s", pedido["method"], pedido["path"])
+            return {"status": 500, "body": {"detail": "Error interno del servidor."}}
+        if hasattr(response, "data"):
+            return {"status": response.status_code, "body": response.data}
+        if hasattr(response, "render"):
+            response.render()
+        contenido = b"" if response.streaming else response.content
+        return {"status": response.status_code, "body": contenido.decode("utf-8") or None}
+
+
+class CorreoEstadoView(APIView):
+    """
+    Profundidad de la bandeja de salida de emails.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsDuena]
+
+    def get(self, request, *args, **kwargs):
+        return Response(correo.estado_cola())
+
+
+class AuditLogViewSet(FiltroFechaMixin, LecturaRapidaMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsDuena]
+    campo_fecha = "created_at"
+    lectura_rapida = True
+
+    pagination_class = ConteoEstimadoPagination
 
     def get_queryset(self):
-        return AuditLog.objects.select_related("actor").order_by("-created_at")
+        qs = AuditLog.objects.select_related("actor")
+        params = self.request.query_params
+
+        if params.get("actor"):
+            qs = qs.filter(actor_id=params["actor"])
+        if params.get("action"):
+            qs = qs.filter(action__in=params["action"].split(","))
+        if params.get("target_type"):
+            qs = qs.filter(target_type=params["target_type"])
+            if params.get("target_id"):
+                qs = qs.filter(target_id=params["target_id"])
+
+        start = _parse_bound(params.get("start"))
+        end = _parse_bound(params.get("end"))
+        if start:
+            qs = qs.filter(created_at__gte=start)
+        if end:
+            qs = qs.filter(created_at__lt=end)
+
+        if params.get("metadata"):
+            try:
+                metadata = json.loads(params["metadata"])
+            except ValueError:
+                metadata = None
+            if not isinstance(metadata, dict):
+                raise ValidationError({"metadata": "Debe ser un objeto JSON."})
+            # Contención (@>): usa el índice GIN jsonb_path_ops.
+            qs = qs.filter(metadata__contains=metadata)
+
+        return qs.order_by("-created_at")
 
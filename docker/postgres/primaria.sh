@@ -0,0 +1,10 @@
+#!/bin/bash
+# Se ejecuta una sola vez al inicializar la primaria: crea el usuario de
+# replicación y le permite conectarse desde la red de docker-compose.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicador WITH REPLICATION LOGIN PASSWORD '${REPLICACION_PASSWORD}';
+SQL
+
+echo "host replication replicador all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,16 @@
+#!/bin/bash
+# Arranca una réplica en streaming de la primaria. La primera vez copia
+# los datos con pg_basebackup (-R deja configurado primary_conninfo).
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h "$PRIMARIA_HOST" -p 5432; do sleep 1; done
+    export PGPASSWORD="$REPLICACION_PASSWORD"
+    until pg_basebackup -h "$PRIMARIA_HOST" -U replicador -D "$PGDATA" -Fp -Xs -R; do
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chmod 0700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on
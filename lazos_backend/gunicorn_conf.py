@@ -0,0 +1,112 @@
+"""
+Configuración de gunicorn para producción.
+
+    gunicorn -c python:lazos_backend.gunicorn_conf
+
+Todo se ajusta por entorno (GUNICORN_*). Para comparar configuraciones,
+`manage.py medir_servidor` mide pedidos/s, latencias y memoria PSS:
+
+- gthread (por defecto, la API): la API es casi toda espera de base de
+  datos, así que hilos por worker suben el throughput sin multiplicar la
+  memoria. Workers = CPUs + 1 y 4 hilos por worker.
+- uvicorn: sirve la app por ASGI. Solo para /api/turnos/stream/ (SSE), en
+  un servicio aparte (`stream` en docker-compose): por WSGI Django consume
+  el iterador async entero antes de responder, así que ahí la vista
+  responde 501. Para la API no conviene: las vistas sync corren de a una
+  por worker (thread_sensitive). Workers = CPUs; un loop atiende muchas
+  conexiones abiertas.
+- sync: un pedido por worker; solo para comparar.
+
+preload_app carga Django una vez en el master y los workers lo comparten
+copy-on-write; gc.freeze() evita que el GC del worker toque (y copie)
+esas páginas. max_requests con jitter recicla workers de a uno.
+"""
+import gc
+import multiprocessing
+import os
+
+from django.db import connections
+
+
+def _entero(nombre, defecto):
+    valor = os.environ.get(nombre)
+    return int(valor) if valor else defecto
+
+
+def _booleano(nombre, defecto):
+    valor = os.environ.get(nombre)
+    if not valor:
+        return defecto
+    return valor.lower() in ("1", "true", "yes", "si")
+
+
+def _cpus():
+    # CPUs asignadas al contenedor, no las del host.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+CLASES = {
+    "gthread": "gthread",
+    "sync": "sync",
+    "uvicorn": "uvicorn_worker.UvicornWorker",
+}
+
+clase = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+worker_class = CLASES.get(clase, clase)
+asgi = "uvicorn" in worker_class.lower()
+# `manage.py medir_arranque` mide la misma app que carga esta configuración.
+APP_WSGI = "lazos_backend.wsgi:application"
+APP_ASGI = "lazos_backend.asgi:application"
+wsgi_app = APP_ASGI if asgi else APP_WSGI
+
+cpus = _cpus()
+if worker_class == "gthread":
+    workers = _entero("GUNICORN_WORKERS", cpus + 1)
+    threads = _entero("GUNICORN_THREADS", 4)
+elif asgi:
+    workers = _entero("GUNICORN_WORKERS", cpus)
+    threads = 1
+else:
+    workers = _entero("GUNICORN_WORKERS", cpus * 2 + 1)
+    threads = 1
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+backlog = _entero("GUNICORN_BACKLOG", 2048)
+# Algo más que el idle timeout habitual de un balanceador delante (2-5 s).
+keepalive = _entero("GUNICORN_KEEPALIVE", 5)
+timeout = _entero("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _entero("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+max_requests = _entero("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _entero("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+reload = _booleano("GUNICORN_RELOAD", False)
+# reload y preload no se llevan: con recarga, cada worker importa la app.
+preload_app = _booleano("GUNICORN_PRELOAD", not reload)
+
+# El heartbeat de los workers en memoria: en Docker /tmp puede ser overlayfs.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+forwarded_allow_ips = os.environ.get("GUNICORN_FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+# Como el formato por defecto, pero con la ruta sin query string: ahí
+# viajan tickets y filtros que no tienen que quedar en los logs.
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def when_ready(server):
+    if preload_app:
+        # Lo cargado hasta acá queda fuera del GC: los workers no lo copian.
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Una conexión abierta durante el preload no se comparte entre procesos.
+        connections.close_all()
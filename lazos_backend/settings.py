@@ -4,6 +4,8 @@ Django settings for lazos_backend project.
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "django-insecure-change-me")
@@ -13,7 +15,7 @@ DEBUG = os.getenv("DJANGO_DEBUG", "true").lower() == "true"
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    "core.apps.AdminDiferidoConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -27,12 +29,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompresionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.replicas.ReplicaMiddleware",
+    "core.sedes.SedeMiddleware",
 ]
 
 ROOT_URLCONF = "lazos_backend.urls"
@@ -65,6 +70,37 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura: DATABASE_REPLICA_HOSTS="host1,host2:5433". Ver
+# core/replicas.py.
+for _i, _host in enumerate(
+    h.strip() for h in os.environ.get("DATABASE_REPLICA_HOSTS", "").split(",") if h.strip()
+):
+    _host, _, _port = _host.partition(":")
+    DATABASES[f"replica_{_i + 1}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+# Atraso máximo tolerado (segundos) y tiempo que un usuario lee de la
+# primaria después de escribir.
+REPLICA_LAG_MAXIMO = float(os.environ.get("REPLICA_LAG_MAXIMO", "2"))
+REPLICA_PEGADO_SEGUNDOS = int(os.environ.get("REPLICA_PEGADO_SEGUNDOS", "10"))
+
+# Cache compartido por todos los workers: ahí vive la marca de "leer de la
+# primaria" después de escribir (core/replicas.py). Sin REDIS_URL queda el
+# cache en memoria de cada proceso, que solo sirve con un proceso.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": "lazos",
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -81,6 +117,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
+    # Usan orjson si está instalado; si no, son los de DRF.
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.OrjsonRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.renderers.OrjsonParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -92,6 +138,9 @@ REST_FRAMEWORK = {
 
 AUTH_USER_MODEL = "core.User"
 
+# Respuestas más chicas que esto (en bytes) no se comprimen.
+COMPRESION_MINIMO = int(os.environ.get("COMPRESION_MINIMO", "1024"))
+
 LANGUAGE_CODE = "es-ar"
 
 TIME_ZONE = "America/Argentina/Cordoba"
@@ -105,6 +154,17 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Recolección de archivos de documentos (ver core/archivos.py).
+DOCUMENTOS_RETENCION_DIAS = int(os.environ.get("DOCUMENTOS_RETENCION_DIAS", "90"))
+DOCUMENTOS_GRACIA_HORAS = int(os.environ.get("DOCUMENTOS_GRACIA_HORAS", "24"))
+# Worker de metadatos: documentos por lote y procesos del pool (vacío = CPUs).
+DOCUMENTOS_METADATOS_LOTE = int(os.environ.get("DOCUMENTOS_METADATOS_LOTE", "20"))
+DOCUMENTOS_METADATOS_PROCESOS = (
+    int(os.environ["DOCUMENTOS_METADATOS_PROCESOS"])
+    if os.environ.get("DOCUMENTOS_METADATOS_PROCESOS")
+    else None
+)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOWED_ORIGINS = [
@@ -115,6 +175,12 @@ CORS_ALLOWED_ORIGINS = [
     ).split(",")
     if origin.strip()
 ]
+# X-Sede elige la sede del pedido (ver core/sedes.py).
+CORS_ALLOW_HEADERS = (*default_headers, "x-sede")
+
+# Broker de eventos de agenda en vivo. Con más de un proceso o nodo usar
+# "core.realtime.PostgresBroker".
+REALTIME_BROKER = os.getenv("REALTIME_BROKER", "core.realtime.MemoryBroker")
 
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@lazos.local")
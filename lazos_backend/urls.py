@@ -1,6 +1,6 @@
 """lazos_backend URL Configuration"""
-from django.contrib import admin
-from django.urls import path, include
+from django.urls import URLResolver, path, include
+from django.urls.resolvers import RoutePattern
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
@@ -19,9 +19,20 @@ from core.views import (
     MeView,
     ChangePasswordView,
     AuditLogViewSet,
+    OcupacionView,
+    AgendaTokenViewSet,
+    agenda_ics,
+    CorreoEstadoView,
+    agenda_stream,
+    TicketStreamView,
+    ChangesView,
+    BatchView,
+    BusquedaView,
+    SedeViewSet,
 )
 
 router = DefaultRouter()
+router.register(r'sedes', SedeViewSet, basename='sede')
 router.register(r'usuarios', UserViewSet, basename='usuario')
 router.register(r'pacientes', PacienteViewSet, basename='paciente')
 router.register(r'consultorios', ConsultorioViewSet, basename='consultorio')
@@ -31,14 +42,30 @@ router.register(r'documentos', DocumentoViewSet, basename='documento')
 router.register(r'informes', InformeViewSet, basename='informe')
 router.register(r'invitaciones', InvitacionViewSet, basename='invitacion')
 router.register(r'audit-logs', AuditLogViewSet, basename='audit_log')
+router.register(r'agenda-tokens', AgendaTokenViewSet, basename='agenda_token')
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    # Con el nombre del módulo como string, el resolver lo importa recién
+    # cuando un pedido empieza con admin/ (ver core.apps.AdminDiferidoConfig).
+    URLResolver(
+        RoutePattern("admin/"),
+        "lazos_backend.urls_admin",
+        app_name="admin",
+        namespace="admin",
+    ),
     path("api/auth/login/", LoginView.as_view(), name="login"),
     path("api/auth/token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/auth/me/", MeView.as_view(), name="auth_me"),
     path("api/auth/change-password/", ChangePasswordView.as_view(), name="auth_change_password"),
     path("api/invitaciones/accept/", InvitacionAcceptView.as_view(), name="invitacion_accept"),
+    path("api/ocupacion/", OcupacionView.as_view(), name="ocupacion"),
+    path("api/agenda/<str:token>.ics", agenda_ics, name="agenda_ics"),
+    path("api/correos/estado/", CorreoEstadoView.as_view(), name="correos_estado"),
+    path("api/turnos/stream/", agenda_stream, name="turnos_stream"),
+    path("api/turnos/stream/ticket/", TicketStreamView.as_view(), name="turnos_stream_ticket"),
+    path("api/changes/", ChangesView.as_view(), name="changes"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/busqueda/", BusquedaView.as_view(), name="busqueda"),
     path('api/', include(router.urls)),
 ]
 
@@ -0,0 +1,9 @@
+"""
+URLs del admin. Se importan recién con el primer pedido a /admin/ (o el
+primer reverse()): ahí se registran los ModelAdmin de cada app.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()